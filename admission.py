@@ -0,0 +1,213 @@
+# admission.py
+import os
+import math
+import time
+import heapq
+import threading
+from collections import deque
+
+
+def available_memory_bytes():
+    """Physical memory, or the container's cgroup limit when that is lower; None if unknown"""
+    try:
+        total = os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        total = None
+    try:
+        with open('/sys/fs/cgroup/memory.max') as f:
+            limit = f.read().strip()
+        if limit.isdigit():
+            total = min(total, int(limit)) if total else int(limit)
+    except OSError:
+        pass
+    return total
+
+
+class AdmissionRejected(Exception):
+    """Raised when work can't be admitted: the wait queue is full or its deadline passed"""
+
+    def __init__(self, message, retry_after):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class Ticket:
+    """Resources held by one admitted piece of work; release it when the work is done"""
+
+    def __init__(self, controller, cost, kind, units, estimate):
+        self.controller = controller
+        self.cost = cost
+        self.kind = kind
+        self.units = units
+        self.estimate = estimate  # Expected seconds the resources are held
+        self.admitted = None
+        self.expected_end = None
+        self.released = False
+
+    def release(self):
+        self.controller._release(self)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.release()
+        return False
+
+
+class AdmissionController:
+    """Token budgets (e.g. CPU cores and memory bytes) that work must fit in before it starts.
+
+    `acquire` takes the estimated cost of a piece of work in each budget. Work
+    that fits starts at once; the rest waits in FIFO order, so a large job isn't
+    overtaken forever by small ones. A cost larger than a budget is capped to it,
+    so such work runs alone instead of never. With a timeout the wait is bounded
+    by `max_waiting` callers in the queue and by the deadline, and callers whose
+    expected wait is already past the deadline are turned away at once; all of
+    these raise AdmissionRejected with a Retry-After estimate. Without a timeout
+    (background jobs, which have their own queue) the caller waits its turn.
+
+    How long work holds its tokens is learned per `kind`, as an average of
+    seconds per unit (pages, seconds of audio), and used for Retry-After.
+    """
+
+    def __init__(self, budgets, max_waiting=16, default_seconds_per_unit=1.0, smoothing=0.2):
+        self.capacity = dict(budgets)
+        self.in_use = {name: 0 for name in budgets}
+        self.max_waiting = max_waiting
+        self.default_seconds_per_unit = default_seconds_per_unit
+        self.smoothing = smoothing
+        self._seconds_per_unit = {}
+        self._active = set()
+        self._queue = deque()
+        self._bounded_waiting = 0
+        self._counters = {'admitted': 0, 'queued': 0, 'rejected': 0, 'timed_out': 0}
+        self._lock = threading.Condition()
+
+    def _fits(self, cost, free=None):
+        if free is None:
+            free = {name: self.capacity[name] - self.in_use[name] for name in self.capacity}
+        return all(amount <= free[name] for name, amount in cost.items())
+
+    def _estimate_seconds(self, kind, units):
+        return max(units, 1) * self._seconds_per_unit.get(kind, self.default_seconds_per_unit)
+
+    def _expected_wait(self, cost):
+        """Seconds until work costing `cost` would start if it joined the queue now.
+
+        Replays the FIFO schedule: each queued ticket starts once enough active
+        work has finished (at its expected end) and then holds its own tokens
+        for its estimated duration.
+        """
+        now = time.time()
+        free = {name: self.capacity[name] - self.in_use[name] for name in self.capacity}
+        running = [(ticket.expected_end, id(ticket), ticket.cost) for ticket in self._active]
+        heapq.heapify(running)
+        clock = now
+        for ticket_cost, estimate in [(ticket.cost, ticket.estimate) for ticket in self._queue] + [(cost, None)]:
+            while running and not self._fits(ticket_cost, free):
+                end, _, freed = heapq.heappop(running)
+                clock = max(clock, end)
+                for name, amount in freed.items():
+                    free[name] += amount
+            if estimate is None:
+                break
+            for name, amount in ticket_cost.items():
+                free[name] -= amount
+            heapq.heappush(running, (clock + estimate, id(ticket_cost), ticket_cost))
+        return clock - now
+
+    def _retry_after(self, cost):
+        return max(1, math.ceil(self._expected_wait(cost)))
+
+    def acquire(self, cost, kind=None, units=1, timeout=None):
+        """Wait for room for `cost` ({budget: amount}) and return a Ticket holding it.
+
+        Raises AdmissionRejected if the queue is full or `timeout` seconds pass.
+        """
+        cost = {name: min(cost.get(name, 0), self.capacity[name]) for name in self.capacity}
+        ticket = Ticket(self, cost, kind, units, self._estimate_seconds(kind, units))
+        with self._lock:
+            if not self._queue and self._fits(cost):
+                self._admit(ticket)
+                return ticket
+
+            if timeout is not None:
+                # Fail fast rather than hold the caller until a deadline it is not expected to make
+                expected_wait = self._expected_wait(cost)
+                if self._bounded_waiting >= self.max_waiting or expected_wait > timeout:
+                    self._counters['rejected'] += 1
+                    raise AdmissionRejected("Server is busy, try again later", max(1, math.ceil(expected_wait)))
+
+            deadline = None if timeout is None else time.monotonic() + timeout
+            self._queue.append(ticket)
+            self._counters['queued'] += 1
+            if timeout is not None:
+                self._bounded_waiting += 1
+            try:
+                while not (self._queue[0] is ticket and self._fits(cost)):
+                    remaining = None if deadline is None else deadline - time.monotonic()
+                    if remaining is not None and remaining <= 0:
+                        self._counters['timed_out'] += 1
+                        self._queue.remove(ticket)
+                        # The next in line may fit now that this one gave up its place
+                        self._lock.notify_all()
+                        raise AdmissionRejected("Timed out waiting for capacity", self._retry_after(cost))
+                    self._lock.wait(remaining)
+                self._queue.popleft()
+                self._admit(ticket)
+                self._lock.notify_all()
+                return ticket
+            finally:
+                if timeout is not None:
+                    self._bounded_waiting -= 1
+
+    def try_acquire(self, cost, kind=None, units=1):
+        """Admit `cost` only if it fits right now with nobody waiting; returns a Ticket or None.
+
+        For optional work such as prefetching, which shouldn't queue or count as rejected.
+        """
+        cost = {name: min(cost.get(name, 0), self.capacity[name]) for name in self.capacity}
+        ticket = Ticket(self, cost, kind, units, self._estimate_seconds(kind, units))
+        with self._lock:
+            if self._queue or not self._fits(cost):
+                return None
+            self._admit(ticket)
+            return ticket
+
+    def _admit(self, ticket):
+        for name, amount in ticket.cost.items():
+            self.in_use[name] += amount
+        ticket.admitted = time.time()
+        ticket.expected_end = ticket.admitted + ticket.estimate
+        self._active.add(ticket)
+        self._counters['admitted'] += 1
+
+    def _release(self, ticket):
+        with self._lock:
+            if ticket.released or ticket not in self._active:
+                return
+            ticket.released = True
+            self._active.discard(ticket)
+            for name, amount in ticket.cost.items():
+                self.in_use[name] -= amount
+            if ticket.kind is not None:
+                observed = (time.time() - ticket.admitted) / max(ticket.units, 1)
+                previous = self._seconds_per_unit.get(ticket.kind)
+                self._seconds_per_unit[ticket.kind] = observed if previous is None else (
+                    previous + self.smoothing * (observed - previous)
+                )
+            self._lock.notify_all()
+
+    def stats(self):
+        with self._lock:
+            return {
+                'budgets': {
+                    name: {'capacity': self.capacity[name], 'inUse': self.in_use[name]} for name in self.capacity
+                },
+                'active': len(self._active),
+                'waiting': len(self._queue),
+                'maxWaiting': self.max_waiting,
+                'secondsPerUnit': {kind: round(seconds, 4) for kind, seconds in self._seconds_per_unit.items()},
+                **self._counters
+            }
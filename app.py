@@ -1,44 +1,278 @@
 # app.py
 import os
-import io
-import pytesseract
-import base64
 from PIL import Image
-from pdf2image import convert_from_path
 import PyPDF2
 import flask
 from flask import Flask, request, render_template, jsonify, send_file
 from werkzeug.utils import secure_filename
+from werkzeug.http import parse_content_range_header
 import tempfile
-import subprocess
-import speech_recognition as sr
-# Fix import for moviepy
-from moviepy.editor import VideoFileClip
-from pydub import AudioSegment
-from pydub.silence import split_on_silence
 import time
-import gc  # Import garbage collector for cleaning memory
 import shutil  # For file operations
 import uuid  # For generating unique identifiers
+import json
+import threading
+import contextvars
+from concurrent.futures import Future
+from ocr_engine import PageOCREngine
+from pdf_render import iter_rendered_windows, render_page
+from preprocess import choose_render_dpi
+from result_cache import ResultCache, hash_file, make_cache_key
+from jobs import JobManager, QueueFullError
+from preview_store import PreviewStore
+from video_pipeline import extract_visuals
+from audio_stream import AudioDecodeError, iter_pcm, cut_preview, probe_duration
+from transcription import ChunkedTranscriber
+from speech_backends import create_backend
+from storage import SpoolingRequest, store_upload, store_stream, remove_file
+from upload_sessions import UploadSessions, UploadNotFound
+from artifact_store import ArtifactStore
+from search_index import SearchIndex
+from documents import DocumentCache, parse_page_range, select_pages
+from admission import AdmissionController, AdmissionRejected, available_memory_bytes
+from batch import BatchManager, is_archive, iter_archive_members, member_filename
+import metrics as metrics_module
+from metrics import Metrics
 
 app = Flask(__name__)
+app.request_class = SpoolingRequest
 app.config['UPLOAD_FOLDER'] = 'uploads'
-app.config['MAX_CONTENT_LENGTH'] = 256 * 1024 * 1024  # 256MB max upload
+app.config['MAX_CONTENT_LENGTH'] = int(os.environ.get('MAX_CONTENT_LENGTH', 256 * 1024 * 1024))  # Largest request: a whole /upload, or one chunk
+app.config['CHUNKED_UPLOAD_MAX_BYTES'] = int(os.environ.get('CHUNKED_UPLOAD_MAX_BYTES', 4 * 1024 * 1024 * 1024))  # Largest file sent in chunks
+app.config['CHUNKED_UPLOAD_CHUNK_BYTES'] = int(os.environ.get('CHUNKED_UPLOAD_CHUNK_BYTES', 8 * 1024 * 1024))  # Chunk size suggested to clients
+app.config['CHUNKED_UPLOAD_TTL'] = int(os.environ.get('CHUNKED_UPLOAD_TTL', 24 * 3600))  # Seconds an unfinished upload waits for its next chunk
+app.config['CHUNKED_EARLY_EXTRACTION'] = os.environ.get('CHUNKED_EARLY_EXTRACTION', '1') == '1'  # Transcribe audio while it is still arriving
+app.config['CHUNKED_EARLY_IDLE_SECONDS'] = int(os.environ.get('CHUNKED_EARLY_IDLE_SECONDS', 30))  # Stalled uploads give their budget back
+app.config['ARTIFACT_TTL'] = int(os.environ.get('ARTIFACT_TTL', 3600))  # Seconds uploads and extracted text stay downloadable
+app.config['ARTIFACT_MAX_BYTES'] = int(os.environ.get('ARTIFACT_MAX_BYTES', 10 * 1024 * 1024 * 1024))  # Least recently used go first past this
+app.config['ARTIFACT_SWEEP_INTERVAL'] = int(os.environ.get('ARTIFACT_SWEEP_INTERVAL', 60))
 app.config['ALLOWED_EXTENSIONS'] = {'pdf', 'png', 'jpg', 'jpeg', 'mp3', 'wav', 'mp4', 'avi', 'mov', 'mkv'}
+app.config['OCR_WORKERS'] = int(os.environ.get('OCR_WORKERS', os.cpu_count() or 1))  # Max Tesseract processes at once
+app.config['OCR_LANG'] = os.environ.get('OCR_LANG', 'eng')
+app.config['OCR_STRATEGY'] = os.environ.get('OCR_STRATEGY', 'adaptive')  # adaptive or fixed
+app.config['OCR_BACKEND'] = os.environ.get('OCR_BACKEND', 'auto')  # tesserocr, pytesseract or auto
+app.config['OCR_PREPROCESS'] = os.environ.get('OCR_PREPROCESS', '1') == '1'  # Rescale, deskew and binarize pages before OCR
+app.config['OCR_TARGET_LINE_HEIGHT'] = int(os.environ.get('OCR_TARGET_LINE_HEIGHT', 40))  # Text line height in pixels Tesseract gets
+app.config['PDF_DPI'] = int(os.environ.get('PDF_DPI', 200))
+app.config['PDF_AUTO_DPI'] = os.environ.get('PDF_AUTO_DPI', '1') == '1'  # Pick the render DPI from a low-resolution probe
+app.config['PDF_MIN_DPI'] = int(os.environ.get('PDF_MIN_DPI', 100))
+app.config['PDF_MAX_DPI'] = int(os.environ.get('PDF_MAX_DPI', 300))
+app.config['PDF_RENDER_WINDOW'] = int(os.environ.get('PDF_RENDER_WINDOW', app.config['OCR_WORKERS']))  # Pages rasterized at once
+app.config['PDF_MIN_TEXT_CHARS'] = int(os.environ.get('PDF_MIN_TEXT_CHARS', 1))  # Below this a page is treated as scanned
+app.config['DOCUMENT_CACHE_BYTES'] = int(os.environ.get('DOCUMENT_CACHE_BYTES', 256 * 1024 * 1024))  # Parsed PDFs kept for page requests
+app.config['DOCUMENT_PREFETCH'] = int(os.environ.get('DOCUMENT_PREFETCH', 2))  # Pages after a requested one extracted in the background
+app.config['RESULT_CACHE_ENABLED'] = os.environ.get('RESULT_CACHE_ENABLED', '1') == '1'
+app.config['RESULT_CACHE_FOLDER'] = os.environ.get('RESULT_CACHE_FOLDER', 'cache')
+app.config['RESULT_CACHE_MAX_BYTES'] = int(os.environ.get('RESULT_CACHE_MAX_BYTES', 512 * 1024 * 1024))
+app.config['RESULT_CACHE_MEMORY_BYTES'] = int(os.environ.get('RESULT_CACHE_MEMORY_BYTES', 64 * 1024 * 1024))
+
+app.config['SEARCH_ENABLED'] = os.environ.get('SEARCH_ENABLED', '1') == '1'  # Index extracted pages for /search
+app.config['SEARCH_INDEX_PATH'] = os.environ.get('SEARCH_INDEX_PATH', os.path.join('search', 'index.sqlite3'))
+app.config['SEARCH_RANK_WINDOW'] = int(os.environ.get('SEARCH_RANK_WINDOW', 10000))  # Newest matches ranked per query
+app.config['PREVIEW_FOLDER'] = os.environ.get('PREVIEW_FOLDER', 'previews')
+app.config['PREVIEW_MAX_SIZE'] = int(os.environ.get('PREVIEW_MAX_SIZE', 1024))  # Longest thumbnail side in pixels
+app.config['PREVIEW_FORMAT'] = os.environ.get('PREVIEW_FORMAT', 'WEBP')  # WEBP or JPEG
+app.config['PREVIEW_MAX_AGE'] = int(os.environ.get('PREVIEW_MAX_AGE', 24 * 3600))
+app.config['SPEECH_BACKEND'] = os.environ.get('SPEECH_BACKEND', 'google')  # google, vosk or stub
+app.config['SPEECH_LANGUAGE'] = os.environ.get('SPEECH_LANGUAGE', 'en-US')
+app.config['SPEECH_MODEL_PATH'] = os.environ.get('SPEECH_MODEL_PATH')  # Model directory for local backends
+app.config['SPEECH_STUB_DELAY'] = float(os.environ.get('SPEECH_STUB_DELAY', 0))  # Seconds per second of audio
+app.config['SPEECH_WORKERS'] = int(os.environ.get('SPEECH_WORKERS', 4))  # Concurrent recognizer requests
+app.config['SPEECH_CHUNK_SECONDS'] = int(os.environ.get('SPEECH_CHUNK_SECONDS', 30))
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))  # Concurrent OCR and ffmpeg jobs
+app.config['JOB_IO_WORKERS'] = int(os.environ.get('JOB_IO_WORKERS', 4))  # Concurrent transcription jobs
+app.config['JOB_QUEUE_SIZE'] = int(os.environ.get('JOB_QUEUE_SIZE', 100))
+app.config['BATCH_MAX_FILES'] = int(os.environ.get('BATCH_MAX_FILES', 1000))  # Files per batch, archive members included
+app.config['ADMISSION_ENABLED'] = os.environ.get('ADMISSION_ENABLED', '1') == '1'  # Budget CPU and memory across extractions
+app.config['ADMISSION_CPU'] = float(os.environ.get('ADMISSION_CPU', app.config['OCR_WORKERS']))  # Cores extractions may use at once
+# Half the memory, split between the server's worker processes (gunicorn.conf.py sets WEB_WORKERS)
+app.config['ADMISSION_MEMORY_MB'] = int(os.environ.get(
+    'ADMISSION_MEMORY_MB',
+    (available_memory_bytes() or 4 * 1024 ** 3) // 2 // int(os.environ.get('WEB_WORKERS', 1)) // 1024 ** 2
+))
+app.config['ADMISSION_QUEUE_SIZE'] = int(os.environ.get('ADMISSION_QUEUE_SIZE', 16))  # Uploads waiting for room before 429s
+app.config['ADMISSION_MAX_WAIT'] = float(os.environ.get('ADMISSION_MAX_WAIT', 10))  # Seconds an upload waits for room
+app.config['METRICS_ENABLED'] = os.environ.get('METRICS_ENABLED', '1') == '1'  # Stage timers and the /metrics endpoint
+app.config['METRICS_JSON_LOGS'] = os.environ.get('METRICS_JSON_LOGS', '0') == '1'  # One JSON log line per stage and extraction
+app.config['METRICS_MULTIPROCESS_DIR'] = os.environ.get('METRICS_MULTIPROCESS_DIR')  # Where workers share metrics (gunicorn.conf.py sets it)
+app.config['METRICS_FLUSH_INTERVAL'] = float(os.environ.get('METRICS_FLUSH_INTERVAL', 5))  # Seconds between a worker's writes there
+
+# Bump whenever an extractor's output changes so stale cached results are not served
+EXTRACTOR_VERSION = '5'
+
+# Resolution of the quick render used to measure a scanned PDF's text size
+PDF_PROBE_DPI = 72
 
 # Create uploads folder if it doesn't exist
 os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
 
-# Check if Tesseract is installed and accessible
+# Spool uploads next to their final location so saving them is a rename, not a copy
+SpoolingRequest.spool_dir = os.path.abspath(os.path.join(app.config['UPLOAD_FOLDER'], 'spool'))
+os.makedirs(SpoolingRequest.spool_dir, exist_ok=True)
+
+# Everything kept in the uploads folder is recorded in an index with its size and expiry,
+# so downloads are lookups and expired files are found without listing the folder
+artifact_store = ArtifactStore(
+    app.config['UPLOAD_FOLDER'],
+    ttl=app.config['ARTIFACT_TTL'],
+    max_bytes=app.config['ARTIFACT_MAX_BYTES']
+)
+
+# Resumable uploads sent in chunks. Sessions are shared by the worker processes, so a
+# chunk can land on any of them; the files themselves are kept in the artifact store
+upload_sessions = UploadSessions(
+    os.path.join(app.config['UPLOAD_FOLDER'], 'sessions', 'sessions.sqlite3'),
+    ttl=app.config['CHUNKED_UPLOAD_TTL']
+)
+
+# Transcriptions started while an audio upload is still arriving, by upload id. Only the
+# process that started one can use it; a completion elsewhere transcribes the file again
+early_transcripts = {}
+early_transcripts_lock = threading.Lock()
+
+# Check if Tesseract is installed and accessible. This runs a tesseract process, so it
+# is called once at server startup (see __main__ and gunicorn.conf.py), not on import
+def check_tesseract():
+    import pytesseract
+    
+    try:
+        pytesseract.get_tesseract_version()
+        print("Tesseract is properly installed and accessible.")
+        return True
+    except Exception as e:
+        print(f"WARNING: Tesseract is not properly configured: {str(e)}")
+        print("Please ensure Tesseract OCR is installed on your system.")
+        # Uncomment and modify the line below for your system if needed:
+        # pytesseract.pytesseract.tesseract_cmd = r'/usr/bin/tesseract'  # Linux/Mac path example
+        # pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'  # Windows path example
+        return False
+
+# Shared OCR process pool, used by every request so the Tesseract worker count stays bounded
+ocr_engine = PageOCREngine(
+    max_workers=app.config['OCR_WORKERS'],
+    lang=app.config['OCR_LANG'],
+    strategy=app.config['OCR_STRATEGY'],
+    # With tesserocr each worker keeps its Tesseract engine loaded instead of starting a process per call
+    backend=app.config['OCR_BACKEND'],
+    # Scanned pages come in at every resolution and angle; normalizing them first
+    # keeps Tesseract fast on huge scans and accurate on small or tilted ones
+    preprocess_options={
+        'target_line_height': app.config['OCR_TARGET_LINE_HEIGHT']
+    } if app.config['OCR_PREPROCESS'] else None
+)
+
+# Results of previous extractions, keyed by file content and extraction settings
+result_cache = None
+if app.config['RESULT_CACHE_ENABLED']:
+    result_cache = ResultCache(
+        app.config['RESULT_CACHE_FOLDER'],
+        max_bytes=app.config['RESULT_CACHE_MAX_BYTES'],
+        memory_max_bytes=app.config['RESULT_CACHE_MEMORY_BYTES']
+    )
+
+# Full-text index of every extracted page, kept after the downloads themselves expire
+search_index = SearchIndex(
+    app.config['SEARCH_INDEX_PATH'],
+    rank_window=app.config['SEARCH_RANK_WINDOW']
+) if app.config['SEARCH_ENABLED'] else None
+
+def preview_artifact(preview_id):
+    """Name a document's preview directory is indexed under in the artifact store"""
+    return f"preview/{preview_id}"
+
+# Downscaled previews served by URL instead of being inlined in responses. Each document's
+# directory is an artifact, so previews expire, and count against the disk quota, with the rest
+preview_store = PreviewStore(
+    app.config['PREVIEW_FOLDER'],
+    max_size=app.config['PREVIEW_MAX_SIZE'],
+    image_format=app.config['PREVIEW_FORMAT'],
+    pdf_dpi=app.config['PDF_DPI'],
+    on_write=lambda preview_id, size: artifact_store.grow(preview_artifact(preview_id), size)
+)
+
+# Speech recognizer selected by configuration; local models are loaded once per process
+speech_backend = create_backend(
+    app.config['SPEECH_BACKEND'],
+    language=app.config['SPEECH_LANGUAGE'],
+    vosk_model_path=app.config['SPEECH_MODEL_PATH'],
+    stub_delay=app.config['SPEECH_STUB_DELAY']
+)
 try:
-    pytesseract.get_tesseract_version()
-    print("Tesseract is properly installed and accessible.")
+    speech_backend.load()
 except Exception as e:
-    print(f"WARNING: Tesseract is not properly configured: {str(e)}")
-    print("Please ensure Tesseract OCR is installed on your system.")
-    # Uncomment and modify the line below for your system if needed:
-    # pytesseract.pytesseract.tesseract_cmd = r'/usr/bin/tesseract'  # Linux/Mac path example
-    # pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'  # Windows path example
+    print(f"WARNING: Speech backend '{speech_backend.name}' could not be loaded: {str(e)}")
+
+# Splits recordings at silences and transcribes the chunks concurrently
+transcriber = ChunkedTranscriber(
+    speech_backend,
+    workers=app.config['SPEECH_WORKERS'],
+    max_chunk_ms=app.config['SPEECH_CHUNK_SECONDS'] * 1000
+)
+
+# Background workers for the asynchronous /jobs and /batch APIs. OCR and ffmpeg keep
+# CPUs busy while transcription mostly waits on the recognizer, so they get separate
+# pools and one kind of work can't starve the other. Jobs run in the worker process
+# that accepted them, but their status is shared, so any worker can report on them
+JOBS_INDEX_PATH = os.path.join(app.config['UPLOAD_FOLDER'], 'jobs', 'jobs.sqlite3')
+job_manager = JobManager(
+    JOBS_INDEX_PATH,
+    max_queue=app.config['JOB_QUEUE_SIZE'],
+    pools={'cpu': app.config['JOB_WORKERS'], 'io': app.config['JOB_IO_WORKERS']}
+)
+
+# Job pool each file type is scheduled on
+JOB_POOLS = {
+    'pdf': 'cpu',
+    'image': 'cpu',
+    'video': 'cpu',
+    'audio': 'io'
+}
+
+batch_manager = BatchManager(JOBS_INDEX_PATH, job_manager)
+
+# Every extraction that isn't served from the cache must fit in these budgets before it
+# starts, so a burst of uploads queues (or gets a 429) instead of thrashing the machine
+admission = AdmissionController(
+    {'cpu': app.config['ADMISSION_CPU'], 'memory': app.config['ADMISSION_MEMORY_MB'] * 1024 ** 2},
+    max_waiting=app.config['ADMISSION_QUEUE_SIZE']
+) if app.config['ADMISSION_ENABLED'] else None
+
+# Stage timings, request counters and queue depths, scraped from /metrics. Under gunicorn
+# every worker writes its own to a shared directory, and a scrape adds them all up
+metrics = Metrics(
+    enabled=app.config['METRICS_ENABLED'],
+    json_logs=app.config['METRICS_JSON_LOGS'],
+    multiprocess_dir=app.config['METRICS_MULTIPROCESS_DIR']
+)
+
+def collect_gauges():
+    """Queue depths and cache sizes, read when /metrics is scraped"""
+    job_stats = job_manager.stats()
+    for pool, stats in job_stats['pools'].items():
+        yield 'jobs_queued', {'pool': pool}, stats['queued']
+        yield 'jobs_running', {'pool': pool}, stats['running']
+    yield 'ocr_pages_in_flight', {}, ocr_engine.stats()['in_flight']
+    if result_cache is not None:
+        cache_stats = result_cache.stats()
+        yield 'result_cache_bytes', {'tier': 'memory'}, cache_stats['memory_bytes']
+        yield 'result_cache_bytes', {'tier': 'disk'}, cache_stats['disk_bytes']
+    if admission is not None:
+        admission_stats = admission.stats()
+        for budget, usage in admission_stats['budgets'].items():
+            yield 'admission_in_use', {'budget': budget}, usage['inUse']
+            yield 'admission_capacity', {'budget': budget}, usage['capacity']
+        yield 'admission_waiting', {}, admission_stats['waiting']
+    document_stats = documents.stats()
+    yield 'document_cache_documents', {}, document_stats['documents']
+    yield 'document_cache_bytes', {}, document_stats['bytes']
+    session_stats = upload_sessions.stats()
+    yield 'upload_sessions_active', {}, session_stats['active']
+    yield 'upload_sessions_reserved_bytes', {}, session_stats['reservedBytes']
+    artifact_usage = artifact_store.usage()
+    yield 'artifact_files', {}, artifact_usage['files']
+    yield 'artifact_bytes', {}, artifact_usage['bytes']
+
+metrics.add_gauges(collect_gauges)
 
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in app.config['ALLOWED_EXTENSIONS']
@@ -49,230 +283,377 @@ def is_audio_file(filename):
 def is_video_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in {'mp4', 'avi', 'mov', 'mkv'}
 
-def extract_text_from_pdf(pdf_path):
-    text_content = []
-    images_text = []
-    images_data = []
-    
-    # Try to extract text directly (for digital PDFs)
-    try:
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page_num in range(len(pdf_reader.pages)):
-                page = pdf_reader.pages[page_num]
-                text = page.extract_text()
-                if text.strip():  # If text was successfully extracted
-                    text_content.append({
-                        'page': page_num + 1,
-                        'text': text,
-                        'source': 'digital'
-                    })
+def get_file_type(file_ext):
+    if file_ext == 'pdf':
+        return 'pdf'
+    elif file_ext in ['png', 'jpg', 'jpeg']:
+        return 'image'
+    elif file_ext in ['mp3', 'wav']:
+        return 'audio'
+    elif file_ext in ['mp4', 'avi', 'mov', 'mkv']:
+        return 'video'
+    return None
+
+def extraction_settings(file_type):
+    """Settings that affect an extractor's output; they are part of the result cache key"""
+    if file_type == 'pdf':
+        return {
+            'lang': app.config['OCR_LANG'],
+            'strategy': app.config['OCR_STRATEGY'],
+            'psm': [6, 11],
+            'dpi': app.config['PDF_DPI'],
+            'auto_dpi': [app.config['PDF_MIN_DPI'], app.config['PDF_MAX_DPI']] if app.config['PDF_AUTO_DPI'] else None,
+            'min_text_chars': app.config['PDF_MIN_TEXT_CHARS'],
+            'preprocess': ocr_engine.preprocess_options
+        }
+    elif file_type == 'image':
+        return {
+            'lang': app.config['OCR_LANG'],
+            'strategy': app.config['OCR_STRATEGY'],
+            'psm': [6, 11, 3],
+            'preprocess': ocr_engine.preprocess_options
+        }
+    settings = speech_backend.settings()
+    settings['chunk_seconds'] = app.config['SPEECH_CHUNK_SECONDS']
+    return settings
+
+def open_document(preview_id):
+    """Parsed PDF of a registered document, kept for later page requests; None if it isn't a stored PDF"""
+    path, file_type = preview_store.source_path(preview_id)
+    if path is None or file_type != 'pdf':
+        return None
+    return documents.open(preview_id, path)
+
+def read_pdf_text_page(document, page_num, preview_id):
+    """The digital result of a page whose text layer has at least PDF_MIN_TEXT_CHARS
+    non-whitespace characters, or None when the page needs OCR"""
+    with metrics.timer('pdf_text_layer', file_type='pdf'):
+        text = document.page_text(page_num)
+    if text is None or len("".join(text.split())) < app.config['PDF_MIN_TEXT_CHARS']:
+        return None
+    # Digital pages are only rendered if somebody actually opens their preview
+    return {
+        'page': page_num,
+        'text': text,
+        'source': 'digital',
+        'image': preview_store.page_url(preview_id, page_num),
+        'imageFull': preview_store.page_url(preview_id, page_num, full=True)
+    }
+
+def _empty_pdf_page(page_num, preview_id):
+    return {
+        'page': page_num,
+        'text': "No text could be extracted from this page.",
+        'source': 'none',
+        'image': preview_store.page_url(preview_id, page_num),
+        'imageFull': preview_store.page_url(preview_id, page_num, full=True)
+    }
+
+def _failed_pdf_page(page_num, preview_id, error):
+    # Marked as an error so the result isn't cached: rendering or OCR may work next time
+    return {
+        'page': page_num,
+        'text': f"Error extracting text from this page: {error}",
+        'source': 'error',
+        'image': preview_store.page_url(preview_id, page_num),
+        'imageFull': preview_store.page_url(preview_id, page_num, full=True)
+    }
+
+def record_ocr_metrics(ocr_result, file_type):
+    """Record the time each stage took inside the OCR worker for one page"""
+    metrics.inc('ocr_pages_total', file_type=file_type, strategy=ocr_result['strategy'])
+    metrics.inc('ocr_passes_total', ocr_result['passes'], file_type=file_type)
+    for stage, seconds in ocr_result['timings'].items():
+        metrics.observe('ocr_worker_seconds', seconds, stage=stage, file_type=file_type)
+
+def _ocr_rendered_window(rendered_pages, preview_id):
+    """OCR one window of rendered pages on the shared pool and store their thumbnails"""
+    # With the fixed strategy: Page Segmentation Mode 6 = single block of text, then 11 = sparse text
+    ocr_futures = {
+        page_num: ocr_engine.submit(image_path, psm_modes=(6, 11))
+        for page_num, image_path in rendered_pages
+    }
+    
+    # The pages are already rendered, so write their thumbnails while OCR runs
+    results = {}
+    with metrics.timer('thumbnail', file_type='pdf'):
+        for page_num, image_path in rendered_pages:
+            try:
+                preview_store.save_thumbnail(preview_id, page_num, image_path)
+            except Exception as e:
+                # The preview endpoint can still render it later
+                print(f"Error saving preview for PDF page {page_num}: {e}")
+            results[page_num] = _empty_pdf_page(page_num, preview_id)
+    
+    for page_num, future in ocr_futures.items():
+        try:
+            with metrics.timer('ocr_wait', file_type='pdf'):
+                ocr_result = future.result()
+        except Exception as e:
+            print(f"Error running OCR on PDF page {page_num}: {e}")
+            results[page_num] = _failed_pdf_page(page_num, preview_id, e)
+            continue
+        record_ocr_metrics(ocr_result, 'pdf')
+        text = ocr_result['text']
+        if text.strip():
+            results[page_num].update({
+                'text': text,
+                'source': 'ocr'
+            })
+    
+    return results
+
+def choose_pdf_dpi(pdf_path, page_num):
+    """Render DPI for the scanned pages of a PDF, estimated from one page rendered at 72 DPI"""
+    if not app.config['PDF_AUTO_DPI']:
+        return app.config['PDF_DPI']
+    try:
+        probe = render_page(pdf_path, page_num, PDF_PROBE_DPI)
     except Exception as e:
-        print(f"Error extracting text from PDF: {e}")
+        print(f"Warning: Could not probe PDF render DPI: {e}")
+        return app.config['PDF_DPI']
+    if probe is None:
+        return app.config['PDF_DPI']
+    return choose_render_dpi(
+        probe,
+        PDF_PROBE_DPI,
+        target_line_height=app.config['OCR_TARGET_LINE_HEIGHT'],
+        min_dpi=app.config['PDF_MIN_DPI'],
+        max_dpi=app.config['PDF_MAX_DPI'],
+        default_dpi=app.config['PDF_DPI']
+    )
+
+def ocr_pdf_pages(document, page_numbers, preview_id):
+    """Render and OCR scanned pages of a PDF, a render window at a time; returns {page: result}"""
+    if document.dpi is None:
+        # Rendering at exactly the resolution OCR needs avoids rasterizing huge pages
+        # only to have preprocessing shrink them again
+        with metrics.timer('pdf_probe_dpi', file_type='pdf'):
+            document.dpi = choose_pdf_dpi(document.path, page_numbers[0])
+    windows = iter_rendered_windows(
+        document.path,
+        page_numbers,
+        window=app.config['PDF_RENDER_WINDOW'],
+        dpi=document.dpi
+    )
+    
+    results = {}
+    while True:
+        with metrics.timer('pdf_render', file_type='pdf'):
+            rendered_pages = next(windows, None)
+        if rendered_pages is None:
+            return results
+        results.update(_ocr_rendered_window(rendered_pages, preview_id))
+
+def iter_text_from_pdf(pdf_path, preview_id=None, pages=None):
+    """Yield one result per page, in page order, rasterizing only pages without a usable text layer.
+    
+    `pages` limits extraction to page ranges as returned by parse_page_range. Text
+    layers are read as their pages come up, so the first page doesn't wait for the
+    rest of the document.
+    """
+    if preview_id is None:
+        preview_id = preview_store.preview_id_for(pdf_path)
+        preview_store.register(preview_id, pdf_path, 'pdf')
     
-    # Convert PDF to images and perform OCR for scanned/image-based PDFs
     try:
-        images = convert_from_path(pdf_path)
-        for i, image in enumerate(images):
-            # Save image temporarily
-            img_io = io.BytesIO()
-            image.save(img_io, format='PNG')
-            img_io.seek(0)
-            img_data = base64.b64encode(img_io.getvalue()).decode('utf-8')
-            
-            # Store image data
-            images_data.append({
-                'page': i + 1,
-                'data': f"data:image/png;base64,{img_data}"
-            })
-            
-            # If we didn't get text from direct extraction, use OCR
-            if i >= len(text_content) or not text_content[i]['text'].strip():
-                # Add OCR configuration
-                custom_config = r'--oem 3 --psm 6'  # OCR Engine Mode 3 = default, Page Segmentation Mode 6 = assume single block of text
-                text = pytesseract.image_to_string(image, lang='eng', config=custom_config)
-                
-                if not text.strip():
-                    # Try a different PSM mode if first one didn't work
-                    custom_config = r'--oem 3 --psm 11'  # PSM 11 = sparse text with OSD
-                    text = pytesseract.image_to_string(image, lang='eng', config=custom_config)
-                
-                images_text.append({
-                    'page': i + 1,
-                    'text': text,
-                    'source': 'ocr'
-                })
+        with metrics.timer('pdf_open', file_type='pdf'):
+            document = open_document(preview_id)
+        if document is None:
+            raise ValueError("the document is not a stored PDF")
+        page_numbers = select_pages(pages, document.page_count)
     except Exception as e:
-        print(f"Error processing images in PDF: {e}")
-    
-    # Combine results, preferring digital text when available
-    result = []
-    for i in range(max(len(text_content), len(images_text), len(images_data))):
-        page_data = {
-            'page': i + 1,
-            'text': "No text could be extracted from this page.",
-            'source': 'none',
-            'image': images_data[i]['data'] if i < len(images_data) else None
-        }
-        
-        if i < len(text_content) and text_content[i]['text'].strip():
-            page_data.update({
-                'text': text_content[i]['text'],
-                'source': 'digital'
-            })
-        elif i < len(images_text) and images_text[i]['text'].strip():
-            page_data.update({
-                'text': images_text[i]['text'],
-                'source': 'ocr'
-            })
-            
-        result.append(page_data)
-            
-    return result
+        print(f"Error reading PDF: {e}")
+        # Reported as a failed page so the result isn't cached: opening may work next time
+        yield _failed_pdf_page(1, preview_id, e)
+        return
+    window = max(1, app.config['PDF_RENDER_WINDOW'])
+    digital_pages = {}
+    ocr_results = {}
+    ocr_error = None
+    for index, page_num in enumerate(page_numbers):
+        if page_num not in digital_pages:
+            digital_pages[page_num] = read_pdf_text_page(document, page_num, preview_id)
+        page_data = digital_pages.pop(page_num)
+        if page_data is None:
+            # OCR this page together with the scanned pages among the next few, one window at a time
+            if page_num not in ocr_results and ocr_error is None:
+                upcoming = page_numbers[index + 1:index + window]
+                for upcoming_num in upcoming:
+                    if upcoming_num not in digital_pages:
+                        digital_pages[upcoming_num] = read_pdf_text_page(document, upcoming_num, preview_id)
+                scanned = [page_num] + [num for num in upcoming if digital_pages[num] is None]
+                try:
+                    ocr_results.update(ocr_pdf_pages(document, scanned, preview_id))
+                except Exception as e:
+                    print(f"Error processing images in PDF: {e}")
+                    # Don't try to render the remaining pages once poppler has failed
+                    ocr_error = e
+            page_data = ocr_results.pop(page_num, None)
+            if page_data is None:
+                page_data = _failed_pdf_page(page_num, preview_id, ocr_error) if ocr_error else _empty_pdf_page(page_num, preview_id)
+        yield page_data
+
+def extract_text_from_pdf(pdf_path, preview_id=None, pages=None):
+    return list(iter_text_from_pdf(pdf_path, preview_id, pages))
 
-def extract_text_from_image(image_path):
+def pdf_page_bytes():
+    """Memory a rendered page takes: a letter page in RGB at the highest DPI"""
+    dpi = app.config['PDF_MAX_DPI'] if app.config['PDF_AUTO_DPI'] else app.config['PDF_DPI']
+    return int(8.5 * dpi) * int(11 * dpi) * 3
+
+def load_document_page(document_id, document, page_num, background=False):
+    """Extract one page of a stored PDF on its own, reusing an earlier extraction of the page.
+    
+    Background loads (prefetches) only OCR when admission has room right away,
+    and return None when it hasn't.
+    """
+    cache_key = make_cache_key(document_id, EXTRACTOR_VERSION, dict(extraction_settings('pdf'), page=page_num))
+    cached_result = result_cache.get(cache_key) if result_cache else None
+    if cached_result is not None:
+        metrics.inc('document_pages_total', cached='true', background=str(background).lower())
+        return cached_result[0]
+    
+    page_data = read_pdf_text_page(document, page_num, document_id)
+    if page_data is None:
+        ticket = None
+        if admission is not None:
+            cost = {'cpu': 1, 'memory': pdf_page_bytes()}
+            if background:
+                ticket = admission.try_acquire(cost, kind='pdf')
+                if ticket is None:
+                    return None
+            else:
+                try:
+                    with metrics.timer('admission_wait', file_type='pdf'):
+                        ticket = admission.acquire(cost, kind='pdf', timeout=app.config['ADMISSION_MAX_WAIT'])
+                except AdmissionRejected:
+                    metrics.inc('admission_rejected_total', file_type='pdf')
+                    raise
+        try:
+            page_data = ocr_pdf_pages(document, [page_num], document_id).get(page_num)
+        finally:
+            if ticket is not None:
+                ticket.release()
+        page_data = page_data or _empty_pdf_page(page_num, document_id)
+    
+    if result_cache and page_data['source'] != 'error':
+        result_cache.put(cache_key, [page_data])
+    metrics.inc('document_pages_total', cached='false', background=str(background).lower())
+    return page_data
+
+# Parsed PDFs and the pages being extracted from them for /document/<id>/page/<n>.
+# Prefetched pages are only kept in the result cache, so without it there's no prefetching
+documents = DocumentCache(
+    load_document_page,
+    max_bytes=app.config['DOCUMENT_CACHE_BYTES'],
+    prefetch=app.config['DOCUMENT_PREFETCH'] if app.config['RESULT_CACHE_ENABLED'] else 0
+)
+
+def extract_text_from_image(image_path, preview_id=None):
+    if preview_id is None:
+        preview_id = preview_store.preview_id_for(image_path)
+        preview_store.register(preview_id, image_path, 'image')
+    
+    # The preview endpoint renders the thumbnail from the original if it wasn't stored below
+    img_src = preview_store.page_url(preview_id, 1)
+    img_full = preview_store.page_url(preview_id, 1, full=True)
+    
     try:
-        # Open the image with PIL
-        image = Image.open(image_path)
-        
-        # Convert image to RGB mode if it's not already (handles RGBA, etc.)
-        if image.mode != 'RGB':
-            image = image.convert('RGB')
-        
-        # Get base64 of image for display
-        img_io = io.BytesIO()
-        image.save(img_io, format='PNG')
-        img_io.seek(0)
-        img_data = base64.b64encode(img_io.getvalue()).decode('utf-8')
-        img_src = f"data:image/png;base64,{img_data}"
+        with metrics.timer('image_decode', file_type='image'):
+            # Open the image with PIL
+            image = Image.open(image_path)
+            
+            # Convert image to RGB mode if it's not already (handles RGBA, etc.)
+            if image.mode != 'RGB':
+                image = image.convert('RGB')
         
-        # Extract text using Tesseract with enhanced configuration
-        custom_config = r'--oem 3 --psm 6'  # OCR Engine Mode 3 = default, Page Segmentation Mode 6 = assume single block of text
-        text = pytesseract.image_to_string(image, lang='eng', config=custom_config)
+        # Store a downscaled preview for display
+        try:
+            with metrics.timer('thumbnail', file_type='image'):
+                preview_store.save_thumbnail(preview_id, 1, image)
+        except Exception as e:
+            print(f"Error saving image preview: {str(e)}")
         
-        if not text.strip():
-            # If no text was extracted, try different PSM mode
-            custom_config = r'--oem 3 --psm 11'  # PSM 11 = sparse text with OSD
-            text = pytesseract.image_to_string(image, lang='eng', config=custom_config)
-            
-            # If still no text, try another PSM mode
-            if not text.strip():
-                custom_config = r'--oem 3 --psm 3'  # PSM 3 = fully automatic page segmentation
-                text = pytesseract.image_to_string(image, lang='eng', config=custom_config)
+        # Extract text using Tesseract on the shared OCR pool; with the fixed strategy:
+        # PSM 6 = single block of text, 11 = sparse text with OSD, 3 = fully automatic page segmentation
+        with metrics.timer('ocr_wait', file_type='image'):
+            ocr_result = ocr_engine.submit(image, psm_modes=(6, 11, 3)).result()
+        record_ocr_metrics(ocr_result, 'image')
+        text = ocr_result['text']
         
         if text.strip():
             return [{
                 'page': 1,
                 'text': text,
                 'source': 'ocr',
-                'image': img_src
+                'image': img_src,
+                'imageFull': img_full
             }]
         else:
             return [{
                 'page': 1,
                 'text': "No text could be detected in this image.",
                 'source': 'ocr',
-                'image': img_src
+                'image': img_src,
+                'imageFull': img_full
             }]
             
     except Exception as e:
         print(f"Error extracting text from image: {str(e)}")
-        # Still return the image if possible, even if text extraction failed
-        try:
-            if 'img_src' in locals():
-                return [{
-                    'page': 1,
-                    'text': f"Error extracting text from image: {str(e)}",
-                    'source': 'error',
-                    'image': img_src
-                }]
-            else:
-                # Try to get image data even after error
-                try:
-                    image = Image.open(image_path)
-                    img_io = io.BytesIO()
-                    image.save(img_io, format='PNG')
-                    img_io.seek(0)
-                    img_data = base64.b64encode(img_io.getvalue()).decode('utf-8')
-                    img_src = f"data:image/png;base64,{img_data}"
-                    
-                    return [{
-                        'page': 1,
-                        'text': f"Error extracting text from image: {str(e)}",
-                        'source': 'error',
-                        'image': img_src
-                    }]
-                except:
-                    return [{
-                        'page': 1,
-                        'text': f"Error extracting text from image: {str(e)}",
-                        'source': 'error',
-                        'image': None
-                    }]
-        except:
-            # Fallback if everything fails
-            return [{
-                'page': 1,
-                'text': "Error processing image.",
-                'source': 'error',
-                'image': None
-            }]
+        # Still return the image preview, even if text extraction failed
+        return [{
+            'page': 1,
+            'text': f"Error extracting text from image: {str(e)}",
+            'source': 'error',
+            'image': img_src,
+            'imageFull': img_full
+        }]
 
-def extract_text_from_audio(audio_path):
-    """Extract text from audio file using speech recognition"""
+def extract_text_from_audio(audio_path, preview_id=None, transcript=None):
+    """Extract text from audio file using speech recognition.
+    
+    `transcript` is a Future of a transcription started while the file was being
+    uploaded (see start_early_transcription); the file is transcribed again if it failed.
+    """
+    # Imported on first use so web workers that never see audio stay small
+    import speech_recognition as sr
+    
+    if preview_id is None:
+        preview_id = preview_store.preview_id_for(audio_path)
+        preview_store.register(preview_id, audio_path, 'audio')
+    
     try:
-        # Initialize recognizer
-        r = sr.Recognizer()
-        
-        # Get audio file extension
-        file_ext = os.path.splitext(audio_path)[1].lower()
-        
         # Create temporary directory with unique ID to avoid conflicts
         temp_dir = os.path.join(tempfile.gettempdir(), f"audio_extract_{uuid.uuid4().hex}")
         os.makedirs(temp_dir, exist_ok=True)
         
-        temp_audio_path = os.path.join(temp_dir, "preview.mp3")
-        temp_wav_path = os.path.join(temp_dir, "audio.wav")
-        
         try:
-            # Convert audio to WAV for speech recognition if needed
-            if file_ext != '.wav':
-                sound = AudioSegment.from_file(audio_path)
-                # Take first 30 seconds for preview
-                preview = sound[:min(30000, len(sound))]
-                preview.export(temp_audio_path, format="mp3")
-                # Export to WAV for speech recognition
-                sound.export(temp_wav_path, format="wav")
-            else:
-                sound = AudioSegment.from_wav(audio_path)
-                # Take first 30 seconds for preview
-                preview = sound[:min(30000, len(sound))]
-                preview.export(temp_audio_path, format="mp3")
-                # For WAV files, make a copy to avoid file locking issues
-                sound.export(temp_wav_path, format="wav")
+            # First 30 seconds for the player, cut from the source without re-encoding when possible
+            with metrics.timer('preview_cut', file_type='audio'):
+                preview_path, preview_mimetype = cut_preview(audio_path, temp_dir, seconds=30)
             
-            # Read audio file
-            with sr.AudioFile(temp_wav_path) as source:
-                # Adjust for ambient noise
-                r.adjust_for_ambient_noise(source)
-                
-                # Load audio data
-                audio_data = r.record(source)
-                
-                # Recognize speech using Google Speech Recognition
-                text = r.recognize_google(audio_data)
-                
-                # Get base64 of audio preview for display
-                with open(temp_audio_path, 'rb') as audio_file:
-                    audio_data = base64.b64encode(audio_file.read()).decode('utf-8')
-                    audio_src = f"data:audio/mp3;base64,{audio_data}"
-                
-                return [{
-                    'page': 1,
-                    'text': text,
-                    'source': 'speech',
-                    'audio': audio_src
-                }]
+            # Decode once, as a stream: ffmpeg pipes 16 kHz mono PCM that is cut at silences
+            # and transcribed chunk by chunk in parallel, so the whole recording is never in memory
+            with metrics.timer('transcribe', file_type='audio'):
+                early_result = None
+                if transcript is not None:
+                    try:
+                        early_result = transcript.result()
+                    except Exception as e:
+                        print(f"Warning: Early transcription failed, transcribing the whole file: {e}")
+                text, segments = early_result or transcriber.transcribe_stream(iter_pcm(audio_path))
+            
+            # Keep the audio preview in the preview store and return its URL
+            audio_src = preview_store.save_media(preview_id, preview_path, preview_mimetype)
+            
+            return [{
+                'page': 1,
+                'text': text,
+                'source': 'speech',
+                'audio': audio_src,
+                'segments': segments
+            }]
         finally:
             # Clean up temp files
             try:
@@ -303,119 +684,62 @@ def extract_text_from_audio(audio_path):
             'audio': None
         }]
 
-def extract_text_from_video(video_path):
-    """Extract text from video by converting to audio first with ffmpeg and then using speech recognition"""
+def extract_text_from_video(video_path, preview_id=None):
+    """Extract text from video by streaming its audio through ffmpeg into speech recognition"""
+    import speech_recognition as sr
+    
+    if preview_id is None:
+        preview_id = preview_store.preview_id_for(video_path)
+        preview_store.register(preview_id, video_path, 'video')
+    
     try:
         # Create temporary directory with unique ID to avoid conflicts
         temp_dir = os.path.join(tempfile.gettempdir(), f"video_extract_{uuid.uuid4().hex}")
         os.makedirs(temp_dir, exist_ok=True)
         
         try:
-            # Make a copy of the video file to avoid file locking issues
-            video_copy_path = os.path.join(temp_dir, f"video_copy{os.path.splitext(video_path)[1]}")
-            shutil.copy2(video_path, video_copy_path)
+            # Create the 15 second preview and the thumbnail frames (1 every 5 seconds, up to 5)
+            # in a single ffmpeg run that only reads the start of the video
+            with metrics.timer('ffmpeg_visuals', file_type='video'):
+                preview_path, frame_paths = extract_visuals(video_path, temp_dir)
             
-            # Extract audio from video using ffmpeg
-            audio_path = os.path.join(temp_dir, "extracted_audio.wav")
+            frames = []
+            for i, frame_path in enumerate(frame_paths):
+                try:
+                    frames.append(preview_store.save_thumbnail(preview_id, i + 1, frame_path))
+                except Exception as e:
+                    # If a frame can't be stored, continue with what we have
+                    print(f"Error storing video frame: {str(e)}")
             
-            # Command to extract audio using ffmpeg
-            ffmpeg_cmd = [
-                'ffmpeg',
-                '-i', video_copy_path,
-                '-q:a', '0',
-                '-map', 'a',
-                '-vn',
-                audio_path
-            ]
+            # Keep the video preview in the preview store if available
+            video_src = None
+            if preview_path and os.path.exists(preview_path):
+                try:
+                    video_src = preview_store.save_media(preview_id, preview_path, 'video/mp4')
+                except Exception as e:
+                    print(f"Error storing video preview: {str(e)}")
             
-            # Execute the command
+            # Stream the audio track out of the video with ffmpeg straight into the recognizer
             try:
-                subprocess.run(ffmpeg_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            except subprocess.CalledProcessError as e:
+                with metrics.timer('transcribe', file_type='video'):
+                    text, segments = transcriber.transcribe_stream(iter_pcm(video_path))
+                
                 return [{
                     'page': 1,
-                    'text': f"Error extracting audio from video: {e.stderr.decode() if e.stderr else str(e)}",
-                    'source': 'error',
-                    'video': None
+                    'text': text,
+                    'source': 'video',
+                    'video': video_src,
+                    'frames': frames,
+                    'segments': segments
                 }]
-            
-            # Check if audio file was created successfully
-            if not os.path.exists(audio_path) or os.path.getsize(audio_path) == 0:
+            except AudioDecodeError:
                 return [{
                     'page': 1,
                     'text': "No audio detected in this video file or audio extraction failed.",
                     'source': 'video',
-                    'video': None
+                    'video': video_src,
+                    'frames': frames
                 }]
-            
-            # Create video preview with ffmpeg (first 15 seconds)
-            preview_path = os.path.join(temp_dir, "preview.mp4")
-            preview_cmd = [
-                'ffmpeg',
-                '-i', video_copy_path,
-                '-t', '15',
-                '-vf', 'scale=480:-1',  # Resize to 480px width
-                '-c:v', 'libx264',
-                '-c:a', 'aac',
-                '-strict', 'experimental',
-                '-b:a', '128k',
-                preview_path
-            ]
-            
-            try:
-                subprocess.run(preview_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-            except subprocess.CalledProcessError:
-                # If preview creation fails, continue with just audio extraction
-                preview_path = None
-            
-            # Extract frames for thumbnail preview (1 frame every 5 seconds, up to 5 frames)
-            frames = []
-            for i in range(5):
-                frame_path = os.path.join(temp_dir, f"frame_{i}.jpg")
-                frame_cmd = [
-                    'ffmpeg',
-                    '-i', video_copy_path,
-                    '-ss', str(i * 5),  # Take frame every 5 seconds
-                    '-frames:v', '1',
-                    '-q:v', '2',
-                    frame_path
-                ]
-                
-                try:
-                    subprocess.run(frame_cmd, check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-                    if os.path.exists(frame_path):
-                        with open(frame_path, 'rb') as img_file:
-                            img_data = base64.b64encode(img_file.read()).decode('utf-8')
-                            frames.append(f"data:image/jpeg;base64,{img_data}")
-                except subprocess.CalledProcessError:
-                    # If frame extraction fails, continue with what we have
-                    pass
-            
-            # Base64 encode the video preview if available
-            video_src = None
-            if preview_path and os.path.exists(preview_path):
-                try:
-                    with open(preview_path, 'rb') as video_file:
-                        video_data = base64.b64encode(video_file.read()).decode('utf-8')
-                        video_src = f"data:video/mp4;base64,{video_data}"
-                except Exception as e:
-                    print(f"Error encoding video preview: {str(e)}")
-            
-            # Now process the extracted audio file
-            try:
-                r = sr.Recognizer()
-                with sr.AudioFile(audio_path) as source:
-                    r.adjust_for_ambient_noise(source)
-                    audio_data = r.record(source)
-                    text = r.recognize_google(audio_data)
-                    
-                    return [{
-                        'page': 1,
-                        'text': text,
-                        'source': 'video',
-                        'video': video_src,
-                        'frames': frames
-                    }]
             except sr.UnknownValueError:
                 return [{
                     'page': 1,
@@ -444,10 +768,6 @@ def extract_text_from_video(video_path):
         finally:
             # Clean up temporary files
             try:
-                # Force garbage collection to free resources
-                gc.collect()
-                time.sleep(0.5)  # Small delay for resources to be freed
-                
                 # Remove the temporary directory and all its contents
                 shutil.rmtree(temp_dir, ignore_errors=True)
             except Exception as cleanup_error:
@@ -462,6 +782,54 @@ def extract_text_from_video(video_path):
             'video': None
         }]
 
+# Each extractor takes (path, preview_id=None) and returns an iterable of pages;
+# the PDF one yields them as they finish
+EXTRACTORS = {
+    'pdf': iter_text_from_pdf,
+    'image': extract_text_from_image,
+    'audio': extract_text_from_audio,
+    'video': extract_text_from_video
+}
+
+@app.before_request
+def start_request_metrics():
+    if not metrics.enabled:
+        return
+    # Reuse the caller's id so log lines can be matched with the proxy's
+    metrics_module.request_id.set(request.headers.get('X-Request-ID') or uuid.uuid4().hex)
+    flask.g.request_start = time.perf_counter()
+
+@app.after_request
+def record_request_metrics(response):
+    if not metrics.enabled or 'request_start' not in flask.g:
+        return response
+    endpoint = request.endpoint or 'unknown'
+    seconds = time.perf_counter() - flask.g.request_start
+    response.headers['X-Request-ID'] = metrics_module.request_id.get()
+    metrics.inc('http_requests_total', endpoint=endpoint, method=request.method, status=response.status_code)
+    metrics.observe('http_request_seconds', seconds, endpoint=endpoint)
+    metrics.inc('http_bytes_in_total', request.content_length or 0, endpoint=endpoint)
+    if response.is_streamed and not response.direct_passthrough:
+        # Generated bodies (NDJSON, SSE) are counted as they are sent; files keep their
+        # known length and the server's sendfile path
+        response.response = metrics.count_bytes(response.response, 'http_bytes_out_total', endpoint=endpoint)
+    else:
+        metrics.inc('http_bytes_out_total', response.content_length or 0, endpoint=endpoint)
+    metrics.log(
+        'request',
+        method=request.method,
+        path=request.path,
+        status=response.status_code,
+        seconds=round(seconds, 6)
+    )
+    return response
+
+@app.teardown_request
+def remove_spool_files(exc):
+    # Uploads that were never stored (rejected, failed) must not stay on disk
+    if isinstance(request, SpoolingRequest):
+        request.remove_spool_files()
+
 @app.route('/')
 def landing():
     return render_template('landing.html')
@@ -470,150 +838,1064 @@ def landing():
 def app_page():
     return render_template('index.html')
 
-@app.route('/upload', methods=['POST'])
-def upload_file():
+def new_upload(name):
+    """Describe where an upload called `name` is stored, before storing it"""
+    # Secure the filename and create a unique version to avoid conflicts
+    original_filename = secure_filename(name)
+    unique_id = uuid.uuid4().hex[:8]
+    filename = f"{os.path.splitext(original_filename)[0]}_{unique_id}{os.path.splitext(original_filename)[1]}"
+    
+    # The extractors read the original in place, so this is the only copy of the upload
+    filepath = os.path.join(app.config['UPLOAD_FOLDER'], f"original_{filename}")
+    
+    file_ext = os.path.splitext(filename)[1].lower()[1:]  # Get extension without the dot
+    
+    return {
+        'original_filename': original_filename,
+        'filename': filename,
+        'path': filepath,
+        'file_type': get_file_type(file_ext),
+        'cached': False
+    }
+
+def save_upload(file):
+    """Store an uploaded file once, at its final download location, and describe it"""
+    upload = new_upload(file.filename)
+    store_upload(file, upload['path'])
+    # Pinned until extraction finishes so the disk quota can't evict it from under the extractor
+    artifact_store.add(f"original/{upload['filename']}", upload['path'], pin='upload')
+    return upload
+
+def estimate_cost(upload):
+    """Cores and bytes of memory an extraction will need at its peak, and its size in units
+    (pages, or seconds of media) from which admission learns how long it holds them"""
+    file_type = upload['file_type']
+    file_size = os.path.getsize(upload['path'])
+    
+    if file_type == 'pdf':
+        pages = count_upload_pages(upload) or 1
+        scanned = count_scanned_pages(upload)
+        scanned = pages if scanned is None else scanned
+        if not scanned:
+            # Born-digital: text layers are read one page at a time in the request's thread
+            return {'cpu': 0.5, 'memory': file_size}, pages
+        # A window of scanned pages is rendered and OCRed at once
+        window = min(scanned, app.config['PDF_RENDER_WINDOW'])
+        return {'cpu': min(scanned, app.config['OCR_WORKERS']), 'memory': file_size + 2 * window * pdf_page_bytes()}, pages
+    
+    if file_type == 'image':
+        try:
+            # Only reads the header
+            with Image.open(upload['path']) as image:
+                pixels = image.size[0] * image.size[1]
+        except Exception:
+            pixels = file_size * 10
+        # Decoded RGB plus the grayscale, mask and rescaled copies made while preprocessing
+        return {'cpu': 1, 'memory': file_size + 8 * pixels}, 1
+    
+    # Media is decoded by ffmpeg as a stream, so its length sets the time held, not the memory
+    duration = probe_duration(upload['path']) or file_size / (16 * 1024)  # Assume 128 kbps when unknown
+    if file_type == 'audio':
+        return {'cpu': 0.5, 'memory': 64 * 1024 ** 2}, duration
+    # Video: one ffmpeg decoding frames for the preview and another decoding the audio
+    return {'cpu': 2, 'memory': 256 * 1024 ** 2}, duration
+
+def prepare_extraction(upload, admission_timeout=None):
+    """Hash an upload and look it up in the result cache; if it must be extracted, wait for admission.
+    
+    With `admission_timeout` (seconds) this raises AdmissionRejected when the server
+    is saturated; without it the caller waits its turn. iter_extraction calls this
+    itself when it hasn't been called yet.
+    """
+    upload['start'] = time.perf_counter()
+    file_type = upload['file_type']
+    # Reuse the result of an earlier extraction of the same content and settings
+    with metrics.timer('hash', file_type=file_type):
+        # Chunked uploads were hashed while their chunks arrived
+        file_hash = upload.get('sha256') or hash_file(upload['path'])
+    
+    # Previews are addressed by content too, so URLs in cached results stay valid
+    upload['preview_id'] = file_hash[:32]
+    preview_store.register(upload['preview_id'], upload['path'], file_type)
+    
+    settings = extraction_settings(file_type)
+    if upload.get('pages'):
+        settings['pages'] = upload['pages']
+    upload['cache_key'] = make_cache_key(file_hash, EXTRACTOR_VERSION, settings)
+    with metrics.timer('cache_lookup', file_type=file_type):
+        cached_result = result_cache.get(upload['cache_key']) if result_cache else None
+    # Media clips can't be re-created from the source on demand, so re-extract if they expired
+    if cached_result is not None and file_type in ('audio', 'video') and preview_store.media_path(upload['preview_id'])[0] is None:
+        cached_result = None
+    upload['cached_result'] = cached_result
+    
+    # Previews live longer than uploads so cached results keep their images. Pinned while
+    # the extraction reads the source from there, so the quota can't evict it meanwhile; other
+    # uploads of the same content hold pins of their own
+    upload['preview_pinned'] = cached_result is None
+    artifact_store.add(
+        preview_artifact(upload['preview_id']), preview_store.document_dir(upload['preview_id']),
+        ttl=app.config['PREVIEW_MAX_AGE'], pin=upload['filename'] if upload['preview_pinned'] else None
+    )
+    
+    # Cached results cost nothing to serve, so only extractions are admitted
+    if cached_result is None and admission is not None:
+        cost, units = estimate_cost(upload)
+        try:
+            with metrics.timer('admission_wait', file_type=file_type):
+                upload['ticket'] = admission.acquire(cost, kind=file_type, units=units, timeout=admission_timeout)
+        except AdmissionRejected:
+            metrics.inc('admission_rejected_total', file_type=file_type)
+            raise
+
+def release_extraction(upload):
+    """Give back the budget an upload's extraction was admitted with and unpin its previews (safe to call twice)"""
+    ticket = upload.pop('ticket', None)
+    if ticket is not None:
+        ticket.release()
+    if upload.pop('preview_pinned', False):
+        try:
+            # Adding it again also counts whatever the extraction wrote there
+            artifact_store.add(
+                preview_artifact(upload['preview_id']), preview_store.document_dir(upload['preview_id']),
+                ttl=app.config['PREVIEW_MAX_AGE']
+            )
+            artifact_store.unpin(preview_artifact(upload['preview_id']), upload['filename'])
+        except Exception as e:
+            print(f"Warning: Could not unpin previews of {upload['preview_id']}: {e}")
+
+def iter_extraction(upload):
+    """Yield the pages of an upload, serving them from the result cache when possible"""
+    file_type = upload['file_type']
+    
+    try:
+        if 'cache_key' not in upload:
+            prepare_extraction(upload)
+        cached_result = upload.pop('cached_result', None)
+        if cached_result is not None:
+            upload['cached'] = True
+            yield from cached_result
+            record_extraction(upload, cached_result, upload['start'])
+            return
+        
+        # Only PDFs take a page range, and only audio a transcription started during the upload
+        options = {}
+        if upload.get('pages'):
+            options['pages'] = upload['pages']
+        if upload.get('transcript') is not None:
+            options['transcript'] = upload['transcript']
+        result = []
+        for page in EXTRACTORS[file_type](upload['path'], preview_id=upload['preview_id'], **options):
+            result.append(page)
+            yield page
+    finally:
+        release_extraction(upload)
+    
+    # Don't cache failures, they may be transient (e.g. the speech service being unreachable),
+    # nor an empty result, which no extractor produces for a file it could read
+    if result_cache and result and not any(page['source'] == 'error' for page in result):
+        with metrics.timer('cache_store', file_type=file_type):
+            result_cache.put(upload['cache_key'], result)
+    record_extraction(upload, result, upload['start'])
+
+def record_extraction(upload, result, start):
+    """Count a finished extraction, its pages by source and the bytes that went in and out"""
+    if not metrics.enabled:
+        return
+    file_type = upload['file_type']
+    seconds = time.perf_counter() - start
+    cached = 'true' if upload['cached'] else 'false'
+    metrics.inc('extractions_total', file_type=file_type, cached=cached)
+    metrics.observe('extraction_seconds', seconds, file_type=file_type, cached=cached)
+    for page in result:
+        metrics.inc('pages_total', file_type=file_type, source=page['source'])
+    bytes_in = os.path.getsize(upload['path'])
+    bytes_out = sum(len(page['text'].encode('utf-8')) for page in result)
+    metrics.inc('extraction_bytes_in_total', bytes_in, file_type=file_type)
+    metrics.inc('extraction_bytes_out_total', bytes_out, file_type=file_type)
+    metrics.log(
+        'extraction',
+        file=upload['filename'],
+        file_type=file_type,
+        cached=upload['cached'],
+        pages=len(result),
+        seconds=round(seconds, 6),
+        bytes_in=bytes_in,
+        text_bytes=bytes_out
+    )
+
+def count_upload_pages(upload):
+    """Cheap count of the pages an upload will produce, None when it isn't known up front"""
+    if upload['file_type'] != 'pdf':
+        return 1
+    try:
+        if 'preview_id' in upload:
+            # Parsed once and reused by the extraction and later page requests
+            page_count = open_document(upload['preview_id']).page_count
+        else:
+            with open(upload['path'], 'rb') as file:
+                page_count = len(PyPDF2.PdfReader(file).pages)
+    except Exception:
+        return None
+    return len(select_pages(upload.get('pages'), page_count))
+
+def count_scanned_pages(upload):
+    """Pages of a PDF upload that will need OCR because they declare no fonts; None when unknown"""
+    try:
+        document = open_document(upload['preview_id'])
+        page_numbers = select_pages(upload.get('pages'), document.page_count)
+        return sum(1 for page_num in page_numbers if not document.may_have_text(page_num))
+    except Exception:
+        return None
+
+def finish_upload(upload, result):
+    """Write the text file for download and describe the finished upload"""
+    filename = upload['filename']
+    
+    # Create text file for download, directly in the uploads directory
+    text_filename = f"{os.path.splitext(filename)[0]}_extracted.txt"
+    text_filepath = os.path.join(app.config['UPLOAD_FOLDER'], text_filename)
+    
+    with open(text_filepath, 'w', encoding='utf-8') as text_file:
+        for page in result:
+            text_file.write(f"--- Page {page['page']} ({page['source']}) ---\n\n")
+            text_file.write(page['text'] + "\n\n")
+    
+    # Both downloads stay available for the full TTL from now, however long extraction took
+    artifact_store.add(f"text/{text_filename}", text_filepath)
+    artifact_store.add(f"original/{filename}", upload['path'])
+    artifact_store.unpin(f"original/{filename}", 'upload')
+    upload['finished'] = True
+    
+    # Make the pages searchable; a failure here shouldn't lose the extraction
+    if search_index is not None:
+        try:
+            with metrics.timer('search_index', file_type=upload['file_type']):
+                search_index.add_document(
+                    text_filename, upload['original_filename'], upload['file_type'], result, original=filename
+                )
+        except Exception as e:
+            print(f"Warning: Could not index {text_filename} for search: {e}")
+    
+    return {
+        'success': True,
+        'filename': upload['original_filename'],  # Return the original filename for display
+        'fileType': upload['file_type'],
+        'cached': upload['cached'],
+        'documentId': upload['preview_id'],
+        'downloadLinks': {
+            'original': f"/download/original/{filename}",
+            'text': f"/download/text/{text_filename}"
+        }
+    }
+
+def discard_upload(upload):
+    """Remove a stored upload whose processing failed"""
+    try:
+        artifact_store.remove(f"original/{upload['filename']}")
+        remove_file(upload['path'])
+    except Exception as cleanup_error:
+        print(f"Warning: Error during cleanup: {cleanup_error}")
+
+def stream_extraction(upload):
+    """Yield an extraction as NDJSON lines: a header, one line per page, then the download links"""
+    yield json.dumps({
+        'type': 'start',
+        'filename': upload['original_filename'],
+        'fileType': upload['file_type'],
+        'documentId': upload['preview_id'],
+        'totalPages': count_upload_pages(upload)
+    }) + "\n"
+    
+    try:
+        result = []
+        for page in iter_extraction(upload):
+            result.append(page)
+            yield json.dumps({'type': 'page', 'page': page}) + "\n"
+        
+        response = finish_upload(upload, result)
+        response['type'] = 'done'
+        yield json.dumps(response) + "\n"
+    except Exception as e:
+        # The status line has already been sent, so report the failure in the stream
+        print(f"Error processing file: {str(e)}")
+        discard_upload(upload)
+        yield json.dumps({'type': 'error', 'error': f'Error processing file: {str(e)}'}) + "\n"
+
+def close_stream(upload):
+    """Release a streamed extraction, and discard its upload if the stream ended before it finished"""
+    release_extraction(upload)
+    if not upload.get('finished'):
+        discard_upload(upload)
+
+def get_uploaded_file():
+    """Return the request's file, or an error response tuple if it can't be processed"""
     if 'file' not in request.files:
-        return jsonify({'error': 'No file part'}), 400
+        return None, (jsonify({'error': 'No file part'}), 400)
     
     file = request.files['file']
     
     if file.filename == '':
-        return jsonify({'error': 'No selected file'}), 400
+        return None, (jsonify({'error': 'No selected file'}), 400)
+    
+    if not allowed_file(file.filename):
+        return None, (jsonify({'error': 'File type not allowed'}), 400)
+    
+    return file, None
+
+def get_page_range():
+    """The `pages` range (e.g. 1-5,8) a request asks for, or an error response tuple if it is invalid"""
+    try:
+        return parse_page_range(request.args.get('pages') or request.form.get('pages')), None
+    except ValueError as e:
+        return None, (jsonify({'error': str(e)}), 400)
+
+def page_range_error(upload):
+    """Discard an upload whose page range selects none of its pages and return a 400 response tuple, else None"""
+    if upload.get('pages') and count_upload_pages(upload) == 0:
+        discard_upload(upload)
+        return jsonify({'error': 'The page range is past the end of the document'}), 400
+    return None
+
+def too_busy_response(error):
+    """429 telling the client when capacity is expected to be free again"""
+    response = jsonify({'error': str(error), 'retryAfter': error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 429
+
+@app.route('/upload', methods=['POST'])
+def upload_file():
+    file, error_response = get_uploaded_file()
+    if error_response:
+        return error_response
+    pages, error_response = get_page_range()
+    if error_response:
+        return error_response
     
-    if file and allowed_file(file.filename):
+    try:
+        upload = save_upload(file)
+        if upload['file_type'] == 'pdf':
+            upload['pages'] = pages
+        
+        if upload['file_type'] is None:
+            discard_upload(upload)
+            return jsonify({'error': 'Unsupported file type'}), 400
+        error_response = page_range_error(upload)
+        if error_response:
+            return error_response
+        
+        return extraction_response(upload)
+    
+    except Exception as e:
+        print(f"Error handling upload: {str(e)}")
+        return jsonify({'error': f'Error handling upload: {str(e)}'}), 500
+
+def extraction_response(upload):
+    """Extract a stored upload for the current request: as NDJSON with ?stream=1, else as one JSON body"""
+    try:
+        # Wait a bounded time for capacity, and turn the client away early when there is none
         try:
-            # Secure the filename and create a unique version to avoid conflicts
-            original_filename = secure_filename(file.filename)
-            unique_id = uuid.uuid4().hex[:8]
-            filename = f"{os.path.splitext(original_filename)[0]}_{unique_id}{os.path.splitext(original_filename)[1]}"
-            
-            # Create a temporary directory for processing this file
-            temp_process_dir = os.path.join(app.config['UPLOAD_FOLDER'], f"proc_{unique_id}")
-            os.makedirs(temp_process_dir, exist_ok=True)
-            
-            # Save the uploaded file to the temporary directory
-            filepath = os.path.join(temp_process_dir, filename)
-            file.save(filepath)
-            
-            file_ext = os.path.splitext(filename)[1].lower()[1:]  # Get extension without the dot
-            
-            # Save a copy of the original file for download
-            original_copy = os.path.join(temp_process_dir, f"original_{filename}")
-            shutil.copy2(filepath, original_copy)
-            
+            prepare_extraction(upload, admission_timeout=app.config['ADMISSION_MAX_WAIT'])
+        except AdmissionRejected as e:
+            release_extraction(upload)
+            discard_upload(upload)
+            return too_busy_response(e)
+        
+        if request.args.get('stream') == '1':
+            # Send each page as soon as it is extracted instead of one body at the end
+            response = flask.Response(
+                stream_extraction(upload),
+                mimetype='application/x-ndjson',
+                headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+            )
+            # The body may never be read, or stop being read (client gone), which must not leak
+            # the admission or leave the stored upload pinned
+            response.call_on_close(lambda: close_stream(upload))
+            return response
+        
+        result = list(iter_extraction(upload))
+        response = finish_upload(upload, result)
+        response['pages'] = result
+        return jsonify(response)
+        
+    except Exception as e:
+        # If any error occurs during processing, return error
+        print(f"Error processing file: {str(e)}")
+        # Clean up resources
+        release_extraction(upload)
+        discard_upload(upload)
+        return jsonify({'error': f'Error processing file: {str(e)}'}), 500
+
+def run_extraction_job(upload):
+    """Build the job body that extracts an upload page by page"""
+    # Log lines from the worker thread belong to the request that queued the job
+    parent_request_id = metrics_module.request_id.get()
+    
+    def run(job):
+        metrics_module.request_id.set(parent_request_id)
+        try:
+            job.set_total_pages(count_upload_pages(upload))
+            result = []
+            for page in iter_extraction(upload):
+                result.append(page)
+                job.add_page(page)
+            return finish_upload(upload, result)
+        except Exception:
+            discard_upload(upload)
+            raise
+    return run
+
+@app.route('/jobs', methods=['POST'])
+def create_job():
+    """Queue an extraction and return its job id straight away"""
+    file, error_response = get_uploaded_file()
+    if error_response:
+        return error_response
+    pages, error_response = get_page_range()
+    if error_response:
+        return error_response
+    
+    try:
+        upload = save_upload(file)
+        if upload['file_type'] == 'pdf':
+            upload['pages'] = pages
+    except Exception as e:
+        print(f"Error handling upload: {str(e)}")
+        return jsonify({'error': f'Error handling upload: {str(e)}'}), 500
+    
+    if upload['file_type'] is None:
+        discard_upload(upload)
+        return jsonify({'error': 'Unsupported file type'}), 400
+    error_response = page_range_error(upload)
+    if error_response:
+        return error_response
+    
+    return queue_extraction_job(upload)
+
+def queue_extraction_job(upload):
+    """Queue the extraction of a stored upload and describe the job"""
+    try:
+        job = job_manager.submit(run_extraction_job(upload), info={
+            'filename': upload['original_filename'],
+            'fileType': upload['file_type']
+        }, pool=JOB_POOLS[upload['file_type']])
+    except QueueFullError as e:
+        discard_upload(upload)
+        return jsonify({'error': str(e)}), 503
+    
+    return jsonify({
+        'success': True,
+        'jobId': job.id,
+        'status': job.status,
+        'statusUrl': f"/jobs/{job.id}",
+        'eventsUrl': f"/jobs/{job.id}/events"
+    }), 202
+
+def start_early_transcription(upload_id, upload):
+    """Start transcribing an audio upload from its first bytes while the rest is still arriving.
+    
+    ffmpeg decodes the received prefix through a pipe and waits for more, so by the
+    time the last chunk lands most of the recording is transcribed. Runs only if
+    admission has room right away, as it holds its budget for as long as the upload
+    takes, and gives up if the upload stalls. Other file types can't start early: a PDF's pages can only be found
+    through the cross-reference table at its end, and most videos keep their index
+    there too.
+    """
+    if not app.config['CHUNKED_EARLY_EXTRACTION'] or upload['file_type'] != 'audio':
+        return None
+    ticket = None
+    if admission is not None:
+        cost, _ = estimate_cost(upload)
+        # No kind: how long this holds its budget depends on the client's bandwidth
+        ticket = admission.try_acquire(cost)
+        if ticket is None:
+            return None
+    
+    future = Future()
+    
+    def run():
+        try:
+            source = upload_sessions.iter_received(upload_id, idle_timeout=app.config['CHUNKED_EARLY_IDLE_SECONDS'])
+            future.set_result(transcriber.transcribe_stream(iter_pcm(upload['path'], source=source)))
+        except Exception as e:
+            future.set_exception(e)
+        finally:
+            if ticket is not None:
+                ticket.release()
+    
+    with early_transcripts_lock:
+        early_transcripts[upload_id] = future
+    threading.Thread(target=run, name=f"early-transcription-{upload_id[:8]}", daemon=True).start()
+    metrics.inc('early_transcriptions_total')
+    return future
+
+def upload_session_response(status, code=200):
+    status.update({
+        'chunkSize': app.config['CHUNKED_UPLOAD_CHUNK_BYTES'],
+        'uploadUrl': f"/uploads/{status['uploadId']}",
+        'completeUrl': f"/uploads/{status['uploadId']}/complete"
+    })
+    return jsonify(status), code
+
+@app.route('/uploads', methods=['POST'])
+def create_upload_session():
+    """Start a resumable upload of {filename, size[, sha256, pages]}: PUT its chunks, then complete it"""
+    params = request.get_json(silent=True) or request.form
+    filename = params.get('filename') or ''
+    try:
+        size = int(params.get('size'))
+    except (TypeError, ValueError):
+        return jsonify({'error': 'size must be the file size in bytes'}), 400
+    sha256 = params.get('sha256')
+    
+    if not filename:
+        return jsonify({'error': 'No filename'}), 400
+    if not allowed_file(filename):
+        return jsonify({'error': 'File type not allowed'}), 400
+    if size <= 0:
+        return jsonify({'error': 'size must be the file size in bytes'}), 400
+    if size > app.config['CHUNKED_UPLOAD_MAX_BYTES']:
+        return jsonify({'error': f"File is larger than {app.config['CHUNKED_UPLOAD_MAX_BYTES']} bytes"}), 413
+    if sha256 is not None and (len(sha256) != 64 or any(c not in '0123456789abcdefABCDEF' for c in sha256)):
+        return jsonify({'error': 'sha256 must be a hex SHA-256 digest'}), 400
+    try:
+        pages = parse_page_range(params.get('pages'))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    upload = new_upload(filename)
+    if upload['file_type'] is None:
+        return jsonify({'error': 'Unsupported file type'}), 400
+    if upload['file_type'] == 'pdf':
+        upload['pages'] = pages
+    
+    upload_id = uuid.uuid4().hex
+    try:
+        # The expires index makes this cheap, and spares a sweeper thread per process
+        sweep_upload_sessions()
+        status = upload_sessions.create(upload_id, upload['path'], size, sha256=sha256, metadata=upload)
+        # Counted against the disk quota from the start; pinned and kept alive by every chunk
+        artifact_store.add(f"original/{upload['filename']}", upload['path'], ttl=app.config['CHUNKED_UPLOAD_TTL'], pin='upload')
+    except Exception as e:
+        print(f"Error handling upload: {str(e)}")
+        discard_upload(upload)
+        return jsonify({'error': f'Error handling upload: {str(e)}'}), 500
+    
+    start_early_transcription(upload_id, upload)
+    return upload_session_response(status, 201)
+
+@app.route('/uploads/<upload_id>')
+def upload_session_status(upload_id):
+    """Bytes received so far, and the ranges still missing, to resume an interrupted upload"""
+    try:
+        return upload_session_response(upload_sessions.status(upload_id))
+    except UploadNotFound:
+        return jsonify({'error': 'Upload not found or expired'}), 404
+
+@app.route('/uploads/<upload_id>', methods=['PUT'])
+def upload_chunk(upload_id):
+    """Write the request body into an upload at ?offset=, or at the start of its Content-Range"""
+    offset = request.args.get('offset', type=int)
+    if offset is None and 'Content-Range' in request.headers:
+        content_range = parse_content_range_header(request.headers['Content-Range'])
+        if content_range is not None and content_range.start is not None:
+            offset = content_range.start
+    if offset is None:
+        return jsonify({'error': 'The chunk offset is required'}), 400
+    if request.content_length is None:
+        return jsonify({'error': 'Content-Length is required'}), 411
+    
+    session = upload_sessions.session(upload_id)
+    if session is None:
+        return jsonify({'error': 'Upload not found or expired'}), 404
+    try:
+        with metrics.timer('chunk_write', file_type=session['metadata']['file_type']):
+            status = upload_sessions.write(upload_id, offset, request.stream, request.content_length)
+    except UploadNotFound:
+        return jsonify({'error': 'Upload not found or expired'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    
+    metrics.inc('upload_chunk_bytes_total', request.content_length, file_type=session['metadata']['file_type'])
+    artifact_store.add(
+        f"original/{session['metadata']['filename']}", session['path'], ttl=app.config['CHUNKED_UPLOAD_TTL'], pin='upload'
+    )
+    return upload_session_response(status)
+
+@app.route('/uploads/<upload_id>', methods=['DELETE'])
+def abort_upload_session(upload_id):
+    session = upload_sessions.session(upload_id)
+    if session is None:
+        return jsonify({'error': 'Upload not found or expired'}), 404
+    if session['completed']:
+        return jsonify({'error': 'Upload is already complete'}), 409
+    upload_sessions.abort(upload_id)
+    with early_transcripts_lock:
+        early_transcripts.pop(upload_id, None)
+    discard_upload(session['metadata'])
+    return jsonify({'success': True})
+
+@app.route('/uploads/<upload_id>/complete', methods=['POST'])
+def complete_upload_session(upload_id):
+    """Finish a fully received upload and extract it like /upload (or queue it like /jobs with ?async=1)"""
+    try:
+        with metrics.timer('upload_finish'):
+            session = upload_sessions.finish(upload_id)
+    except UploadNotFound:
+        return jsonify({'error': 'Upload not found or expired'}), 404
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 409
+    
+    upload = session['metadata']
+    upload['sha256'] = session['sha256']
+    # From here on it is an ordinary upload: downloadable for the full TTL, pinned until extracted
+    artifact_store.add(f"original/{upload['filename']}", upload['path'], pin='upload')
+    with early_transcripts_lock:
+        upload['transcript'] = early_transcripts.pop(upload_id, None)
+    # The range was parsed when the upload started, but the page count is only known now
+    error_response = page_range_error(upload)
+    if error_response:
+        return error_response
+    
+    if request.args.get('async') == '1':
+        return queue_extraction_job(upload)
+    return extraction_response(upload)
+
+@app.route('/uploads/stats')
+def upload_sessions_stats():
+    return jsonify(upload_sessions.stats())
+
+def queue_batch_upload(batch, upload):
+    """Queue the extraction of a stored batch file, recording failures in the batch"""
+    if upload['file_type'] is None:
+        discard_upload(upload)
+        batch.add({'filename': upload['original_filename'], 'error': 'Unsupported file type'})
+        return
+    
+    # Wait for room in the pool's queue rather than failing the rest of the batch
+    job = job_manager.submit(run_extraction_job(upload), info={
+        'filename': upload['original_filename'],
+        'fileType': upload['file_type']
+    }, pool=JOB_POOLS[upload['file_type']], block=True)
+    batch.add({'filename': upload['original_filename'], 'job': job})
+
+def archive_artifact(archive_path):
+    """Name a batch archive is indexed under until its members have been queued"""
+    return f"archive/{os.path.basename(archive_path)}"
+
+def feed_batch(batch, uploads, archives):
+    """Queue the stored files of a batch, then the archive members one at a time"""
+    count = len(uploads)
+    try:
+        for upload in uploads:
+            queue_batch_upload(batch, upload)
+        
+        for archive_name, archive_path in archives:
             try:
-                if file_ext == 'pdf':
-                    result = extract_text_from_pdf(filepath)
-                    file_type = 'pdf'
-                elif file_ext in ['png', 'jpg', 'jpeg']:
-                    result = extract_text_from_image(filepath)
-                    file_type = 'image'
-                elif file_ext in ['mp3', 'wav']:
-                    result = extract_text_from_audio(filepath)
-                    file_type = 'audio'
-                elif file_ext in ['mp4', 'avi', 'mov', 'mkv']:
-                    result = extract_text_from_video(filepath)
-                    file_type = 'video'
-                else:
-                    return jsonify({'error': 'Unsupported file type'}), 400
-                
-                # Create text file for download
-                text_content = ""
-                for page in result:
-                    text_content += f"--- Page {page['page']} ({page['source']}) ---\n\n"
-                    text_content += page['text'] + "\n\n"
-                
-                text_filename = f"{os.path.splitext(filename)[0]}_extracted.txt"
-                text_filepath = os.path.join(temp_process_dir, text_filename)
-                
-                with open(text_filepath, 'w', encoding='utf-8') as text_file:
-                    text_file.write(text_content)
-                
-                # Move files to the main uploads directory
-                final_original = os.path.join(app.config['UPLOAD_FOLDER'], f"original_{filename}")
-                final_text = os.path.join(app.config['UPLOAD_FOLDER'], text_filename)
-                
-                shutil.copy2(original_copy, final_original)
-                shutil.copy2(text_filepath, final_text)
-                
-                # Clean up the temporary processing directory
-                try:
-                    # Force close any file handles
-                    gc.collect()
-                    time.sleep(0.5)  # Small delay for resources to be freed
+                # Members are copied out and queued one by one while the archive is read
+                for name, member in iter_archive_members(archive_path):
+                    filename = member_filename(name)
+                    if not filename or filename.startswith('.'):
+                        continue
+                    if not allowed_file(filename):
+                        batch.add({'filename': filename, 'error': 'File type not allowed'})
+                        continue
                     
-                    # Remove original file to save space
-                    if os.path.exists(filepath):
-                        os.remove(filepath)
-                        
-                    # Remove the temporary directory entirely
-                    shutil.rmtree(temp_process_dir, ignore_errors=True)
-                except Exception as cleanup_error:
-                    print(f"Warning: Error during cleanup: {cleanup_error}")
-                
-                return jsonify({
-                    'success': True,
-                    'filename': original_filename,  # Return the original filename for display
-                    'pages': result,
-                    'fileType': file_type,
-                    'downloadLinks': {
-                        'original': f"/download/original/{filename}",
-                        'text': f"/download/text/{text_filename}"
-                    }
-                })
-                
+                    count += 1
+                    if count > app.config['BATCH_MAX_FILES']:
+                        batch.add({'filename': archive_name, 'error': f"Batch is limited to {app.config['BATCH_MAX_FILES']} files"})
+                        break
+                    
+                    upload = new_upload(filename)
+                    try:
+                        store_stream(member, upload['path'], max_bytes=app.config['MAX_CONTENT_LENGTH'])
+                        artifact_store.add(f"original/{upload['filename']}", upload['path'], pin='upload')
+                    except Exception as e:
+                        batch.add({'filename': filename, 'error': f'Error reading file from archive: {str(e)}'})
+                        continue
+                    queue_batch_upload(batch, upload)
             except Exception as e:
-                # If any error occurs during processing, return error
-                print(f"Error processing file: {str(e)}")
-                # Clean up resources
-                try:
-                    shutil.rmtree(temp_process_dir, ignore_errors=True)
-                except:
-                    pass
-                return jsonify({'error': f'Error processing file: {str(e)}'}), 500
-                
-        except Exception as e:
-            print(f"Error handling upload: {str(e)}")
-            return jsonify({'error': f'Error handling upload: {str(e)}'}), 500
+                print(f"Error reading archive {archive_name}: {str(e)}")
+                batch.add({'filename': archive_name, 'error': f'Error reading archive: {str(e)}'})
+            finally:
+                artifact_store.remove(archive_artifact(archive_path))
+        
+        batch.finish()
+    except Exception as e:
+        print(f"Error queueing batch {batch.id}: {str(e)}")
+        batch.finish(error=str(e))
+
+@app.route('/batch', methods=['POST'])
+def create_batch():
+    """Extract many files at once, sent as `files` and/or zip/tar archives.
+    
+    Waits and returns every file's result by default; with ?async=1 it returns a
+    manifest straight away and /batch/<id> reports progress.
+    """
+    files = [file for file in request.files.getlist('files') + request.files.getlist('file') if file.filename]
+    if not files:
+        return jsonify({'error': 'No files in batch'}), 400
+    
+    batch = batch_manager.create()
+    uploads = []
+    archives = []
+    try:
+        # Store everything before the request ends; spool files are removed at teardown
+        for index, file in enumerate(files):
+            if is_archive(file.filename):
+                archive_path = os.path.join(app.config['UPLOAD_FOLDER'], f"batch_{batch.id}_{index}")
+                store_upload(file, archive_path)
+                artifact_store.add(archive_artifact(archive_path), archive_path, pin='batch')
+                archives.append((secure_filename(file.filename), archive_path))
+            elif allowed_file(file.filename):
+                if len(uploads) >= app.config['BATCH_MAX_FILES']:
+                    batch.add({'filename': secure_filename(file.filename), 'error': f"Batch is limited to {app.config['BATCH_MAX_FILES']} files"})
+                    continue
+                uploads.append(save_upload(file))
+            else:
+                batch.add({'filename': secure_filename(file.filename), 'error': 'File type not allowed'})
+    except Exception as e:
+        print(f"Error handling batch upload: {str(e)}")
+        for upload in uploads:
+            discard_upload(upload)
+        for _, archive_path in archives:
+            artifact_store.remove(archive_artifact(archive_path))
+            remove_file(archive_path)
+        return jsonify({'error': f'Error handling upload: {str(e)}'}), 500
+    
+    if request.args.get('async') == '1':
+        # Run in a copy of the request context so the jobs keep this request's id
+        context = contextvars.copy_context()
+        threading.Thread(
+            target=context.run, args=(feed_batch, batch, uploads, archives), name=f"batch-{batch.id}", daemon=True
+        ).start()
+        manifest = batch.to_dict()
+        manifest.update({'success': True, 'statusUrl': f"/batch/{batch.id}"})
+        return jsonify(manifest), 202
+    
+    feed_batch(batch, uploads, archives)
+    for job in batch.jobs():
+        job.wait()
+    manifest = batch.to_dict(include_pages=True)
+    manifest['success'] = True
+    return jsonify(manifest)
+
+@app.route('/batch/<batch_id>')
+def batch_status(batch_id):
+    """Manifest of a batch: every file with its job status, and pages with ?pages=1"""
+    batch = batch_manager.get(batch_id)
+    if batch is None:
+        return jsonify({'error': 'Batch not found'}), 404
+    return jsonify(batch.to_dict(include_pages=request.args.get('pages') == '1'))
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Status and progress of a job, with its pages once it has finished"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    include_pages = job.done or request.args.get('pages') == '1'
+    return jsonify(job.to_dict(include_pages=include_pages))
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    """Server-sent events stream: one `page` event per finished page, then `done`"""
+    job = job_manager.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    
+    def generate():
+        sent = 0
+        while True:
+            new_pages = job.wait_for_pages(sent)
+            for page in new_pages:
+                yield f"event: page\ndata: {json.dumps(page)}\n\n"
+            sent += len(new_pages)
+            if job.done and sent >= job.page_count:
+                break
+            if not new_pages:
+                # Keep idle connections open through proxies
+                yield ": keep-alive\n\n"
+        yield f"event: done\ndata: {json.dumps(job.to_dict())}\n\n"
+    
+    return flask.Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/jobs/stats')
+def jobs_stats():
+    return jsonify(job_manager.stats())
+
+def send_preview(path, mimetype, etag):
+    # Preview ids are content hashes, so a given URL always maps to the same bytes
+    response = send_file(path, mimetype=mimetype, conditional=True, etag=etag, max_age=app.config['PREVIEW_MAX_AGE'])
+    response.cache_control.public = True
+    return response
+
+@app.route('/preview/<preview_id>/<int:page>')
+def preview_page(preview_id, page):
+    """Thumbnail of a page, or the full-resolution render with ?size=full"""
+    # Only indexed previews are served, and looking them up keeps them from being evicted
+    if not PreviewStore.is_valid_id(preview_id) or artifact_store.get(preview_artifact(preview_id)) is None:
+        return jsonify({'error': 'Preview not found'}), 404
+    
+    try:
+        if request.args.get('size') == 'full':
+            path, mimetype = preview_store.full_path(preview_id, page)
+            etag = f"{preview_id}-{page}-full"
+        else:
+            path, mimetype = preview_store.thumbnail_path(preview_id, page), preview_store.mimetype
+            etag = f"{preview_id}-{page}"
+    except Exception as e:
+        print(f"Error rendering preview: {str(e)}")
+        return jsonify({'error': 'Preview could not be rendered'}), 500
+    
+    if path is None:
+        return jsonify({'error': 'Preview not found'}), 404
+    return send_preview(path, mimetype, etag)
+
+@app.route('/preview/<preview_id>/media')
+def preview_media(preview_id):
+    """Audio or video preview clip"""
+    if not PreviewStore.is_valid_id(preview_id) or artifact_store.get(preview_artifact(preview_id)) is None:
+        return jsonify({'error': 'Preview not found'}), 404
+    path, mimetype = preview_store.media_path(preview_id)
+    if path is None:
+        return jsonify({'error': 'Preview not found'}), 404
+    return send_preview(path, mimetype, f"{preview_id}-media")
+
+@app.route('/document/<document_id>/page/<int:page>')
+def document_page(document_id, page):
+    """Extract a single page of an uploaded PDF, then prefetch the pages around it"""
+    # The document is read from its preview directory
+    if not PreviewStore.is_valid_id(document_id) or artifact_store.get(preview_artifact(document_id)) is None:
+        return jsonify({'error': 'Document not found'}), 404
+    
+    try:
+        document = open_document(document_id)
+    except Exception as e:
+        print(f"Error reading PDF: {str(e)}")
+        return jsonify({'error': 'Document could not be read'}), 500
+    if document is None:
+        return jsonify({'error': 'Document not found'}), 404
+    if not 1 <= page <= document.page_count:
+        return jsonify({'error': 'Page not found', 'totalPages': document.page_count}), 404
+    
+    try:
+        with metrics.timer('document_page', file_type='pdf'):
+            page_data = documents.page(document_id, document, page)
+    except AdmissionRejected as e:
+        return too_busy_response(e)
+    except Exception as e:
+        print(f"Error extracting page {page} of {document_id}: {str(e)}")
+        return jsonify({'error': f'Error extracting page: {str(e)}'}), 500
     
-    return jsonify({'error': 'File type not allowed'}), 400
+    return jsonify({
+        'documentId': document_id,
+        'totalPages': document.page_count,
+        'page': page_data
+    })
+
+@app.route('/documents/stats')
+def documents_stats():
+    return jsonify(documents.stats())
+
+def send_artifact(name, download_name):
+    # Only names in the index are served, and only until they expire
+    path = artifact_store.get(name)
+    if path is None:
+        return jsonify({'error': 'File not found or expired'}), 404
+    return send_file(path, as_attachment=True, download_name=download_name)
 
 @app.route('/download/original/<filename>')
 def download_original(filename):
-    return send_file(os.path.join(app.config['UPLOAD_FOLDER'], f"original_{filename}"), 
-                     as_attachment=True, 
-                     download_name=filename)
+    return send_artifact(f"original/{filename}", filename)
 
 @app.route('/download/text/<filename>')
 def download_text(filename):
-    return send_file(os.path.join(app.config['UPLOAD_FOLDER'], filename), 
-                     as_attachment=True, 
-                     download_name=filename)
-
-# Helper function to clean up old files (run periodically)
-def cleanup_old_files():
-    """Remove files older than 1 hour from the uploads directory"""
-    try:
-        now = time.time()
-        for f in os.listdir(app.config['UPLOAD_FOLDER']):
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], f)
-            if os.path.isfile(filepath) and os.path.exists(filepath):
-                # Remove files older than 1 hour
-                if os.stat(filepath).st_mtime < now - 3600:
-                    try:
-                        os.remove(filepath)
-                    except:
-                        pass
+    return send_artifact(f"text/{filename}", filename)
+
+def adopt_untracked_files():
+    """Index files the artifact index doesn't know about, such as spool files of crashed requests
+    and previews written before previews were indexed.
+    
+    Lists the uploads and preview folders, so it runs once at server startup; they
+    then expire like everything else, counting from their modification time.
+    """
+    try:
+        adopted = artifact_store.adopt_untracked(skip={'spool', 'sessions', 'jobs'})
+        adopted += artifact_store.adopt_untracked(SpoolingRequest.spool_dir)
+        adopted += artifact_store.adopt_untracked(
+            preview_store.directory, prefix='preview/', ttl=app.config['PREVIEW_MAX_AGE']
+        )
+        if adopted:
+            print(f"Indexed {adopted} untracked files in {app.config['UPLOAD_FOLDER']} and {app.config['PREVIEW_FOLDER']}")
     except Exception as e:
-        print(f"Error during cleanup: {e}")
+        print(f"Error indexing untracked files: {e}")
+
+def sweep_upload_sessions():
+    """Forget expired chunked uploads and their transcriptions, and delete the files of unfinished ones"""
+    expired = upload_sessions.sweep()
+    for session in expired:
+        # Unfinished uploads are pinned, so they would stay on disk without their session
+        if not session['completed']:
+            discard_upload(session['metadata'])
+    with early_transcripts_lock:
+        for upload_id, future in list(early_transcripts.items()):
+            if future.done() and upload_sessions.session(upload_id) is None:
+                del early_transcripts[upload_id]
+    return expired
+
+def sweep_storage():
+    """Expire downloads and previews and enforce the disk quota, then forget expired upload sessions"""
+    expired, evicted = 0, 0
+    try:
+        expired, evicted = artifact_store.sweep()
+    except Exception as e:
+        print(f"Error during artifact sweep: {e}")
+    
+    try:
+        sweep_upload_sessions()
+    except Exception as e:
+        print(f"Error during upload session sweep: {e}")
+    return {'expired': expired, 'evicted': evicted}
+
+def recover_interrupted_work():
+    """Fail the jobs and unpin the files of an earlier run, which nothing is going to finish.
+    
+    Runs once at server startup, before any worker takes requests. Chunked uploads
+    still in progress are pinned again by their next chunk.
+    """
+    job_manager.fail_unfinished()
+    artifact_store.unpin_all()
+
+def start_sweeper():
+    """Expire artifacts in the background; threads don't survive a fork, so this runs per process"""
+    artifact_store.start_sweeper(app.config['ARTIFACT_SWEEP_INTERVAL'])
+
+def start_metrics_flusher():
+    """Share this worker's metrics with the others every METRICS_FLUSH_INTERVAL seconds (per process)"""
+    metrics.start_flusher(app.config['METRICS_FLUSH_INTERVAL'])
+
+@app.route('/admission/stats')
+def admission_stats():
+    """Budget capacity and usage, queue length and admission counters of this worker"""
+    if admission is None:
+        return jsonify({'enabled': False})
+    stats = admission.stats()
+    stats['enabled'] = True
+    return jsonify(stats)
+
+@app.route('/cache/stats')
+def cache_stats():
+    """Hit/miss counters and size of the result cache"""
+    if result_cache is None:
+        return jsonify({'enabled': False})
+    stats = result_cache.stats()
+    stats['enabled'] = True
+    return jsonify(stats)
+
+@app.route('/search')
+def search():
+    """Ranked full-text search over extracted pages.
+    
+    Takes `q` (every word must match, `word*` for a prefix), optional `source` and
+    `fileType` filters, and `page`/`perPage` for pagination.
+    """
+    if search_index is None:
+        return jsonify({'error': 'Search is disabled'}), 404
+    
+    query = request.args.get('q', '')
+    try:
+        page = max(1, int(request.args.get('page', 1)))
+        per_page = min(100, max(1, int(request.args.get('perPage', 20))))
+    except ValueError:
+        return jsonify({'error': 'page and perPage must be numbers'}), 400
+    
+    try:
+        with metrics.timer('search_query'):
+            found = search_index.search(
+                query,
+                source=request.args.get('source'),
+                file_type=request.args.get('fileType'),
+                limit=per_page,
+                offset=(page - 1) * per_page
+            )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    for result in found['results']:
+        # Links stop working once the files expire from the artifact store; the text stays searchable
+        original = result.pop('original')
+        result['downloadLinks'] = {
+            'original': f"/download/original/{original}" if original else None,
+            'text': f"/download/text/{result['document']}"
+        }
+    found.update({'query': query, 'page': page, 'perPage': per_page})
+    return jsonify(found)
+
+def reindex_search():
+    """Index every extracted text file in the uploads folder again, e.g. after enabling search"""
+    # Text files are named after the stored original, which gives back the file type
+    originals = {}
+    for entry in os.scandir(app.config['UPLOAD_FOLDER']):
+        if entry.name.startswith('original_'):
+            filename = entry.name[len('original_'):]
+            file_ext = os.path.splitext(filename)[1].lower()[1:]
+            originals[f"{os.path.splitext(filename)[0]}_extracted.txt"] = (filename, get_file_type(file_ext))
+    documents, pages = search_index.reindex_directory(app.config['UPLOAD_FOLDER'], originals=originals)
+    search_index.optimize()
+    return {'documents': documents, 'pages': pages}
+
+@app.route('/search/reindex', methods=['POST'])
+def search_reindex():
+    """Rebuild the index entries of all text files still in the uploads folder"""
+    if search_index is None:
+        return jsonify({'error': 'Search is disabled'}), 404
+    result = reindex_search()
+    result['success'] = True
+    return jsonify(result)
+
+@app.route('/search/stats')
+def search_stats():
+    if search_index is None:
+        return jsonify({'enabled': False})
+    stats = search_index.stats()
+    stats['enabled'] = True
+    return jsonify(stats)
+
+@app.route('/artifacts/stats')
+def artifacts_stats():
+    """Files and bytes kept for download, and how many expired or were evicted"""
+    return jsonify(artifact_store.stats())
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Counters, stage latency histograms and queue depths in the Prometheus text format"""
+    if not metrics.enabled:
+        return jsonify({'error': 'Metrics are disabled'}), 404
+    return flask.Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
+@app.route('/ocr/stats')
+def ocr_stats():
+    """Pages, Tesseract passes and time per stage for each OCR strategy used so far"""
+    return jsonify(ocr_engine.stats())
 
 @app.route('/cleanup', methods=['POST'])
 def manual_cleanup():
     """Endpoint to manually trigger cleanup"""
-    cleanup_old_files()
-    return jsonify({'success': True, 'message': 'Cleanup completed'})
+    result = sweep_storage()
+    result.update({'success': True, 'message': 'Cleanup completed'})
+    return jsonify(result)
+
+def warm_up():
+    """Start the OCR worker processes ahead of the first request"""
+    ocr_engine.warm()
 
 if __name__ == '__main__':
-    # Clean up old files on startup
-    cleanup_old_files()
-    app.run(debug=True)
\ No newline at end of file
+    # Development server; use `gunicorn -c gunicorn.conf.py app:app` in production
+    check_tesseract()
+    # Release the work of an earlier run, index its leftovers, clean up old files and keep expiring them
+    recover_interrupted_work()
+    adopt_untracked_files()
+    sweep_storage()
+    start_sweeper()
+    app.run(debug=os.environ.get('FLASK_DEBUG', '1') == '1')
\ No newline at end of file
@@ -0,0 +1,346 @@
+# artifact_store.py
+import os
+import time
+import shutil
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS artifacts (
+    name TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL,
+    expires REAL NOT NULL,
+    pinned INTEGER NOT NULL DEFAULT 0  -- how many holders have it pinned
+);
+CREATE INDEX IF NOT EXISTS artifacts_expires ON artifacts (expires);
+CREATE INDEX IF NOT EXISTS artifacts_lru ON artifacts (accessed) WHERE pinned = 0;
+
+-- Running totals kept by triggers, so quota checks don't scan the table
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    files INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO usage (id, files, bytes) VALUES (0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS artifacts_insert AFTER INSERT ON artifacts BEGIN
+    UPDATE usage SET files = files + 1, bytes = bytes + new.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS artifacts_delete AFTER DELETE ON artifacts BEGIN
+    UPDATE usage SET files = files - 1, bytes = bytes - old.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS artifacts_resize AFTER UPDATE OF size ON artifacts BEGIN
+    UPDATE usage SET bytes = bytes + new.size - old.size WHERE id = 0;
+END;
+
+-- One row per holder of a pin, with the pid of the process that took it; counted into artifacts.pinned
+CREATE TABLE IF NOT EXISTS pins (
+    name TEXT NOT NULL,
+    holder TEXT NOT NULL,
+    pid INTEGER NOT NULL,
+    PRIMARY KEY (name, holder)
+);
+CREATE INDEX IF NOT EXISTS pins_pid ON pins (pid);
+CREATE TRIGGER IF NOT EXISTS pins_insert AFTER INSERT ON pins BEGIN
+    UPDATE artifacts SET pinned = pinned + 1 WHERE name = new.name;
+END;
+CREATE TRIGGER IF NOT EXISTS pins_delete AFTER DELETE ON pins BEGIN
+    UPDATE artifacts SET pinned = pinned - 1 WHERE name = old.name AND pinned > 0;
+END;
+CREATE TRIGGER IF NOT EXISTS artifacts_unpin AFTER DELETE ON artifacts BEGIN
+    DELETE FROM pins WHERE name = old.name;
+END;
+"""
+
+
+def _file_size(path):
+    try:
+        return os.path.getsize(path)
+    except FileNotFoundError:
+        # Temporary files of a writer that renamed them while the directory was walked
+        return 0
+
+
+def _path_size(path):
+    if os.path.isdir(path):
+        return sum(
+            _file_size(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files
+        )
+    return os.path.getsize(path)
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def _remove_path(path):
+    try:
+        if os.path.isdir(path) and not os.path.islink(path):
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        print(f"Warning: Could not remove artifact {path}: {e}")
+
+
+class ArtifactStore:
+    """Files kept for download, indexed by name in SQLite with their size and expiry.
+
+    Every stored upload, extracted text and batch archive is recorded when it is
+    written, so downloads are an index lookup and expiry never lists the
+    directory: `sweep` reads only the expired rows (and, over `max_bytes`, the
+    least recently used ones) through indexes. Pinned artifacts, such as uploads
+    waiting to be extracted, are neither evicted nor expired until every holder
+    has unpinned them, or the processes that pinned them are gone.
+    Directories can be artifacts too, and so can paths outside `directory`
+    (such as previews), which then count against the same quota.
+    The index is shared by every process using the same directory.
+    """
+
+    def __init__(self, directory, index_path=None, ttl=3600, max_bytes=None, sweep_batch=500):
+        self.directory = os.path.abspath(directory)
+        self.index_path = index_path or os.path.join(self.directory, 'artifacts.sqlite3')
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.sweep_batch = sweep_batch
+        self._local = threading.local()
+        self._counters = {'expired': 0, 'evicted': 0}
+        self._counter_lock = threading.Lock()
+        self._sweeper = None
+        self._stop = threading.Event()
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        # One connection per thread, and a new one after a fork (gunicorn preloads the app)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _relative(self, path):
+        # Paths outside the store's directory are kept absolute
+        path = os.path.abspath(path)
+        relative = os.path.relpath(path, self.directory)
+        return path if relative.startswith(os.pardir) else relative
+
+    def add(self, name, path, ttl=None, pin=None):
+        """Record the file or directory at `path` under `name`, expiring in `ttl` seconds.
+
+        Adding an existing name updates its path, size and expiry. With `pin`, the
+        artifact is also pinned for that holder until `unpin(name, pin)`, or until
+        this process exits; pinning again for the same holder doesn't stack, and
+        other holders' pins are left alone. Returns the size.
+        """
+        size = _path_size(path)
+        now = time.time()
+        expires = now + (self.ttl if ttl is None else ttl)
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                "INSERT INTO artifacts (name, path, size, accessed, expires) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT (name) DO UPDATE SET path = excluded.path, size = excluded.size, "
+                "accessed = excluded.accessed, expires = excluded.expires",
+                (name, self._relative(path), size, now, expires)
+            )
+            if pin is not None:
+                # A holder pinning again from another process (e.g. the next chunk of an upload) takes over the pin
+                conn.execute(
+                    "INSERT INTO pins (name, holder, pid) VALUES (?, ?, ?) "
+                    "ON CONFLICT (name, holder) DO UPDATE SET pid = excluded.pid",
+                    (name, pin, os.getpid())
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        if self.max_bytes is not None and self.usage()['bytes'] > self.max_bytes:
+            self._evict(keep=name)
+        return size
+
+    def unpin(self, name, holder):
+        """Drop `holder`'s pin on an artifact; it can expire and be evicted once no pins are left"""
+        self._connect().execute("DELETE FROM pins WHERE name = ? AND holder = ?", (name, holder))
+
+    def grow(self, name, size):
+        """Add `size` bytes (negative when files shrank) written into an artifact since it was added"""
+        updated = self._connect().execute(
+            "UPDATE artifacts SET size = max(0, size + ?) WHERE name = ?", (size, name)
+        ).rowcount
+        if updated and size > 0 and self.max_bytes is not None and self.usage()['bytes'] > self.max_bytes:
+            self._evict(keep=name)
+
+    def get(self, name):
+        """Path of an artifact that hasn't expired, or None. Counts as a use for LRU eviction."""
+        conn = self._connect()
+        now = time.time()
+        row = conn.execute("SELECT path, expires, pinned FROM artifacts WHERE name = ?", (name,)).fetchone()
+        if row is None or (row[1] <= now and not row[2]):
+            return None
+        path = os.path.join(self.directory, row[0])
+        if not os.path.exists(path):
+            # Removed behind the index's back
+            self.remove(name)
+            return None
+        conn.execute("UPDATE artifacts SET accessed = ? WHERE name = ?", (now, name))
+        return path
+
+    def remove(self, name):
+        """Forget an artifact and delete its file"""
+        conn = self._connect()
+        row = conn.execute("SELECT path FROM artifacts WHERE name = ?", (name,)).fetchone()
+        conn.execute("DELETE FROM artifacts WHERE name = ?", (name,))
+        if row is not None:
+            _remove_path(os.path.join(self.directory, row[0]))
+
+    def _take(self, query, params, over_quota=False):
+        """Delete up to `sweep_batch` rows selected by `query` and return their paths.
+
+        With `over_quota` only as many rows are taken as it takes to get back under `max_bytes`.
+        """
+        conn = self._connect()
+        # IMMEDIATE takes the write lock up front, so two sweeping processes never pick the same rows
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            rows = conn.execute(query, params + (self.sweep_batch,)).fetchall()
+            if over_quota:
+                excess = conn.execute("SELECT bytes FROM usage WHERE id = 0").fetchone()[0] - self.max_bytes
+                taken = []
+                for row in rows:
+                    if excess <= 0:
+                        break
+                    taken.append(row)
+                    excess -= row[2]
+                rows = taken
+            conn.executemany("DELETE FROM artifacts WHERE name = ?", [(row[0],) for row in rows])
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return [os.path.join(self.directory, row[1]) for row in rows]
+
+    def _count(self, counter, amount):
+        with self._counter_lock:
+            self._counters[counter] += amount
+
+    def _evict(self, keep=None):
+        evicted = 0
+        while self.usage()['bytes'] > self.max_bytes:
+            paths = self._take(
+                "SELECT name, path, size FROM artifacts WHERE pinned = 0 AND name != ? ORDER BY accessed LIMIT ?", (keep or '',),
+                over_quota=True
+            )
+            if not paths:
+                break
+            for path in paths:
+                _remove_path(path)
+            evicted += len(paths)
+        self._count('evicted', evicted)
+        return evicted
+
+    def _unpin_orphans(self):
+        """Drop the pins of processes that have exited, so what only they pinned can expire"""
+        conn = self._connect()
+        for pid, in conn.execute("SELECT DISTINCT pid FROM pins").fetchall():
+            if not _process_alive(pid):
+                conn.execute("DELETE FROM pins WHERE pid = ?", (pid,))
+
+    def unpin_all(self):
+        """Unpin everything; for server startup, when no process is still using what an earlier run pinned"""
+        conn = self._connect()
+        conn.execute("DELETE FROM pins")
+        return conn.execute("UPDATE artifacts SET pinned = 0 WHERE pinned != 0").rowcount
+
+    def sweep(self, now=None):
+        """Delete expired artifacts, then the least recently used ones while over the quota.
+
+        Returns (expired, evicted) counts; the work done is proportional to them.
+        """
+        now = time.time() if now is None else now
+        self._unpin_orphans()
+        expired = 0
+        while True:
+            paths = self._take(
+                "SELECT name, path FROM artifacts WHERE expires <= ? AND pinned = 0 ORDER BY expires LIMIT ?", (now,)
+            )
+            for path in paths:
+                _remove_path(path)
+            expired += len(paths)
+            if len(paths) < self.sweep_batch:
+                break
+        self._count('expired', expired)
+        evicted = self._evict() if self.max_bytes is not None else 0
+        return expired, evicted
+
+    def adopt_untracked(self, directory=None, skip=(), prefix=None, ttl=None):
+        """Index entries of `directory` (the store's by default) that the index doesn't know about.
+
+        Meant to run once at startup, so files left by crashed processes or
+        older versions are expired like the rest, `ttl` (the store's by default)
+        after their mtime. They are named `prefix` and their file name, or
+        'untracked/' and their path. Names in `skip` are left alone. Returns
+        how many were adopted.
+        """
+        directory = os.path.abspath(directory or self.directory)
+        conn = self._connect()
+        known = {row[0] for row in conn.execute("SELECT path FROM artifacts")}
+        index_files = {os.path.abspath(self.index_path) + suffix for suffix in ('', '-wal', '-shm', '-journal')}
+        adopted = 0
+        for entry in os.scandir(directory):
+            relative = self._relative(entry.path)
+            if relative in known or entry.path in index_files or entry.name in skip:
+                continue
+            try:
+                remaining = entry.stat().st_mtime + (self.ttl if ttl is None else ttl) - time.time()
+                name = f"{prefix}{entry.name}" if prefix else f"untracked/{relative}"
+                self.add(name, entry.path, ttl=remaining)
+                adopted += 1
+            except OSError:
+                continue
+        return adopted
+
+    def usage(self):
+        files, total = self._connect().execute("SELECT files, bytes FROM usage WHERE id = 0").fetchone()
+        return {'files': files, 'bytes': total}
+
+    def stats(self):
+        stats = self.usage()
+        stats['max_bytes'] = self.max_bytes
+        stats['ttl'] = self.ttl
+        with self._counter_lock:
+            stats.update(self._counters)
+        return stats
+
+    def start_sweeper(self, interval=60):
+        """Sweep every `interval` seconds on a daemon thread (once per process)"""
+        if self._sweeper is not None and self._sweeper.is_alive():
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    self.sweep()
+                except Exception as e:
+                    print(f"Error during artifact sweep: {e}")
+
+        self._stop.clear()
+        self._sweeper = threading.Thread(target=run, name='artifact-sweeper', daemon=True)
+        self._sweeper.start()
+
+    def stop_sweeper(self):
+        self._stop.set()
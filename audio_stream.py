@@ -0,0 +1,141 @@
+# audio_stream.py
+import os
+import re
+import tempfile
+import threading
+import subprocess
+
+SAMPLE_RATE = 16000  # What the recognizers want; 32000 bytes per second of 16-bit mono
+SAMPLE_WIDTH = 2
+
+# Preview formats that can be cut from the source without re-encoding
+PREVIEW_COPY_TYPES = {
+    '.mp3': 'audio/mpeg',
+    '.wav': 'audio/wav'
+}
+
+
+class AudioDecodeError(RuntimeError):
+    """ffmpeg could not decode an audio track from the file (or it has none)"""
+    pass
+
+
+def build_decode_command(path, sample_rate=SAMPLE_RATE):
+    """ffmpeg command that decodes the first audio track to raw 16-bit mono PCM on stdout"""
+    return [
+        'ffmpeg', '-nostdin', '-v', 'error',
+        '-i', path,
+        '-map', '0:a:0',
+        '-vn',
+        '-ac', '1',
+        '-ar', str(sample_rate),
+        '-f', 's16le',
+        'pipe:1'
+    ]
+
+
+def _feed(process, source, errors):
+    """Write the blocks of `source` to ffmpeg's stdin, then close it"""
+    try:
+        for block in source:
+            process.stdin.write(block)
+    except BrokenPipeError:
+        # ffmpeg stopped reading (it failed or the caller closed the generator)
+        pass
+    except Exception as e:
+        errors.append(e)
+    finally:
+        try:
+            process.stdin.close()
+        except BrokenPipeError:
+            pass
+
+
+def iter_pcm(path, sample_rate=SAMPLE_RATE, block_seconds=1.0, source=None):
+    """Yield the file's audio as blocks of 16-bit mono PCM, decoded by ffmpeg as they are read.
+
+    Only one block is held at a time, so memory does not depend on the length
+    of the recording. With `source`, an iterable of the file's bytes, ffmpeg
+    reads those from a pipe instead of opening `path`, so decoding can start
+    before the whole file exists; an error raised by `source` is re-raised
+    once ffmpeg has decoded what it got. Raises AudioDecodeError if ffmpeg
+    fails or there is no audio track. Closing the generator early stops ffmpeg.
+    """
+    block_bytes = int(sample_rate * block_seconds) * SAMPLE_WIDTH
+    feed_errors = []
+    # stderr goes to a file so a chatty ffmpeg can't fill a pipe nobody is reading
+    with tempfile.TemporaryFile() as stderr:
+        process = subprocess.Popen(
+            build_decode_command('pipe:0' if source is not None else path, sample_rate),
+            stdin=subprocess.PIPE if source is not None else None,
+            stdout=subprocess.PIPE, stderr=stderr, bufsize=0
+        )
+        feeder = None
+        if source is not None:
+            feeder = threading.Thread(target=_feed, args=(process, source, feed_errors), daemon=True)
+            feeder.start()
+        try:
+            while True:
+                block = process.stdout.read(block_bytes)
+                if not block:
+                    break
+                yield block
+            returncode = process.wait()
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+
+        # A clean exit means ffmpeg read to the end; otherwise the feeder may still be waiting
+        # on a source that has nothing more to give, and it stops at its next write
+        if feeder is not None and returncode == 0:
+            feeder.join()
+        if feed_errors:
+            raise feed_errors[0]
+        if returncode != 0:
+            stderr.seek(0)
+            message = stderr.read().decode(errors='replace').strip()
+            raise AudioDecodeError(message[-500:] or f"ffmpeg exited with status {returncode}")
+
+
+def cut_preview(path, out_dir, seconds=30):
+    """Write the first `seconds` of the audio for playback and return (path, mimetype).
+
+    MP3 and WAV sources are cut with a stream copy, without decoding; anything
+    else, or a copy that fails, is encoded to MP3.
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext in PREVIEW_COPY_TYPES:
+        preview_path = os.path.join(out_dir, f"preview{ext}")
+        command = ['ffmpeg', '-y', '-nostdin', '-v', 'error', '-t', str(seconds), '-i', path,
+                   '-map', '0:a:0', '-c:a', 'copy', preview_path]
+        try:
+            subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            return preview_path, PREVIEW_COPY_TYPES[ext]
+        except subprocess.CalledProcessError as e:
+            print(f"Warning: Could not copy the audio preview, re-encoding it: {e.stderr.decode(errors='replace')[-200:]}")
+
+    preview_path = os.path.join(out_dir, "preview.mp3")
+    command = ['ffmpeg', '-y', '-nostdin', '-v', 'error', '-t', str(seconds), '-i', path,
+               '-map', '0:a:0', '-c:a', 'libmp3lame', '-q:a', '4', preview_path]
+    subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+    return preview_path, 'audio/mpeg'
+
+
+DURATION_PATTERN = re.compile(r'Duration: (\d+):(\d+):(\d+(?:\.\d+)?)')
+
+
+def probe_duration(path):
+    """Duration of a media file in seconds from its container header, or None if unknown"""
+    # `ffmpeg -i` without an output reads only the header, prints it and exits with an error
+    command = ['ffmpeg', '-nostdin', '-hide_banner', '-i', path]
+    try:
+        stderr = subprocess.run(command, capture_output=True, text=True, errors='replace', timeout=10).stderr
+    except (OSError, subprocess.SubprocessError):
+        return None
+    match = DURATION_PATTERN.search(stderr)
+    if match is None:
+        return None
+    hours, minutes, seconds = match.groups()
+    return int(hours) * 3600 + int(minutes) * 60 + float(seconds)
@@ -0,0 +1,185 @@
+# batch.py
+import os
+import time
+import uuid
+import tarfile
+import sqlite3
+import zipfile
+import threading
+
+ARCHIVE_SUFFIXES = ('.zip', '.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+
+
+def is_archive(filename):
+    return filename.lower().endswith(ARCHIVE_SUFFIXES)
+
+
+def iter_archive_members(path):
+    """Yield (member name, readable file object) for each regular file in a zip or tar archive.
+
+    Members are read one at a time, so nothing is extracted ahead of the caller.
+    Tar archives are read as a stream in a single pass; zip archives through their
+    central directory. A member's file object is only valid until the next one is
+    requested.
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                with archive.open(info) as member:
+                    yield info.filename, member
+        return
+
+    # 'r|*' reads the tar sequentially and detects compression itself
+    with tarfile.open(path, mode='r|*') as archive:
+        for info in archive:
+            # Skip directories, links and devices; only regular files are extracted
+            if not info.isfile():
+                continue
+            member = archive.extractfile(info)
+            if member is not None:
+                yield info.name, member
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS batches (
+    id TEXT PRIMARY KEY,
+    created REAL NOT NULL,
+    complete INTEGER NOT NULL DEFAULT 0,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS batches_created ON batches (created);
+
+-- Files of a batch in the order they were added: the job extracting each, or why there is none
+CREATE TABLE IF NOT EXISTS batch_items (
+    batch_id TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    filename TEXT NOT NULL,
+    job_id TEXT,
+    error TEXT,
+    PRIMARY KEY (batch_id, number)
+);
+"""
+
+
+class Batch:
+    """Files of one batch request and the jobs extracting them"""
+
+    def __init__(self, manager, batch_id, created):
+        self.manager = manager
+        self.id = batch_id
+        self.created = created
+
+    def add(self, item):
+        """Record {'filename', 'job'} for a queued file, or {'filename', 'error'} for a rejected one"""
+        job = item.get('job')
+        self.manager._connect().execute(
+            "INSERT INTO batch_items (batch_id, number, filename, job_id, error) "
+            "SELECT ?, count(*), ?, ?, ? FROM batch_items WHERE batch_id = ?",
+            (self.id, item['filename'], job.id if job is not None else None, item.get('error'), self.id)
+        )
+
+    def finish(self, error=None):
+        self.manager._connect().execute(
+            "UPDATE batches SET complete = 1, error = ? WHERE id = ?", (error, self.id)
+        )
+
+    def _items(self):
+        return self.manager._connect().execute(
+            "SELECT filename, job_id, error FROM batch_items WHERE batch_id = ? ORDER BY number", (self.id,)
+        ).fetchall()
+
+    def jobs(self):
+        jobs = [self.manager.jobs.get(job_id) for _, job_id, _ in self._items() if job_id is not None]
+        return [job for job in jobs if job is not None]
+
+    def to_dict(self, include_pages=False):
+        # The state of the batch is read before its files, so `complete` never
+        # claims files that aren't listed yet
+        complete, error = self.manager._connect().execute(
+            "SELECT complete, error FROM batches WHERE id = ?", (self.id,)
+        ).fetchone()
+
+        files = []
+        for filename, job_id, item_error in self._items():
+            job = self.manager.jobs.get(job_id) if job_id is not None else None
+            if job is None:
+                files.append({
+                    'filename': filename,
+                    'status': 'error',
+                    'error': item_error or 'Job expired'
+                })
+                continue
+            data = job.to_dict(include_pages=include_pages and job.done)
+            data['jobId'] = data.pop('id')
+            data['statusUrl'] = f"/jobs/{job.id}"
+            files.append(data)
+
+        counts = {}
+        for data in files:
+            counts[data['status']] = counts.get(data['status'], 0) + 1
+
+        manifest = {
+            'batchId': self.id,
+            'created': self.created,
+            'complete': bool(complete),
+            'done': bool(complete) and all(data['status'] in ('done', 'error') for data in files),
+            'counts': counts,
+            'files': files
+        }
+        if error is not None:
+            manifest['error'] = error
+        return manifest
+
+
+class BatchManager:
+    """Batches by id, forgotten `ttl` seconds after they were created.
+
+    Kept in SQLite at `index_path` next to the jobs of `jobs` (a JobManager), so
+    any process can report on a batch while the one that accepted it queues its
+    files.
+    """
+
+    def __init__(self, index_path, jobs, ttl=3600):
+        self.index_path = index_path
+        self.jobs = jobs
+        self.ttl = ttl
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        # One connection per thread, and a new one after a fork (gunicorn preloads the app)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def create(self):
+        batch = Batch(self, uuid.uuid4().hex, time.time())
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            cutoff = batch.created - self.ttl
+            conn.execute("DELETE FROM batch_items WHERE batch_id IN (SELECT id FROM batches WHERE created < ?)", (cutoff,))
+            conn.execute("DELETE FROM batches WHERE created < ?", (cutoff,))
+            conn.execute("INSERT INTO batches (id, created) VALUES (?, ?)", (batch.id, batch.created))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return batch
+
+    def get(self, batch_id):
+        row = self._connect().execute("SELECT created FROM batches WHERE id = ?", (batch_id,)).fetchone()
+        return Batch(self, batch_id, row[0]) if row else None
+
+
+def member_filename(name):
+    """Base name of an archive member, without any directories it was stored under"""
+    return os.path.basename(name.replace('\\', '/'))
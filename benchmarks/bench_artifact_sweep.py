@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+"""Cost of expiring downloads as the uploads folder grows.
+
+Fills a scratch folder with N small files, of which a fixed number are expired,
+then times the old approach (list and stat every entry) against
+ArtifactStore.sweep, which only reads the expired rows from its index.
+
+    python benchmarks/bench_artifact_sweep.py --files 1000 10000 50000 --expired 100
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from artifact_store import ArtifactStore
+
+
+def fill(directory, store, count, expired):
+    now = time.time()
+    for i in range(count):
+        path = os.path.join(directory, f"original_{i:07d}.txt")
+        with open(path, 'w') as f:
+            f.write("x")
+        old = i < expired
+        if old:
+            os.utime(path, (now - 7200, now - 7200))
+        if store is not None:
+            store.add(f"original/{i}", path, ttl=-1 if old else 3600)
+
+
+def listdir_sweep(directory, max_age=3600):
+    """What cleanup_old_files used to do"""
+    cutoff = time.time() - max_age
+    removed = 0
+    for f in os.listdir(directory):
+        path = os.path.join(directory, f)
+        if os.path.isfile(path) and os.stat(path).st_mtime < cutoff:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--files', type=int, nargs='+', default=[1000, 10000, 50000])
+    parser.add_argument('--expired', type=int, default=100)
+    args = parser.parse_args()
+
+    print(f"{'files':>8}{'expired':>9}{'listdir ms':>12}{'index ms':>10}")
+    for count in args.files:
+        scratch = tempfile.mkdtemp(prefix='bench_sweep_')
+        try:
+            plain = os.path.join(scratch, 'plain')
+            indexed = os.path.join(scratch, 'indexed')
+            os.makedirs(plain)
+            fill(plain, None, count, args.expired)
+            store = ArtifactStore(indexed, index_path=os.path.join(scratch, 'index.sqlite3'))
+            fill(indexed, store, count, args.expired)
+
+            start = time.perf_counter()
+            listdir_sweep(plain)
+            listdir_seconds = time.perf_counter() - start
+
+            start = time.perf_counter()
+            expired, _ = store.sweep()
+            index_seconds = time.perf_counter() - start
+            assert expired == args.expired, expired
+
+            print(f"{count:>8}{args.expired:>9}{listdir_seconds * 1000:>12.1f}{index_seconds * 1000:>10.1f}")
+        finally:
+            shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
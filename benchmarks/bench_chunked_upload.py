@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+"""Time from an upload's last byte to its extracted text, for chunked audio uploads.
+
+Sends a WAV recording to /uploads in chunks paced to `--mbps`, then completes
+it, with early transcription on and off. The stub recognizer stands in for a
+real one at `--stub-delay` seconds per second of audio. Also reports what
+hashing the file on completion would have cost, which the incremental hash
+avoids.
+
+    python benchmarks/bench_chunked_upload.py --seconds 600 --mbps 4
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--seconds', type=int, default=600)
+    parser.add_argument('--mbps', type=float, default=4, help="Upload bandwidth in megabytes per second")
+    parser.add_argument('--chunk-mb', type=float, default=1)
+    parser.add_argument('--stub-delay', type=float, default=0.02)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='bench_chunked_')
+    os.chdir(scratch)
+    os.environ.update(
+        SPEECH_BACKEND='stub',
+        SPEECH_STUB_DELAY=str(args.stub_delay),
+        RESULT_CACHE_ENABLED='0',
+        SEARCH_ENABLED='0',
+        METRICS_ENABLED='0',
+        OCR_WARM='0'
+    )
+    try:
+        path = os.path.join(scratch, 'recording.wav')
+        subprocess.run(
+            ['ffmpeg', '-y', '-v', 'error', '-f', 'lavfi', '-i', f"sine=frequency=300:duration={args.seconds}",
+             '-ar', '16000', '-ac', '1', path],
+            check=True
+        )
+        with open(path, 'rb') as f:
+            payload = f.read()
+
+        import app as extractor_app
+        from result_cache import hash_file
+        client = extractor_app.app.test_client()
+        chunk = int(args.chunk_mb * 1024 * 1024)
+
+        print(f"{len(payload) / 1e6:.1f} MB, {args.seconds}s of audio at {args.mbps} MB/s")
+        print(f"{'early':>6}{'upload s':>10}{'complete s':>12}")
+        for early in (True, False):
+            extractor_app.app.config['CHUNKED_EARLY_EXTRACTION'] = early
+            upload_id = client.post('/uploads', json={'filename': 'recording.wav', 'size': len(payload)}).json['uploadId']
+            start = time.perf_counter()
+            for offset in range(0, len(payload), chunk):
+                sent = time.perf_counter()
+                client.put(f"/uploads/{upload_id}?offset={offset}", data=payload[offset:offset + chunk])
+                # Pace the chunks to the bandwidth
+                time.sleep(max(0, chunk / (args.mbps * 1e6) - (time.perf_counter() - sent)))
+            uploaded = time.perf_counter() - start
+            start = time.perf_counter()
+            response = client.post(f"/uploads/{upload_id}/complete")
+            assert response.status_code == 200, response.json
+            print(f"{str(early):>6}{uploaded:>10.2f}{time.perf_counter() - start:>12.2f}")
+
+        start = time.perf_counter()
+        hash_file(path)
+        print(f"hashing on completion instead: {(time.perf_counter() - start) * 1000:.0f} ms")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
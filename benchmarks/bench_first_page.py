@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+"""Time to the first visible page as digital PDFs get longer.
+
+For each page count, measures how long a streamed /upload takes to send its
+first page and every page, then how long GET /document/<id>/page/<n> takes
+for a page in the middle (the document is already parsed) and for the page
+after it, which was prefetched in the meantime.
+
+    python benchmarks/bench_first_page.py --pages 20 500 2000
+"""
+import io
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from corpus import write_text_pdf, text_lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, nargs='+', default=[20, 500, 2000])
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='bench_first_page_')
+    os.chdir(scratch)
+    os.environ.update(SEARCH_ENABLED='0', METRICS_ENABLED='0', OCR_WARM='0')
+    try:
+        import app as extractor_app
+        client = extractor_app.app.test_client()
+
+        print(f"{'pages':>6}{'first ms':>10}{'all ms':>10}{'page ms':>10}{'next ms':>10}")
+        for count in args.pages:
+            path = os.path.join(scratch, f"digital_{count}.pdf")
+            write_text_pdf(path, [text_lines(count * 10000 + i, 40) for i in range(count)])
+            with open(path, 'rb') as f:
+                payload = f.read()
+
+            start = time.perf_counter()
+            response = client.post('/upload?stream=1', data={'file': (io.BytesIO(payload), os.path.basename(path))})
+            lines = iter(response.response)
+            header = next(lines)
+            next(lines)
+            first = time.perf_counter() - start
+            for _ in lines:
+                pass
+            total = time.perf_counter() - start
+
+            document_id = extractor_app.json.loads(header)['documentId']
+            middle = count // 2 + 1
+            start = time.perf_counter()
+            client.get(f"/document/{document_id}/page/{middle}")
+            page = time.perf_counter() - start
+            # Let the prefetch of the next page finish
+            time.sleep(0.5)
+            start = time.perf_counter()
+            client.get(f"/document/{document_id}/page/{middle + 1}")
+            following = time.perf_counter() - start
+
+            print(f"{count:>6}{first * 1000:>10.1f}{total * 1000:>10.1f}{page * 1000:>10.1f}{following * 1000:>10.1f}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
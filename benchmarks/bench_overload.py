@@ -0,0 +1,115 @@
+#!/usr/bin/env python
+"""Latency of /upload under a burst of concurrent video uploads, with and without admission control.
+
+Each mode runs in a fresh interpreter: `--clients` threads post the benchmark
+corpus's video (ffmpeg does the CPU work, speech is the stub) for `--seconds`.
+Admitted requests should keep a stable p95 while the excess gets fast 429s;
+without admission every request slows down together.
+
+    python benchmarks/bench_overload.py --clients 16 --seconds 30
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import subprocess
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))] if ordered else None
+
+
+def run_load(path, clients, seconds):
+    """Post `path` from `clients` threads until `seconds` pass; returns per-status latencies"""
+    import io
+    import app as extractor_app
+
+    with open(path, 'rb') as f:
+        payload = f.read()
+    filename = os.path.basename(path)
+    latencies = {}
+    lock = threading.Lock()
+    stop = time.monotonic() + seconds
+
+    def client():
+        test_client = extractor_app.app.test_client()
+        while time.monotonic() < stop:
+            start = time.perf_counter()
+            response = test_client.post('/upload', data={'file': (io.BytesIO(payload), filename)})
+            with lock:
+                latencies.setdefault(response.status_code, []).append(time.perf_counter() - start)
+            if response.status_code == 429:
+                # A well-behaved client backs off instead of hammering
+                time.sleep(min(float(response.headers.get('Retry-After', 1)), 2))
+
+    threads = [threading.Thread(target=client) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    return {
+        str(status): {
+            'count': len(values),
+            'p50_seconds': round(percentile(values, 0.5), 3),
+            'p95_seconds': round(percentile(values, 0.95), 3),
+            'max_seconds': round(max(values), 3)
+        }
+        for status, values in sorted(latencies.items())
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=30)
+    parser.add_argument('--corpus-dir', default=os.path.join(tempfile.gettempdir(), 'extractor_bench_corpus'))
+    parser.add_argument('--run', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sys.path.insert(0, BENCH_DIR)
+    from corpus import build_corpus
+
+    path = next(case['path'] for case in build_corpus(args.corpus_dir) if case['name'] == 'video_30s_720p')
+
+    if args.run:
+        print(json.dumps(run_load(path, args.clients, args.seconds)))
+        return
+
+    report = {'cpus': os.cpu_count(), 'clients': args.clients, 'seconds': args.seconds}
+    for mode, enabled in (('admission', '1'), ('no_admission', '0')):
+        work_dir = tempfile.mkdtemp(prefix='bench_overload_')
+        env = dict(
+            os.environ,
+            PYTHONPATH=REPO_DIR,
+            ADMISSION_ENABLED=enabled,
+            SPEECH_BACKEND='stub',
+            RESULT_CACHE_ENABLED='0',
+            METRICS_ENABLED='0',
+            SEARCH_ENABLED='0',
+            OCR_WARM='0'
+        )
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), '--run', mode, '--clients', str(args.clients),
+             '--seconds', str(args.seconds), '--corpus-dir', args.corpus_dir],
+            cwd=work_dir, env=env, capture_output=True, text=True
+        )
+        shutil.rmtree(work_dir, ignore_errors=True)
+        if output.returncode != 0:
+            report[mode] = {'failed': output.stderr.strip().splitlines()[-1:]}
+        else:
+            report[mode] = json.loads(output.stdout.strip().splitlines()[-1])
+        print(f"{mode}: done", file=sys.stderr)
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+#!/usr/bin/env python
+"""Indexing rate and query latency of the full-text search index.
+
+Fills a scratch index with synthetic documents (the benchmark corpus's
+vocabulary plus one rare word per document), then times a few query shapes:
+a common word, a two-word AND, a prefix, a rare word, and a filtered query.
+
+    python benchmarks/bench_search.py --pages 200000 --pages-per-doc 10
+"""
+import os
+import sys
+import time
+import random
+import shutil
+import argparse
+import tempfile
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(BENCH_DIR))
+sys.path.insert(0, BENCH_DIR)
+
+from search_index import SearchIndex
+from corpus import text_lines
+
+QUERIES = [
+    ('common word', 'invoice', {}),
+    ('two words', 'payment received', {}),
+    ('prefix', 'ship*', {}),
+    ('rare word', 'zq00042', {}),
+    ('filtered', 'invoice total', {'source': 'ocr', 'file_type': 'pdf'}),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--pages', type=int, default=200000)
+    parser.add_argument('--pages-per-doc', type=int, default=10)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='bench_search_')
+    try:
+        index = SearchIndex(os.path.join(scratch, 'index.sqlite3'))
+        rng = random.Random(0)
+        start = time.perf_counter()
+        documents = args.pages // args.pages_per_doc
+        for doc in range(documents):
+            pages = [{
+                'page': i + 1,
+                'source': rng.choice(['digital', 'ocr']),
+                'text': "\n".join(text_lines(doc * 1000 + i, 30)) + f" zq{doc:05d}"
+            } for i in range(args.pages_per_doc)]
+            index.add_document(f"doc_{doc}_extracted.txt", f"doc_{doc}.pdf", rng.choice(['pdf', 'image']), pages)
+        index.optimize()
+        seconds = time.perf_counter() - start
+        size = os.path.getsize(os.path.join(scratch, 'index.sqlite3'))
+        print(f"indexed {args.pages} pages in {seconds:.1f}s ({args.pages / seconds:.0f} pages/s), {size / 1e6:.0f} MB")
+
+        print(f"{'query':<14}{'p50 ms':>9}{'p95 ms':>9}{'results':>9}")
+        for label, query, filters in QUERIES:
+            latencies = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                found = index.search(query, limit=20, **filters)
+                latencies.append((time.perf_counter() - start) * 1000)
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"{label:<14}{latencies[len(latencies) // 2]:>9.1f}{p95:>9.1f}{len(found['results']):>9}")
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python
+"""Import time and memory of the app, and RSS per gunicorn worker.
+
+Imports app.py in fresh interpreters and reports wall time, peak RSS and
+whether the heavy media modules were loaded. When gunicorn is installed it
+then starts the production server with gunicorn.conf.py, waits until it
+answers, and reports startup time plus RSS and PSS (RSS with pages shared
+with the preloaded master divided among them) of the master, each web
+worker and the OCR processes they started.
+
+    python benchmarks/bench_startup.py --runs 5 --workers 2
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import socket
+import argparse
+import tempfile
+import subprocess
+import urllib.request
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEAVY_MODULES = ['moviepy', 'speech_recognition', 'pydub', 'pytesseract', 'numpy', 'PyPDF2']
+
+IMPORT_SCRIPT = f"""
+import sys, time, json, resource
+start = time.perf_counter()
+import app
+elapsed = time.perf_counter() - start
+print(json.dumps({{
+    'seconds': elapsed,
+    'max_rss_kb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    'loaded': [name for name in {HEAVY_MODULES!r} if name in sys.modules]
+}}))
+"""
+
+
+def memory_kb(pid):
+    """(VmRSS, Pss) of a process in kB; Pss is None without smaps_rollup"""
+    rss = pss = None
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                rss = int(line.split()[1])
+    try:
+        with open(f"/proc/{pid}/smaps_rollup") as f:
+            for line in f:
+                if line.startswith('Pss:'):
+                    pss = int(line.split()[1])
+    except OSError:
+        pass
+    return rss, pss
+
+
+def children(pid):
+    found = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                # The parent pid is the second field after the parenthesized command name
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            found.append(int(entry))
+    return found
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def bench_import(runs, env, work_dir):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, '-c', IMPORT_SCRIPT], cwd=work_dir, env=env,
+            capture_output=True, text=True, check=True
+        ).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        'seconds_min': min(s['seconds'] for s in samples),
+        'seconds_mean': sum(s['seconds'] for s in samples) / len(samples),
+        'max_rss_kb': max(s['max_rss_kb'] for s in samples),
+        'loaded_modules': samples[-1]['loaded']
+    }
+
+
+def bench_gunicorn(workers, env, work_dir, settle):
+    port = free_port()
+    env = dict(env, WEB_CONCURRENCY=str(workers), BIND=f"127.0.0.1:{port}")
+    start = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(REPO_DIR, 'gunicorn.conf.py'), 'app:app'],
+        cwd=work_dir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        while True:
+            if server.poll() is not None:
+                raise SystemExit("gunicorn exited during startup")
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{port}/", timeout=1).read()
+                break
+            except OSError:
+                time.sleep(0.05)
+        ready = time.perf_counter() - start
+
+        # Give the warmed OCR pools time to spawn before measuring them
+        time.sleep(settle)
+        rss, pss = memory_kb(server.pid)
+        report = {'ready_seconds': ready, 'master': {'rss_kb': rss, 'pss_kb': pss}, 'workers': []}
+        for worker_pid in children(server.pid):
+            rss, pss = memory_kb(worker_pid)
+            ocr = [memory_kb(pid) for pid in children(worker_pid)]
+            report['workers'].append({
+                'rss_kb': rss,
+                'pss_kb': pss,
+                'ocr_processes': len(ocr),
+                'ocr_rss_kb': sum(r for r, _ in ocr)
+            })
+        return report
+    finally:
+        server.terminate()
+        server.wait(timeout=30)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--settle', type=float, default=3, help="Seconds to wait before reading worker memory")
+    args = parser.parse_args()
+
+    # Run from a scratch directory so uploads/ and the caches land there
+    work_dir = tempfile.mkdtemp(prefix='bench_startup_')
+    env = dict(os.environ, PYTHONPATH=REPO_DIR, SPEECH_BACKEND='stub')
+    try:
+        report = {'import': bench_import(args.runs, env, work_dir)}
+        try:
+            import gunicorn  # noqa: F401
+            report['gunicorn'] = bench_gunicorn(args.workers, env, work_dir, args.settle)
+        except ImportError:
+            report['gunicorn'] = None
+        print(json.dumps(report, indent=2))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python
+"""Latency, throughput and peak memory of every extractor on a synthetic corpus.
+
+Builds the deterministic corpus from benchmarks/corpus.py, then for each case
+runs the extractor function and the /upload route (through Flask's test client)
+in a fresh interpreter, so peak RSS is per case. The speech backend is the stub
+and the result cache is off, so runs are offline and measure real extraction.
+Cases whose tools (tesseract, pdftoppm, ffmpeg) are missing are skipped.
+
+    python benchmarks/bench_suite.py --repeat 5 --output results.json
+    python benchmarks/bench_suite.py --compare before.json --output after.json
+"""
+import os
+import re
+import sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+
+EXTRACTORS = {
+    'pdf': 'extract_text_from_pdf',
+    'image': 'extract_text_from_image',
+    'audio': 'extract_text_from_audio',
+    'video': 'extract_text_from_video'
+}
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list"""
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, int(round(fraction * len(ordered) + 0.5)) - 1))
+    return ordered[index]
+
+
+def summarize(latencies, pages):
+    total = sum(latencies)
+    return {
+        'runs': len(latencies),
+        'p50_seconds': percentile(latencies, 0.5),
+        'p95_seconds': percentile(latencies, 0.95),
+        'mean_seconds': total / len(latencies),
+        'files_per_second': len(latencies) / total if total else None,
+        'pages_per_second': len(latencies) * pages / total if total else None
+    }
+
+
+def run_case(case, repeat, warmup):
+    """Run one case in this process (called in a fresh interpreter) and return its results"""
+    import io
+    import app as extractor_app
+
+    extract = getattr(extractor_app, EXTRACTORS[case['fileType']])
+    client = extractor_app.app.test_client()
+    with open(case['path'], 'rb') as f:
+        payload = f.read()
+    filename = os.path.basename(case['path'])
+
+    def call_extractor():
+        pages = list(extract(case['path']))
+        return sum(1 for page in pages if page['source'] == 'error')
+
+    def call_upload():
+        response = client.post('/upload', data={'file': (io.BytesIO(payload), filename)})
+        if response.status_code != 200:
+            return 1
+        return sum(1 for page in response.get_json()['pages'] if page['source'] == 'error')
+
+    results = {}
+    for mode, call in (('extractor', call_extractor), ('upload', call_upload)):
+        # Untimed runs first so process pool startup isn't part of the latency
+        for _ in range(warmup):
+            call()
+        latencies = []
+        errors = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            errors += call()
+            latencies.append(time.perf_counter() - start)
+        results[mode] = summarize(latencies, case['pages'])
+        results[mode]['error_pages'] = errors
+
+    # Shutting the OCR pool down reaps its processes, so their peak shows up in RUSAGE_CHILDREN
+    extractor_app.ocr_engine.shutdown()
+    results['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    results['children_peak_rss_kb'] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(old_report, new_report):
+    """Print the p50 latency of each case and mode next to an earlier report"""
+    old_cases = {case['name']: case for case in old_report['cases']}
+    print(f"{'case':<22}{'mode':<11}{'old p50':>10}{'new p50':>10}{'ratio':>8}")
+    for case in new_report['cases']:
+        old = old_cases.get(case['name'])
+        if not old or 'extractor' not in case or 'extractor' not in old:
+            continue
+        for mode in ('extractor', 'upload'):
+            before, after = old[mode]['p50_seconds'], case[mode]['p50_seconds']
+            ratio = after / before if before else float('nan')
+            print(f"{case['name']:<22}{mode:<11}{before:>10.3f}{after:>10.3f}{ratio:>8.2f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--warmup', type=int, default=1)
+    parser.add_argument('--cases', default='.', help="Regular expression selecting case names")
+    parser.add_argument('--corpus-dir', default=os.path.join(tempfile.gettempdir(), 'extractor_bench_corpus'))
+    parser.add_argument('--output', help="Write the JSON report here as well as to stdout")
+    parser.add_argument('--compare', help="Earlier JSON report to compare p50 latencies against")
+    parser.add_argument('--run-case', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    sys.path.insert(0, BENCH_DIR)
+    from corpus import build_corpus
+
+    cases = build_corpus(args.corpus_dir)
+
+    if args.run_case:
+        case = next(case for case in cases if case['name'] == args.run_case)
+        print(json.dumps(run_case(case, args.repeat, args.warmup)))
+        return
+
+    # Each case runs in a scratch directory so uploads/, previews/ and cache/ land there
+    work_dir = tempfile.mkdtemp(prefix='bench_suite_')
+    env = dict(
+        os.environ,
+        PYTHONPATH=REPO_DIR,
+        SPEECH_BACKEND='stub',
+        RESULT_CACHE_ENABLED='0',
+        METRICS_ENABLED='0',
+        OCR_WARM='0'
+    )
+    report = {
+        'commit': git_commit(),
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+        'python': platform.python_version(),
+        'cpus': os.cpu_count(),
+        'repeat': args.repeat,
+        'cases': []
+    }
+    try:
+        for case in cases:
+            if not re.search(args.cases, case['name']):
+                continue
+            entry = {key: case[key] for key in ('name', 'fileType', 'pages', 'bytes')}
+            missing = [tool for tool in case['requires'] if shutil.which(tool) is None]
+            if missing:
+                entry['skipped'] = f"missing {', '.join(missing)}"
+                report['cases'].append(entry)
+                print(f"{case['name']}: skipped ({entry['skipped']})", file=sys.stderr)
+                continue
+
+            case_dir = os.path.join(work_dir, case['name'])
+            os.makedirs(case_dir)
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--run-case', case['name'],
+                 '--repeat', str(args.repeat), '--warmup', str(args.warmup), '--corpus-dir', args.corpus_dir],
+                cwd=case_dir, env=env, capture_output=True, text=True
+            )
+            if output.returncode != 0:
+                entry['failed'] = output.stderr.strip().splitlines()[-1:] or ['unknown error']
+            else:
+                entry.update(json.loads(output.stdout.strip().splitlines()[-1]))
+            report['cases'].append(entry)
+            print(f"{case['name']}: done", file=sys.stderr)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + "\n")
+    if args.compare:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+
+if __name__ == '__main__':
+    main()
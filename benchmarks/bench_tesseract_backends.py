@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""Per-call overhead of the Tesseract backends.
+
+OCRs the same small synthetic images repeatedly with every available backend
+(pytesseract starts a tesseract process and loads the model per call, tesserocr
+keeps one engine loaded) and reports milliseconds per call. A blank image shows
+the fixed cost of a call, since Tesseract has nothing to recognize on it.
+
+    python benchmarks/bench_tesseract_backends.py --calls 20
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+from PIL import Image, ImageDraw, ImageFont
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+from tesseract_backends import PytesseractBackend, TesserocrBackend  # noqa: E402
+
+
+def make_images():
+    font = ImageFont.load_default(size=32)
+    line = Image.new('L', (900, 60), 255)
+    ImageDraw.Draw(line).text((10, 10), "Invoice total amount due 1234.56", fill=0, font=font)
+
+    paragraph = Image.new('L', (900, 600), 255)
+    draw = ImageDraw.Draw(paragraph)
+    for i in range(10):
+        draw.text((10, 10 + i * 55), f"Line {i} of the statement balance and reference", fill=0, font=font)
+
+    return {'blank': Image.new('L', (900, 60), 255), 'line': line, 'paragraph': paragraph}
+
+
+def time_calls(function, calls):
+    # One untimed call so one-off setup such as loading the model is not counted
+    function()
+    start = time.perf_counter()
+    for _ in range(calls):
+        function()
+    return (time.perf_counter() - start) / calls * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--calls', type=int, default=20)
+    parser.add_argument('--lang', default='eng')
+    parser.add_argument('--psm', type=int, default=6)
+    args = parser.parse_args()
+
+    backends = [PytesseractBackend()]
+    try:
+        tesserocr_backend = TesserocrBackend(lang=args.lang)
+        tesserocr_backend.load()
+        backends.append(tesserocr_backend)
+    except Exception as e:
+        print(f"tesserocr unavailable, only measuring pytesseract: {e}", file=sys.stderr)
+
+    images = make_images()
+    report = {}
+    for backend in backends:
+        report[backend.name] = {
+            name: round(time_calls(lambda: backend.image_to_string(image, args.lang, args.psm), args.calls), 2)
+            for name, image in images.items()
+        }
+
+    if len(report) > 1:
+        report['saved_ms_per_call'] = {
+            name: round(report['pytesseract'][name] - report['tesserocr'][name], 2) for name in images
+        }
+    print(json.dumps({'ms_per_call': report, 'calls': args.calls}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+#!/usr/bin/env python
+"""Bytes written and latency per /upload request.
+
+Posts a synthetic WAV through Flask's test client with the stub speech backend
+and the result cache disabled, so only the storage path and the extractor are
+measured. Bytes written are the wchar of this process (it includes ffmpeg and
+other children once they have exited).
+
+    python benchmarks/bench_upload_io.py --size-mb 64 --requests 5
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def io_counters():
+    counters = {}
+    with open('/proc/self/io') as f:
+        for line in f:
+            key, value = line.split(':')
+            counters[key] = int(value)
+    return counters
+
+
+def make_wav(path, size_mb):
+    # 16 kHz mono 16-bit PCM is 32000 bytes per second
+    seconds = max(1, int(size_mb * 1024 * 1024 / 32000))
+    subprocess.run([
+        'ffmpeg', '-y', '-v', 'error',
+        '-f', 'lavfi', '-i', f"sine=frequency=440:sample_rate=16000:duration={seconds}",
+        '-ac', '1', '-c:a', 'pcm_s16le',
+        path
+    ], check=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--size-mb', type=float, default=32, help="Size of the synthetic WAV upload")
+    parser.add_argument('--requests', type=int, default=5)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_upload_')
+    try:
+        wav_path = os.path.join(work_dir, 'input.wav')
+        make_wav(wav_path, args.size_mb)
+        with open(wav_path, 'rb') as f:
+            payload = f.read()
+
+        # Run the app inside the scratch directory so uploads/ and previews/ land there
+        os.environ.update({'SPEECH_BACKEND': 'stub', 'RESULT_CACHE_ENABLED': '0'})
+        os.chdir(work_dir)
+        sys.path.insert(0, REPO_DIR)
+        import io
+        import app as extractor_app
+
+        client = extractor_app.app.test_client()
+        samples = []
+        for _ in range(args.requests):
+            before = io_counters()
+            start = time.perf_counter()
+            response = client.post('/upload', data={'file': (io.BytesIO(payload), 'input.wav')})
+            elapsed = time.perf_counter() - start
+            after = io_counters()
+            if response.status_code != 200:
+                raise SystemExit(f"Upload failed: {response.status_code} {response.get_data(as_text=True)[:200]}")
+            samples.append({
+                'seconds': elapsed,
+                'bytes_written': after['wchar'] - before['wchar'],
+                'disk_bytes_written': after['write_bytes'] - before['write_bytes']
+            })
+
+        print(json.dumps({
+            'upload_bytes': len(payload),
+            'requests': len(samples),
+            'seconds_mean': sum(s['seconds'] for s in samples) / len(samples),
+            'seconds_min': min(s['seconds'] for s in samples),
+            'bytes_written_per_request': sum(s['bytes_written'] for s in samples) / len(samples),
+            'write_amplification': sum(s['bytes_written'] for s in samples) / len(samples) / len(payload)
+        }, indent=2))
+    finally:
+        os.chdir(REPO_DIR)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
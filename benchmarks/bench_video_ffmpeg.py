@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+"""Compare the old seven-invocation video path against the one extract_text_from_video runs.
+
+Generates a synthetic video with ffmpeg, then runs both paths and reports wall
+time and bytes read (rchar of this process, which includes reaped children).
+The current path is one ffmpeg run for the preview and frames, and the audio
+decoded as a PCM stream, which is drained here instead of being transcribed.
+
+    python benchmarks/bench_video_ffmpeg.py --duration 300
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from video_pipeline import extract_visuals
+from audio_stream import iter_pcm
+
+
+def read_bytes():
+    """Bytes read so far by this process and its finished children"""
+    with open('/proc/self/io') as f:
+        for line in f:
+            if line.startswith('rchar:'):
+                return int(line.split()[1])
+    return 0
+
+
+def make_video(path, duration, size):
+    subprocess.run([
+        'ffmpeg', '-y', '-v', 'error',
+        '-f', 'lavfi', '-i', f"testsrc=size={size}:rate=30",
+        '-f', 'lavfi', '-i', 'sine=frequency=440:sample_rate=44100',
+        '-t', str(duration),
+        '-c:v', 'libx264', '-preset', 'ultrafast',
+        '-c:a', 'aac', '-shortest',
+        path
+    ], check=True)
+
+
+def run_legacy(video_path, out_dir):
+    """The commands extract_text_from_video used to run, in the same order"""
+    quiet = {'check': True, 'stdout': subprocess.PIPE, 'stderr': subprocess.PIPE}
+    video_copy_path = os.path.join(out_dir, f"video_copy{os.path.splitext(video_path)[1]}")
+    shutil.copy2(video_path, video_copy_path)
+    subprocess.run(['ffmpeg', '-i', video_copy_path, '-q:a', '0', '-map', 'a', '-vn',
+                    os.path.join(out_dir, "extracted_audio.wav")], **quiet)
+    subprocess.run(['ffmpeg', '-i', video_copy_path, '-t', '15', '-vf', 'scale=480:-1',
+                    '-c:v', 'libx264', '-c:a', 'aac', '-strict', 'experimental', '-b:a', '128k',
+                    os.path.join(out_dir, "preview.mp4")], **quiet)
+    for i in range(5):
+        subprocess.run(['ffmpeg', '-i', video_copy_path, '-ss', str(i * 5), '-frames:v', '1', '-q:v', '2',
+                        os.path.join(out_dir, f"frame_{i}.jpg")], **quiet)
+
+
+def run_pipeline(video_path, out_dir):
+    extract_visuals(video_path, out_dir)
+    for _ in iter_pcm(video_path):
+        pass
+
+
+def measure(func, video_path, repeat):
+    timings = []
+    bytes_read = []
+    for _ in range(repeat):
+        out_dir = tempfile.mkdtemp(prefix='bench_video_')
+        try:
+            start_bytes = read_bytes()
+            start = time.perf_counter()
+            func(video_path, out_dir)
+            timings.append(time.perf_counter() - start)
+            bytes_read.append(read_bytes() - start_bytes)
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+    return {
+        'seconds_min': min(timings),
+        'seconds_mean': sum(timings) / len(timings),
+        'bytes_read': min(bytes_read)
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--duration', type=int, default=120, help="Length of the synthetic video in seconds")
+    parser.add_argument('--size', default='1280x720', help="Frame size of the synthetic video")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--video', help="Benchmark an existing file instead of a synthetic one")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='bench_video_src_')
+    try:
+        video_path = args.video
+        if video_path is None:
+            video_path = os.path.join(work_dir, 'input.mp4')
+            make_video(video_path, args.duration, args.size)
+
+        results = {
+            'video': os.path.basename(video_path),
+            'video_bytes': os.path.getsize(video_path),
+            'legacy': measure(run_legacy, video_path, args.repeat),
+            'pipeline': measure(run_pipeline, video_path, args.repeat)
+        }
+        results['speedup'] = results['legacy']['seconds_min'] / results['pipeline']['seconds_min']
+        print(json.dumps(results, indent=2))
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,160 @@
+"""Deterministic synthetic corpus for the benchmarks.
+
+Every file is generated from fixed seeds, so the same corpus comes out on every
+machine with the same tools: digital PDFs with a real text layer, scanned
+(image-only) PDFs, page images at several resolutions, and WAV/MP4 files made
+with ffmpeg whose tones are interrupted by silences like speech is.
+
+    python benchmarks/corpus.py /tmp/corpus
+"""
+import os
+import sys
+import json
+import random
+import subprocess
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFont
+
+# Bump when the generated files change so stale corpora are rebuilt
+CORPUS_VERSION = 1
+
+WORDS = (
+    "invoice total amount due payment received account number reference date customer "
+    "address shipping order quantity price tax balance statement page summary period"
+).split()
+
+
+def text_lines(seed, count, words_per_line=9):
+    rng = random.Random(seed)
+    return [" ".join(rng.choice(WORDS) for _ in range(words_per_line)) for _ in range(count)]
+
+
+def _pdf_escape(text):
+    return text.replace('\\', '\\\\').replace('(', '\\(').replace(')', '\\)')
+
+
+def write_text_pdf(path, pages):
+    """Write a PDF with a Helvetica text layer; `pages` is a list of line lists"""
+    objects = {
+        1: b"<< /Type /Catalog /Pages 2 0 R >>",
+        3: b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    }
+    kids = []
+    for i, lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * i, 5 + 2 * i
+        body = " ".join(f"({_pdf_escape(line)}) Tj T*" for line in lines)
+        stream = f"BT /F1 11 Tf 15 TL 72 740 Td {body} ET".encode('latin-1')
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+        kids.append(b"%d 0 R" % page_id)
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (b" ".join(kids), len(pages))
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = len(out)
+        out += b"%d 0 obj\n%s\nendobj\n" % (object_id, objects[object_id])
+    xref = len(out)
+    count = max(objects) + 1
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % count
+    for object_id in range(1, count):
+        out += b"%010d 00000 n \n" % offsets[object_id]
+    out += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, xref)
+    with open(path, 'wb') as f:
+        f.write(out)
+
+
+def render_page(lines, width, height, seed, tilt=0.0, noise=12):
+    """A scanned-looking page: text scaled to the page size, slight tilt and grain"""
+    font_size = max(8, width // 70)
+    font = ImageFont.load_default(size=font_size)
+    page = Image.new('L', (width, height), 255)
+    draw = ImageDraw.Draw(page)
+    margin = width // 12
+    for i, line in enumerate(lines):
+        y = margin + int(i * font_size * 1.5)
+        if y > height - margin:
+            break
+        draw.text((margin, y), line, fill=0, font=font)
+    if tilt:
+        page = page.rotate(tilt, resample=Image.BICUBIC, fillcolor=255)
+    grain = np.random.default_rng(seed).normal(0, noise, (height, width))
+    pixels = np.clip(np.asarray(page, dtype=np.float64) * 0.9 + 20 + grain, 0, 255)
+    return Image.fromarray(pixels.astype(np.uint8)).convert('RGB')
+
+
+def write_scanned_pdf(path, page_count, seed, dpi=200):
+    size = (int(8.5 * dpi), int(11 * dpi))
+    pages = [
+        render_page(text_lines(seed + i, 40), *size, seed=seed + i, tilt=(i % 3 - 1) * 1.5)
+        for i in range(page_count)
+    ]
+    pages[0].save(path, save_all=True, append_images=pages[1:], resolution=dpi)
+
+
+def _ffmpeg(*args):
+    subprocess.run(['ffmpeg', '-y', '-v', 'error', *args], check=True)
+
+
+# A tone for 3 seconds out of every 4, so silence detection finds chunk boundaries
+SPEECHLIKE = "0.4*sin(2*PI*(300+100*mod(floor(t/4),4))*t)*lt(mod(t,4),3)"
+
+
+def write_wav(path, seconds):
+    _ffmpeg('-f', 'lavfi', '-i', f"aevalsrc='{SPEECHLIKE}':s=16000:d={seconds}", '-ac', '1', '-c:a', 'pcm_s16le', path)
+
+
+def write_mp4(path, seconds, size='1280x720'):
+    _ffmpeg(
+        '-f', 'lavfi', '-i', f"testsrc=size={size}:rate=25:duration={seconds}",
+        '-f', 'lavfi', '-i', f"aevalsrc='{SPEECHLIKE}':s=44100:d={seconds}",
+        '-c:v', 'mpeg4', '-q:v', '5', '-c:a', 'aac', '-shortest', path
+    )
+
+
+# name, file type, pages, tools needed to extract it, builder
+CASES = [
+    ('pdf_digital_1p', 'pdf', 1, [], lambda path: write_text_pdf(path, [text_lines(1, 40)])),
+    ('pdf_digital_20p', 'pdf', 20, [], lambda path: write_text_pdf(path, [text_lines(100 + i, 40) for i in range(20)])),
+    ('pdf_scanned_1p', 'pdf', 1, ['pdftoppm', 'tesseract'], lambda path: write_scanned_pdf(path, 1, seed=200)),
+    ('pdf_scanned_5p', 'pdf', 5, ['pdftoppm', 'tesseract'], lambda path: write_scanned_pdf(path, 5, seed=300)),
+    ('image_640x480', 'image', 1, ['tesseract'], lambda path: render_page(text_lines(400, 12), 640, 480, seed=400).save(path)),
+    ('image_1700x2200', 'image', 1, ['tesseract'], lambda path: render_page(text_lines(500, 40), 1700, 2200, seed=500, tilt=1.5).save(path)),
+    ('image_3400x4400', 'image', 1, ['tesseract'], lambda path: render_page(text_lines(600, 40), 3400, 4400, seed=600).save(path)),
+    ('audio_10s', 'audio', 1, ['ffmpeg'], lambda path: write_wav(path, 10)),
+    ('audio_120s', 'audio', 1, ['ffmpeg'], lambda path: write_wav(path, 120)),
+    ('video_30s_720p', 'video', 1, ['ffmpeg'], lambda path: write_mp4(path, 30)),
+]
+
+EXTENSIONS = {'pdf': 'pdf', 'image': 'png', 'audio': 'wav', 'video': 'mp4'}
+
+
+def build_corpus(directory):
+    """Generate the files that are missing and return the cases as dicts"""
+    directory = os.path.join(directory, f"v{CORPUS_VERSION}")
+    os.makedirs(directory, exist_ok=True)
+    cases = []
+    for name, file_type, pages, requires, build in CASES:
+        path = os.path.join(directory, f"{name}.{EXTENSIONS[file_type]}")
+        if not os.path.exists(path):
+            # Write under a temporary name so an interrupted build isn't mistaken for a file
+            temp_path = f"{path}.partial.{EXTENSIONS[file_type]}"
+            build(temp_path)
+            os.replace(temp_path, path)
+        cases.append({
+            'name': name,
+            'fileType': file_type,
+            'pages': pages,
+            'requires': requires,
+            'path': path,
+            'bytes': os.path.getsize(path)
+        })
+    return cases
+
+
+if __name__ == '__main__':
+    print(json.dumps(build_corpus(sys.argv[1] if len(sys.argv) > 1 else 'corpus'), indent=2))
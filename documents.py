@@ -0,0 +1,233 @@
+# documents.py
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import PyPDF2
+
+from pdf_render import count_pdf_pages
+
+# Ranges a single request may list, so a page spec can't be made arbitrarily expensive
+MAX_RANGES = 100
+
+
+def parse_page_range(spec):
+    """Parse a page range such as "3", "1-5", "2,4-6" or "10-" (to the end).
+
+    Returns sorted, merged [first, last] runs of 1-based pages, where last is
+    None for an open end, or None for an empty spec. Raises ValueError.
+    """
+    if spec is None or not spec.strip():
+        return None
+    runs = []
+    parts = spec.split(',')
+    if len(parts) > MAX_RANGES:
+        raise ValueError(f"At most {MAX_RANGES} page ranges are allowed")
+    for part in parts:
+        first, separator, last = part.strip().partition('-')
+        try:
+            first = int(first)
+            last = (int(last) if last.strip() else None) if separator else first
+        except ValueError:
+            raise ValueError(f"Invalid page range: {part.strip()!r}")
+        if first < 1 or (last is not None and last < first):
+            raise ValueError(f"Invalid page range: {part.strip()!r}")
+        runs.append([first, last])
+
+    merged = []
+    for first, last in sorted(runs, key=lambda run: run[0]):
+        if merged and (merged[-1][1] is None or first <= merged[-1][1] + 1):
+            if merged[-1][1] is not None:
+                merged[-1][1] = None if last is None else max(merged[-1][1], last)
+        else:
+            merged.append([first, last])
+    return merged
+
+
+def select_pages(runs, page_count):
+    """The pages of a document with `page_count` pages that fall in `runs`, in order"""
+    if runs is None:
+        return list(range(1, page_count + 1))
+    pages = []
+    for first, last in runs:
+        pages.extend(range(first, min(page_count, last if last is not None else page_count) + 1))
+    return pages
+
+
+class PdfDocument:
+    """A PDF parsed once and kept for page-at-a-time access.
+
+    PyPDF2 reads the file into memory and builds the page list when it is
+    opened, so reading a later page's text layer only costs that page. If
+    PyPDF2 can't parse the file, poppler counts its pages and none of them has
+    a text layer.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.dpi = None  # Render DPI of the scanned pages, chosen when the first one is needed
+        self._lock = threading.Lock()
+        try:
+            self._reader = PyPDF2.PdfReader(path)
+            self.page_count = len(self._reader.pages)
+        except Exception as e:
+            print(f"Error extracting text from PDF: {e}")
+            self._reader = None
+            self.page_count = count_pdf_pages(path)
+
+    def page_text(self, page_num):
+        """Text layer of a 1-based page; None if it can't be read"""
+        if self._reader is None:
+            return None
+        # PyPDF2 resolves objects into state shared by all pages, so one page at a time
+        with self._lock:
+            try:
+                return self._reader.pages[page_num - 1].extract_text() or ""
+            except Exception as e:
+                print(f"Error extracting text from PDF page {page_num}: {e}")
+                return None
+
+    def may_have_text(self, page_num):
+        """Whether a 1-based page declares fonts, directly or in a form XObject.
+
+        Only such pages can have a text layer, so the others are scans that need
+        OCR. This reads the page's resources, not its content, so it is cheap.
+        """
+        if self._reader is None:
+            return False
+        with self._lock:
+            try:
+                resources = self._reader.pages[page_num - 1].get('/Resources')
+                resources = resources.get_object() if resources is not None else {}
+                if resources.get('/Font'):
+                    return True
+                xobjects = resources.get('/XObject')
+                xobjects = xobjects.get_object().values() if xobjects is not None else []
+                return any(xobject.get_object().get('/Subtype') == '/Form' for xobject in xobjects)
+            except Exception:
+                return False
+
+
+class DocumentCache:
+    """Recently opened documents, and single pages loaded from them on demand.
+
+    Parsed documents are kept in an LRU bounded by the size of their files.
+    `page` loads a page with `load_page(document_id, document, page_num,
+    background)` in the calling thread, shares the result with anyone asking
+    for the same page meanwhile, and then queues its neighbours on background
+    threads so they are ready (in whatever cache `load_page` fills) when the
+    reader gets there. A background load may return None to skip the page.
+    """
+
+    def __init__(self, load_page, max_bytes=256 * 1024 * 1024, prefetch=2, workers=1, max_pending=8):
+        self.load_page = load_page
+        self.max_bytes = max_bytes
+        self.prefetch = prefetch
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self._documents = OrderedDict()
+        self._bytes = 0
+        self._loading = {}  # (document_id, page_num) -> Future of the load in progress
+        self._pending = 0
+        self._executor = None
+        self._lock = threading.Lock()
+        self._counters = {'opened': 0, 'reused': 0, 'prefetched': 0, 'prefetchSkipped': 0}
+
+    def open(self, document_id, path):
+        """The parsed document stored at `path`, parsing it only if it isn't cached"""
+        with self._lock:
+            document = self._documents.get(document_id)
+            if document is not None:
+                self._documents.move_to_end(document_id)
+                self._counters['reused'] += 1
+                return document
+
+        # Parse outside the lock; if two requests race, both parse and the first one kept wins
+        document = PdfDocument(path)
+        with self._lock:
+            if document_id in self._documents:
+                return self._documents[document_id]
+            self._documents[document_id] = document
+            self._bytes += document.size
+            self._counters['opened'] += 1
+            while self._bytes > self.max_bytes and len(self._documents) > 1:
+                _, evicted = self._documents.popitem(last=False)
+                self._bytes -= evicted.size
+        return document
+
+    def _claim(self, key):
+        """The load in progress for `key` and False, or a new Future for the caller to fill and True"""
+        with self._lock:
+            future = self._loading.get(key)
+            if future is not None:
+                return future, False
+            future = self._loading[key] = Future()
+            return future, True
+
+    def _run(self, future, document_id, document, page_num, background):
+        try:
+            future.set_result(self.load_page(document_id, document, page_num, background))
+        except Exception as e:
+            if not background:
+                future.set_exception(e)
+            else:
+                print(f"Error prefetching page {page_num} of {document_id}: {e}")
+                future.set_result(None)
+        finally:
+            with self._lock:
+                self._loading.pop((document_id, page_num), None)
+
+    def page(self, document_id, document, page_num):
+        """Load one page of an open document, then prefetch the pages around it"""
+        while True:
+            future, owner = self._claim((document_id, page_num))
+            if owner:
+                self._run(future, document_id, document, page_num, background=False)
+            page_data = future.result()
+            # A skipped or failed prefetch leaves the page to this request
+            if page_data is not None:
+                break
+
+        # Only once the requested page is done, so prefetching doesn't slow it down
+        neighbours = list(range(page_num + 1, page_num + self.prefetch + 1)) + [page_num - 1]
+        for neighbour in neighbours:
+            if self.prefetch and 1 <= neighbour <= document.page_count:
+                self._prefetch(document_id, document, neighbour)
+        return page_data
+
+    def _prefetch(self, document_id, document, page_num):
+        key = (document_id, page_num)
+        with self._lock:
+            if key in self._loading:
+                return
+            # Somebody paging quickly shouldn't queue up work for pages they've already skipped
+            if self._pending >= self.max_pending:
+                self._counters['prefetchSkipped'] += 1
+                return
+            future = self._loading[key] = Future()
+            self._pending += 1
+            self._counters['prefetched'] += 1
+            # Threads are started on first use, so they belong to the process that serves requests
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix='prefetch')
+        self._executor.submit(self._run_prefetch, future, document_id, document, page_num)
+
+    def _run_prefetch(self, future, document_id, document, page_num):
+        try:
+            self._run(future, document_id, document, page_num, background=True)
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    def stats(self):
+        with self._lock:
+            return {
+                'documents': len(self._documents),
+                'bytes': self._bytes,
+                'maxBytes': self.max_bytes,
+                'loading': len(self._loading),
+                'pendingPrefetches': self._pending,
+                **self._counters
+            }
@@ -0,0 +1,75 @@
+# gunicorn.conf.py
+# Production server: gunicorn -c gunicorn.conf.py app:app
+import os
+import shutil
+import tempfile
+import multiprocessing
+
+cpu_count = multiprocessing.cpu_count()
+
+bind = os.environ.get('BIND', f"0.0.0.0:{os.environ.get('PORT', 5000)}")
+
+# Each web worker has its own OCR process pool, so split the CPUs between them
+# instead of starting a Tesseract process per CPU in every worker.
+# Job and batch status (/jobs, /batch) is kept in SQLite, so any worker can
+# answer for a job another one is running.
+workers = int(os.environ.get('WEB_CONCURRENCY', max(2, cpu_count // 2)))
+os.environ.setdefault('OCR_WORKERS', str(max(1, cpu_count // workers)))
+# Each worker admits work against its own share of the memory budget
+os.environ.setdefault('WEB_WORKERS', str(workers))
+# Each worker counts its own metrics; they are written here so a scrape of any worker covers all of them
+metrics_dir = None
+if 'METRICS_MULTIPROCESS_DIR' not in os.environ:
+    metrics_dir = os.environ['METRICS_MULTIPROCESS_DIR'] = os.path.join(tempfile.gettempdir(), f"extractor_metrics_{os.getpid()}")
+
+# Threads keep streaming responses (NDJSON, SSE) from tying up a whole worker
+worker_class = 'gthread'
+threads = int(os.environ.get('WEB_THREADS', 4))
+
+# Import the app once in the master so workers fork with it (and any speech model)
+# already loaded and share those pages copy-on-write
+preload_app = True
+
+# Synchronous /upload and /batch requests can take minutes on long recordings
+timeout = int(os.environ.get('WEB_TIMEOUT', 300))
+graceful_timeout = 30
+keepalive = 5
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    # Runs once in the master, after the app was preloaded
+    import app
+
+    app.check_tesseract()
+    # No worker is running yet, so unfinished jobs and pinned files belong to an earlier run
+    app.recover_interrupted_work()
+    # Counts left by workers of an earlier run would otherwise be added to this one's
+    app.metrics.remove_flushed()
+    app.adopt_untracked_files()
+    app.sweep_storage()
+
+
+def post_fork(server, worker):
+    # Process pools and threads must be created after the fork, so they are started per worker
+    import app
+
+    app.start_sweeper()
+    app.start_metrics_flusher()
+    if os.environ.get('OCR_WARM', '1') == '1':
+        app.warm_up()
+
+
+def worker_exit(server, worker):
+    # What the worker counted since its last flush still goes into the totals
+    import app
+
+    app.metrics.flush()
+
+
+def on_exit(server):
+    if metrics_dir is not None:
+        shutil.rmtree(metrics_dir, ignore_errors=True)
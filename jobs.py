@@ -0,0 +1,335 @@
+# jobs.py
+import os
+import json
+import time
+import uuid
+import queue
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    info TEXT NOT NULL,
+    status TEXT NOT NULL,
+    pages INTEGER NOT NULL DEFAULT 0,
+    total_pages INTEGER,
+    result TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    started REAL,
+    finished REAL,
+    pid INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_finished ON jobs (finished);
+
+-- Pages in the order the job produced them
+CREATE TABLE IF NOT EXISTS job_pages (
+    job_id TEXT NOT NULL,
+    number INTEGER NOT NULL,
+    page TEXT NOT NULL,
+    PRIMARY KEY (job_id, number)
+);
+"""
+
+UNFINISHED = ('queued', 'running')
+
+
+class QueueFullError(Exception):
+    """Raised when the job backlog is at its limit"""
+    pass
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Job:
+    """One background extraction: its status, progress and the pages produced so far.
+
+    Everything is read from and written to the job store, so a Job can be
+    looked up and followed from any process, not only the one running it.
+    """
+
+    def __init__(self, manager, job_id):
+        self.manager = manager
+        self.id = job_id
+
+    def _row(self):
+        return self.manager._connect().execute(
+            "SELECT info, status, pages, total_pages, result, error, created, started, finished FROM jobs WHERE id = ?",
+            (self.id,)
+        ).fetchone()
+
+    @property
+    def status(self):
+        row = self.manager._connect().execute("SELECT status FROM jobs WHERE id = ?", (self.id,)).fetchone()
+        return row[0] if row else 'error'
+
+    @property
+    def done(self):
+        return self.status not in UNFINISHED
+
+    @property
+    def page_count(self):
+        row = self.manager._connect().execute("SELECT pages FROM jobs WHERE id = ?", (self.id,)).fetchone()
+        return row[0] if row else 0
+
+    def set_total_pages(self, total_pages):
+        self.manager._connect().execute("UPDATE jobs SET total_pages = ? WHERE id = ?", (total_pages, self.id))
+        self.manager._notify()
+
+    def add_page(self, page):
+        conn = self.manager._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                "INSERT INTO job_pages (job_id, number, page) SELECT id, pages, ? FROM jobs WHERE id = ?",
+                (json.dumps(page), self.id)
+            )
+            conn.execute("UPDATE jobs SET pages = pages + 1 WHERE id = ?", (self.id,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self.manager._notify()
+
+    def _set_status(self, status, result=None, error=None):
+        now = time.time()
+        conn = self.manager._connect()
+        if status == 'running':
+            conn.execute("UPDATE jobs SET status = ?, started = ? WHERE id = ?", (status, now, self.id))
+        else:
+            conn.execute(
+                "UPDATE jobs SET status = ?, finished = ?, result = ?, error = ? WHERE id = ?",
+                (status, now, None if result is None else json.dumps(result), error, self.id)
+            )
+        self.manager._notify()
+
+    def _pages(self, start):
+        return [json.loads(page) for page, in self.manager._connect().execute(
+            "SELECT page FROM job_pages WHERE job_id = ? AND number >= ? ORDER BY number", (self.id, start)
+        )]
+
+    def wait_for_pages(self, start, timeout=15):
+        """Block until there are pages after index `start` or the job finishes.
+
+        Returns the new pages (possibly empty when the wait timed out).
+        """
+        deadline = time.monotonic() + timeout
+        while True:
+            done = self.done
+            pages = self._pages(start)
+            remaining = deadline - time.monotonic()
+            if pages or done or remaining <= 0:
+                return pages
+            self.manager._wait(remaining)
+
+    def wait(self, timeout=None):
+        """Block until the job has finished; returns whether it did"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.done:
+            remaining = None if deadline is None else deadline - time.monotonic()
+            if remaining is not None and remaining <= 0:
+                return False
+            self.manager._wait(remaining)
+        return True
+
+    def to_dict(self, include_pages=False):
+        row = self._row()
+        if row is None:
+            # Expired while somebody was still following it, e.g. over an event stream
+            return {'id': self.id, 'status': 'error', 'error': 'Job expired'}
+        info, status, pages, total_pages, result, error, created, started, finished = row
+        data = json.loads(info)
+        data.update({
+            'id': self.id,
+            'status': status,
+            'progress': {
+                'pages': pages,
+                'total': total_pages
+            },
+            'created': created,
+            'started': started,
+            'finished': finished
+        })
+        if result is not None:
+            data.update(json.loads(result))
+        if error is not None:
+            data['error'] = error
+        if include_pages:
+            data['pages'] = self._pages(0)
+        return data
+
+
+class JobManager:
+    """Runs jobs on fixed pools of worker threads, each fed by its own bounded queue.
+
+    The heavy lifting (Tesseract, ffmpeg, recognizers) happens in subprocesses or
+    the OCR process pool, so threads are enough to keep them busy. `pools` maps a
+    pool name to its worker count, so CPU-bound and network-bound jobs can get
+    separate concurrency limits; without it there is one 'default' pool.
+
+    A job runs in the process that accepted it, but its status and pages are
+    kept in SQLite at `index_path`, shared by every process using the same file,
+    so any web worker can answer for it. Waiters are woken at once by changes
+    made in their own process and notice the others within `poll_interval`.
+    """
+
+    def __init__(self, index_path, workers=2, max_queue=100, ttl=3600, pools=None, poll_interval=0.5):
+        self.index_path = index_path
+        self.pools = {name: max(1, count) for name, count in (pools or {'default': workers}).items()}
+        self.ttl = ttl
+        self.poll_interval = poll_interval
+        self._queues = {name: queue.Queue(maxsize=max_queue) for name in self.pools}
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._changed = threading.Condition()
+        self._threads = []
+        self._running = {name: 0 for name in self.pools}
+        os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        # One connection per thread, and a new one after a fork (gunicorn preloads the app)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _notify(self):
+        with self._changed:
+            self._changed.notify_all()
+
+    def _wait(self, timeout=None):
+        with self._changed:
+            self._changed.wait(self.poll_interval if timeout is None else min(timeout, self.poll_interval))
+
+    @property
+    def workers(self):
+        return sum(self.pools.values())
+
+    def _ensure_workers(self):
+        with self._lock:
+            if self._threads:
+                return
+            for name, count in self.pools.items():
+                for i in range(count):
+                    thread = threading.Thread(target=self._work, args=(name,), name=f"job-{name}-{i}", daemon=True)
+                    thread.start()
+                    self._threads.append(thread)
+
+    def _work(self, pool):
+        jobs = self._queues[pool]
+        while True:
+            job, run = jobs.get()
+            with self._lock:
+                self._running[pool] += 1
+            try:
+                job._set_status('running')
+                result = run(job)
+                job._set_status('done', result=result)
+            except Exception as e:
+                print(f"Error running job {job.id}: {str(e)}")
+                try:
+                    job._set_status('error', error=str(e))
+                except Exception as store_error:
+                    print(f"Error recording the failure of job {job.id}: {store_error}")
+            finally:
+                with self._lock:
+                    self._running[pool] -= 1
+                jobs.task_done()
+
+    def _expire(self):
+        """Forget finished jobs older than the TTL"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            cutoff = time.time() - self.ttl
+            conn.execute(
+                "DELETE FROM job_pages WHERE job_id IN (SELECT id FROM jobs WHERE finished < ?)", (cutoff,)
+            )
+            conn.execute("DELETE FROM jobs WHERE finished < ?", (cutoff,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def submit(self, run, info=None, pool=None, block=False):
+        """Queue `run(job)` on `pool` and return the Job.
+
+        Raises QueueFullError when the pool's backlog is full, unless `block` is
+        set, in which case it waits for room instead.
+        """
+        pool = pool if pool in self.pools else next(iter(self.pools))
+        self._ensure_workers()
+        self._expire()
+        job = Job(self, uuid.uuid4().hex)
+        self._connect().execute(
+            "INSERT INTO jobs (id, info, status, created, pid) VALUES (?, ?, 'queued', ?, ?)",
+            (job.id, json.dumps(info or {}), time.time(), os.getpid())
+        )
+        try:
+            self._queues[pool].put((job, run), block=block)
+        except queue.Full:
+            self._connect().execute("DELETE FROM jobs WHERE id = ?", (job.id,))
+            raise QueueFullError("Too many jobs are waiting, please retry later")
+        return job
+
+    def get(self, job_id):
+        """The job with this id, from whichever process accepted it; None if unknown or expired"""
+        row = self._connect().execute("SELECT status, pid FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = Job(self, job_id)
+        status, pid = row
+        if status in UNFINISHED and not _process_alive(pid):
+            # The worker process running it died (e.g. killed for a timeout), and the job with it
+            self._fail(job_id, "The server process running this job stopped")
+        return job
+
+    def _fail(self, job_id, error):
+        self._connect().execute(
+            "UPDATE jobs SET status = 'error', error = ?, finished = ? WHERE id = ? AND status IN ('queued', 'running')",
+            (error, time.time(), job_id)
+        )
+        self._notify()
+
+    def fail_unfinished(self, error="Interrupted by a server restart"):
+        """Mark every queued or running job as failed; for server startup, before any worker runs jobs"""
+        failed = self._connect().execute(
+            "UPDATE jobs SET status = 'error', error = ?, finished = ? WHERE status IN ('queued', 'running')",
+            (error, time.time())
+        ).rowcount
+        self._notify()
+        return failed
+
+    def stats(self):
+        """Queues and workers of this process, and the jobs every process knows about"""
+        with self._lock:
+            pools = {
+                name: {
+                    'workers': count,
+                    'queued': self._queues[name].qsize(),
+                    'running': self._running[name],
+                    'maxQueue': self._queues[name].maxsize
+                }
+                for name, count in self.pools.items()
+            }
+        return {
+            'workers': self.workers,
+            'queued': sum(pool['queued'] for pool in pools.values()),
+            'running': sum(pool['running'] for pool in pools.values()),
+            'jobs': self._connect().execute("SELECT count(*) FROM jobs").fetchone()[0],
+            'pools': pools
+        }
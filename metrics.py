@@ -0,0 +1,275 @@
+# metrics.py
+import os
+import json
+import time
+import uuid
+import threading
+import contextvars
+
+# Latency buckets in seconds, from a fast cache hit to a long recording
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+# Id of the request being handled, for log lines; worker threads set it from the job that runs
+request_id = contextvars.ContextVar('request_id', default=None)
+
+
+class _NullTimer:
+    """What `Metrics.timer` returns while metrics are disabled"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class _StageTimer:
+    __slots__ = ('metrics', 'stage', 'labels', 'start')
+
+    def __init__(self, metrics, stage, labels):
+        self.metrics = metrics
+        self.stage = stage
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        seconds = time.perf_counter() - self.start
+        self.metrics.observe('stage_seconds', seconds, stage=self.stage, **self.labels)
+        if exc_type is not None:
+            self.metrics.inc('stage_errors_total', stage=self.stage, **self.labels)
+        self.metrics.log('stage', stage=self.stage, seconds=round(seconds, 6), error=exc_type is not None, **self.labels)
+        return False
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(labels, extra=None):
+    items = list(labels) + (list(extra) if extra else [])
+    if not items:
+        return ''
+    return '{' + ','.join(f'{key}="{_escape(value)}"' for key, value in items) + '}'
+
+
+def _process_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+class Metrics:
+    """Counters, histograms and gauges rendered in the Prometheus text format.
+
+    Everything is kept in process memory under one lock. When `enabled` is False
+    every call returns immediately and `timer` hands out a shared no-op, so the
+    instrumentation can stay in the code paths. With `json_logs` each timed stage
+    and event is also printed as one JSON line tagged with the request id.
+
+    With `multiprocess_dir`, as in prometheus_client's multiprocess mode, each
+    process writes its metrics to a file there (see `flush`) and `render` adds
+    up those of every process, so any worker can answer a scrape for all of
+    them. Counters and histograms of workers that exited keep counting towards
+    the totals; gauges get a `worker` label and are dropped with their process.
+    """
+
+    def __init__(self, enabled=True, json_logs=False, namespace='extractor', buckets=DEFAULT_BUCKETS,
+                 multiprocess_dir=None):
+        self.enabled = enabled
+        self.json_logs = enabled and json_logs
+        self.namespace = namespace
+        self.buckets = tuple(buckets)
+        self.multiprocess_dir = multiprocess_dir if enabled else None
+        self._counters = {}
+        self._histograms = {}
+        self._gauge_callbacks = []
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._flusher = None
+        self._process = None
+        if self.multiprocess_dir:
+            os.makedirs(self.multiprocess_dir, exist_ok=True)
+
+    def inc(self, name, amount=1, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        if not self.enabled:
+            return
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                # One count per bucket, then the sum and the total count
+                histogram = self._histograms[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    histogram[i] += 1
+            histogram[-2] += value
+            histogram[-1] += 1
+
+    def timer(self, stage, **labels):
+        """Context manager recording the time spent in `stage` in the stage_seconds histogram"""
+        if not self.enabled:
+            return _NULL_TIMER
+        return _StageTimer(self, stage, labels)
+
+    def add_gauges(self, callback):
+        """Register `callback()` returning (name, labels dict, value) tuples, read at scrape time"""
+        self._gauge_callbacks.append(callback)
+
+    def log(self, event, **fields):
+        if not self.json_logs:
+            return
+        record = {'ts': round(time.time(), 3), 'event': event, 'requestId': request_id.get()}
+        record.update(fields)
+        print(json.dumps(record, default=str), flush=True)
+
+    def _collect_gauges(self):
+        gauges = []
+        for callback in self._gauge_callbacks:
+            try:
+                for name, labels, value in callback():
+                    gauges.append((name, tuple(sorted(labels.items())), value))
+            except Exception as e:
+                print(f"Warning: Could not collect gauges: {e}")
+        return gauges
+
+    def _process_file(self):
+        # Named by pid and a per-process token, so a reused pid doesn't overwrite an exited worker's totals
+        if self._process is None or self._process[0] != os.getpid():
+            self._process = (os.getpid(), uuid.uuid4().hex[:8])
+        return os.path.join(self.multiprocess_dir, f"{self._process[0]}_{self._process[1]}.json")
+
+    def flush(self):
+        """Write this process's metrics to `multiprocess_dir` for the other processes to render"""
+        if not self.multiprocess_dir:
+            return
+        with self._lock:
+            counters = [[name, labels, value] for (name, labels), value in self._counters.items()]
+            histograms = [[name, labels, list(values)] for (name, labels), values in self._histograms.items()]
+        snapshot = {'counters': counters, 'histograms': histograms, 'gauges': self._collect_gauges()}
+        path = self._process_file()
+        with self._flush_lock:
+            temp_path = f"{path}.tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(snapshot, f)
+            os.replace(temp_path, path)
+
+    def start_flusher(self, interval=5):
+        """Flush every `interval` seconds on a daemon thread (once per process, after forking)"""
+        if not self.multiprocess_dir or (self._flusher is not None and self._flusher.is_alive()):
+            return
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"Warning: Could not flush metrics: {e}")
+
+        self._flusher = threading.Thread(target=run, name='metrics-flusher', daemon=True)
+        self._flusher.start()
+
+    def remove_flushed(self):
+        """Delete the metrics every process has flushed; for server startup, before workers start"""
+        if not self.multiprocess_dir:
+            return
+        for entry in os.scandir(self.multiprocess_dir):
+            if entry.name.endswith(('.json', '.tmp')):
+                os.remove(entry.path)
+
+    def _merged(self):
+        """Counters, histograms and gauges of this process, plus those flushed by the others"""
+        with self._lock:
+            counters = dict(self._counters)
+            histograms = {key: list(values) for key, values in self._histograms.items()}
+        gauges = self._collect_gauges()
+        if not self.multiprocess_dir:
+            return counters, histograms, gauges
+
+        own_file = os.path.basename(self._process_file())
+        gauges = [(name, labels + (('worker', os.getpid()),), value) for name, labels, value in gauges]
+        for entry in os.scandir(self.multiprocess_dir):
+            if entry.name == own_file or not entry.name.endswith('.json'):
+                continue
+            try:
+                with open(entry.path, 'r', encoding='utf-8') as f:
+                    snapshot = json.load(f)
+            except (OSError, ValueError):
+                continue
+            for name, labels, value in snapshot['counters']:
+                key = (name, tuple(tuple(label) for label in labels))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, values in snapshot['histograms']:
+                key = (name, tuple(tuple(label) for label in labels))
+                if key in histograms:
+                    histograms[key] = [a + b for a, b in zip(histograms[key], values)]
+                else:
+                    histograms[key] = values
+            pid = int(entry.name.split('_', 1)[0])
+            if _process_alive(pid):
+                gauges.extend(
+                    (name, tuple(tuple(label) for label in labels) + (('worker', pid),), value)
+                    for name, labels, value in snapshot['gauges']
+                )
+        return counters, histograms, gauges
+
+    def render(self):
+        """All metrics in the Prometheus text exposition format"""
+        prefix = f"{self.namespace}_"
+        lines = []
+        counters, histograms, gauges = self._merged()
+
+        typed = set()
+        for (name, labels), value in sorted(counters.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {prefix}{name} counter")
+                typed.add(name)
+            lines.append(f"{prefix}{name}{_format_labels(labels)} {value}")
+
+        for (name, labels), values in sorted(histograms.items()):
+            if name not in typed:
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                typed.add(name)
+            for bound, count in zip(self.buckets, values):
+                lines.append(f"{prefix}{name}_bucket{_format_labels(labels, [('le', bound)])} {count}")
+            lines.append(f"{prefix}{name}_bucket{_format_labels(labels, [('le', '+Inf')])} {values[-1]}")
+            lines.append(f"{prefix}{name}_sum{_format_labels(labels)} {values[-2]}")
+            lines.append(f"{prefix}{name}_count{_format_labels(labels)} {values[-1]}")
+
+        # Samples of one metric have to be listed together, so group gauges by name first
+        grouped = {}
+        for name, labels, value in gauges:
+            grouped.setdefault(name, []).append((labels, value))
+        for name, samples in grouped.items():
+            lines.append(f"# TYPE {prefix}{name} gauge")
+            for labels, value in samples:
+                lines.append(f"{prefix}{name}{_format_labels(labels)} {value}")
+
+        return "\n".join(lines) + "\n"
+
+    def count_bytes(self, chunks, name, **labels):
+        """Pass a streamed response body through, adding its size to counter `name` at the end"""
+        total = 0
+        try:
+            for chunk in chunks:
+                total += len(chunk)
+                yield chunk
+        finally:
+            self.inc(name, total, **labels)
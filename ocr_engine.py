@@ -0,0 +1,155 @@
+# ocr_engine.py
+import os
+import time
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from PIL import Image
+
+from ocr_strategy import adaptive_ocr, fixed_ocr
+from preprocess import preprocess_for_ocr
+from tesseract_backends import get_backend
+
+
+def _init_worker(backend_name, lang):
+    """Load the Tesseract engine once when a worker process starts"""
+    try:
+        get_backend(backend_name, lang)
+    except Exception as e:
+        print(f"Warning: Could not load the OCR backend in worker {os.getpid()}: {e}")
+
+
+def _worker_ready():
+    return os.getpid()
+
+
+def _ocr_page(image, lang, strategy, psm_modes, preprocess_options=None, backend_name='pytesseract'):
+    """Run Tesseract on one page inside a worker process"""
+    # Pages can be sent either as PIL images or as paths to rendered files
+    if isinstance(image, str):
+        image = Image.open(image)
+
+    try:
+        backend = get_backend(backend_name, lang)
+        preprocess_seconds = None
+        if preprocess_options is not None:
+            start = time.perf_counter()
+            image, _ = preprocess_for_ocr(image, **preprocess_options)
+            preprocess_seconds = time.perf_counter() - start
+
+        if strategy == 'adaptive':
+            # Preprocessing already deskewed the page
+            result = adaptive_ocr(image, lang=lang, correct_skew=preprocess_options is None, backend=backend)
+        else:
+            result = fixed_ocr(image, lang=lang, psm_modes=psm_modes, backend=backend)
+
+        if preprocess_seconds is not None:
+            result['timings']['preprocess'] = preprocess_seconds
+        result['backend'] = backend.name
+        return result
+    except Exception as e:
+        # pytesseract's exceptions can't always be unpickled in the parent, which would
+        # break the whole pool, so send back a plain error instead
+        raise RuntimeError(f"{type(e).__name__}: {e}") from None
+
+
+class PageOCREngine:
+    """Shared process pool that OCRs pages in parallel, one future per page.
+
+    One engine is created per server process and shared by every request, so
+    `max_workers` is also the cap on how many Tesseract processes run at once.
+    `strategy` is 'adaptive' (see ocr_strategy.adaptive_ocr) or 'fixed', which
+    tries `psm_modes` in turn until one returns text. `backend` is 'tesserocr'
+    (engines stay loaded in each worker), 'pytesseract' (a tesseract process per
+    call) or 'auto', which uses tesserocr when it is installed.
+    """
+
+    def __init__(self, max_workers=None, lang='eng', psm_modes=(6, 11), strategy='adaptive', preprocess_options=None,
+                 backend='auto'):
+        self.max_workers = max(1, max_workers or os.cpu_count() or 1)
+        self.lang = lang
+        self.psm_modes = tuple(psm_modes)
+        self.strategy = strategy
+        # Keyword arguments for preprocess.preprocess_for_ocr, None to send pages to Tesseract as they are
+        self.preprocess_options = preprocess_options
+        self.backend = backend
+        self._executor = None
+        self._lock = threading.Lock()
+        self._stats = {}
+        self._backends_used = {}
+        self._in_flight = 0
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # Use spawn so workers don't inherit the web server's threads and locks
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context('spawn'),
+                    initializer=_init_worker,
+                    initargs=(self.backend, self.lang)
+                )
+            return self._executor
+
+    def _reset_executor(self, broken):
+        with self._lock:
+            if self._executor is broken:
+                self._executor = None
+        broken.shutdown(wait=False, cancel_futures=True)
+
+    def _record(self, future):
+        """Aggregate per-strategy pass counts and timings of a finished page"""
+        with self._lock:
+            self._in_flight -= 1
+        if future.cancelled() or future.exception() is not None:
+            return
+        result = future.result()
+        with self._lock:
+            stats = self._stats.setdefault(result['strategy'], {'pages': 0, 'passes': 0, 'seconds': {}})
+            stats['pages'] += 1
+            self._backends_used[result['backend']] = self._backends_used.get(result['backend'], 0) + 1
+            stats['passes'] += result['passes']
+            for stage, seconds in result['timings'].items():
+                stats['seconds'][stage] = stats['seconds'].get(stage, 0.0) + seconds
+
+    def submit(self, image, psm_modes=None):
+        """Queue one page for OCR; the future's result is a dict with the page 'text',
+        the 'strategy' used, the number of Tesseract 'passes' and stage 'timings'"""
+        psm_modes = tuple(psm_modes or self.psm_modes)
+        args = (_ocr_page, image, self.lang, self.strategy, psm_modes, self.preprocess_options, self.backend)
+        executor = self._get_executor()
+        try:
+            future = executor.submit(*args)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool and retry once
+            self._reset_executor(executor)
+            future = self._get_executor().submit(*args)
+        with self._lock:
+            self._in_flight += 1
+        future.add_done_callback(self._record)
+        return future
+
+    def warm(self):
+        """Start every worker process now (their initializer loads the OCR backend)
+        instead of on the first pages; returns without waiting for them"""
+        executor = self._get_executor()
+        return [executor.submit(_worker_ready) for _ in range(self.max_workers)]
+
+    def stats(self):
+        with self._lock:
+            return {
+                'workers': self.max_workers,
+                'strategy': self.strategy,
+                'backend': self.backend,
+                'pages_by_backend': dict(self._backends_used),
+                'in_flight': self._in_flight,
+                'strategies': {name: dict(stats, seconds=dict(stats['seconds'])) for name, stats in self._stats.items()}
+            }
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
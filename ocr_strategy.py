@@ -0,0 +1,145 @@
+# ocr_strategy.py
+import time
+
+import numpy as np
+from PIL import Image
+
+from preprocess import ink_mask, estimate_skew
+from tesseract_backends import PytesseractBackend
+
+# Page Segmentation Modes used by the strategies
+PSM_AUTO = 3  # Fully automatic page segmentation
+PSM_BLOCK = 6  # Assume a single uniform block of text
+PSM_SPARSE = 11  # Sparse text, find as much text as possible in no particular order
+
+
+def image_statistics(image, max_side=1000, with_skew=True):
+    """Cheap statistics of a page, computed on a downscaled grayscale copy"""
+    small = image.convert('L')
+    small.thumbnail((max_side, max_side))
+    gray = np.asarray(small)
+    ink = ink_mask(gray)
+    rows_with_ink = ink.any(axis=1)
+    return {
+        'small': small,
+        'ink_density': float(ink.mean()),
+        'ink_rows': float(rows_with_ink.mean()),
+        'skew': estimate_skew(ink) if with_skew else 0.0,
+        'contrast': float(gray.std())
+    }
+
+
+def choose_psm(stats, blank_density=0.001, sparse_density=0.01):
+    """Pick a segmentation mode up front; None means the page is blank"""
+    if stats['contrast'] < 2 or stats['ink_density'] < blank_density:
+        return None
+    if stats['ink_density'] < sparse_density or stats['ink_rows'] < 0.15:
+        return PSM_SPARSE
+    return PSM_BLOCK
+
+
+def detect_rotation(small, backend):
+    """Rotation the page needs according to Tesseract's OSD, 0 when unsure"""
+    osd = backend.detect_rotation(small)
+    # OSD fails on pages with too few characters; treat them as upright
+    if osd is None:
+        return 0
+    rotate, confidence = osd
+    if confidence < 2:
+        return 0
+    return rotate
+
+
+def ocr_with_confidence(image, lang, psm, backend):
+    """One Tesseract pass returning (text, mean word confidence, word count)"""
+    data = backend.image_to_data(image, lang, psm)
+
+    lines = {}
+    confidences = []
+    for i, word in enumerate(data['text']):
+        if not word or not word.strip():
+            continue
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        lines.setdefault(key, []).append(word)
+        conf = float(data['conf'][i])
+        if conf >= 0:
+            confidences.append(conf)
+
+    # Rebuild the text like image_to_string: words per line, a blank line between blocks
+    text_lines = []
+    previous_block = None
+    for (block, par, line), words in sorted(lines.items()):
+        if previous_block is not None and block != previous_block:
+            text_lines.append("")
+        text_lines.append(" ".join(words))
+        previous_block = block
+
+    mean_conf = sum(confidences) / len(confidences) if confidences else 0.0
+    return "\n".join(text_lines), mean_conf, len(confidences)
+
+
+def adaptive_ocr(image, lang='eng', min_confidence=60, use_osd=True, correct_skew=True, backend=None):
+    """OCR a page with one Tesseract pass in the common case.
+
+    The segmentation mode comes from image statistics, an OSD call on a small copy
+    fixes rotated pages, and a second pass with the other mode is only run when the
+    first one's word confidence is below `min_confidence`. Pass `correct_skew=False`
+    for pages that preprocess_for_ocr already deskewed. `backend` is a
+    tesseract_backends.TesseractBackend, pytesseract by default.
+    """
+    backend = backend or PytesseractBackend()
+    timings = {}
+    start = time.perf_counter()
+    stats = image_statistics(image, with_skew=correct_skew)
+    timings['stats'] = time.perf_counter() - start
+
+    psm = choose_psm(stats)
+    if psm is None:
+        return {'text': "", 'strategy': 'blank', 'passes': 0, 'confidence': None, 'timings': timings}
+
+    if use_osd:
+        start = time.perf_counter()
+        rotation = detect_rotation(stats['small'], backend)
+        timings['osd'] = time.perf_counter() - start
+        if rotation:
+            image = image.rotate(-rotation, expand=True, fillcolor='white')
+
+    if abs(stats['skew']) >= 1:
+        image = image.rotate(stats['skew'], resample=Image.BICUBIC, expand=True, fillcolor='white')
+
+    start = time.perf_counter()
+    text, confidence, words = ocr_with_confidence(image, lang, psm, backend)
+    timings['pass_1'] = time.perf_counter() - start
+    strategy = f"psm{psm}"
+    passes = 1
+
+    if confidence < min_confidence or words == 0:
+        # Low confidence: the other mode may segment this page better
+        retry_psm = PSM_BLOCK if psm == PSM_SPARSE else PSM_SPARSE
+        start = time.perf_counter()
+        retry_text, retry_confidence, retry_words = ocr_with_confidence(image, lang, retry_psm, backend)
+        timings['pass_2'] = time.perf_counter() - start
+        passes = 2
+        if retry_words and (words == 0 or retry_confidence > confidence):
+            text, confidence = retry_text, retry_confidence
+            strategy = f"psm{psm}+psm{retry_psm}"
+        else:
+            strategy = f"psm{psm}+retry"
+
+    return {'text': text, 'strategy': strategy, 'passes': passes, 'confidence': confidence, 'timings': timings}
+
+
+def fixed_ocr(image, lang='eng', psm_modes=(PSM_BLOCK, PSM_SPARSE), backend=None):
+    """The original strategy: try each mode in turn until one returns text"""
+    backend = backend or PytesseractBackend()
+    timings = {}
+    text = ""
+    passes = 0
+    for psm in psm_modes:
+        start = time.perf_counter()
+        text = backend.image_to_string(image, lang, psm)
+        passes += 1
+        timings[f"pass_{passes}"] = time.perf_counter() - start
+        if text.strip():
+            break
+    return {'text': text, 'strategy': 'fixed', 'passes': passes, 'confidence': None, 'timings': timings}
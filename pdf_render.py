@@ -0,0 +1,66 @@
+# pdf_render.py
+import os
+import shutil
+import tempfile
+import uuid
+
+from pdf2image import convert_from_path, pdfinfo_from_path
+
+
+def count_pdf_pages(pdf_path):
+    """Return the number of pages poppler sees in the PDF"""
+    return int(pdfinfo_from_path(pdf_path)['Pages'])
+
+
+def render_page(pdf_path, page_num, dpi):
+    """Render a single 1-based page to a PIL image, for small renders such as DPI probes"""
+    images = convert_from_path(pdf_path, dpi=dpi, first_page=page_num, last_page=page_num)
+    return images[0] if images else None
+
+
+def _page_runs(page_numbers):
+    """Group sorted page numbers into contiguous (first, last) runs"""
+    runs = []
+    for page_num in sorted(set(page_numbers)):
+        if runs and page_num == runs[-1][1] + 1:
+            runs[-1][1] = page_num
+        else:
+            runs.append([page_num, page_num])
+    return runs
+
+
+def iter_rendered_windows(pdf_path, page_numbers, window=4, dpi=200):
+    """Render the given 1-based pages to PNG files, at most `window` pages at a time.
+
+    Yields lists of (page_number, png_path) in page order. The files of a window
+    are deleted as soon as the caller asks for the next one, so peak memory and
+    disk use depend on the window size rather than on the page count.
+    """
+    window = max(1, int(window))
+    temp_dir = os.path.join(tempfile.gettempdir(), f"pdf_render_{uuid.uuid4().hex}")
+    os.makedirs(temp_dir, exist_ok=True)
+
+    try:
+        for first, last in _page_runs(page_numbers):
+            for start in range(first, last + 1, window):
+                end = min(start + window - 1, last)
+                window_dir = os.path.join(temp_dir, f"{start}_{end}")
+                os.makedirs(window_dir, exist_ok=True)
+
+                # Render straight to files so no full-resolution page is kept in this process
+                paths = convert_from_path(
+                    pdf_path,
+                    dpi=dpi,
+                    first_page=start,
+                    last_page=end,
+                    output_folder=window_dir,
+                    fmt='png',
+                    paths_only=True
+                )
+
+                # pdf2image names files with zero-padded page numbers, so sorting keeps page order
+                yield list(zip(range(start, end + 1), sorted(paths)))
+
+                shutil.rmtree(window_dir, ignore_errors=True)
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
@@ -0,0 +1,129 @@
+# preprocess.py
+import numpy as np
+from PIL import Image
+
+
+def otsu_threshold(gray):
+    """Otsu's threshold of an 8-bit grayscale array, computed from its histogram"""
+    hist = np.bincount(gray.ravel(), minlength=256).astype(np.float64)
+    total = hist.sum()
+    if total == 0:
+        return 128
+    levels = np.arange(256)
+    weight_bg = np.cumsum(hist)
+    weight_fg = total - weight_bg
+    sum_bg = np.cumsum(hist * levels)
+    mean_bg = sum_bg / np.maximum(weight_bg, 1)
+    mean_fg = (sum_bg[-1] - sum_bg) / np.maximum(weight_fg, 1)
+    between = weight_bg * weight_fg * (mean_bg - mean_fg) ** 2
+    return int(np.argmax(between))
+
+
+def ink_mask(gray):
+    """Boolean mask of ink pixels; ink is taken to be the minority class"""
+    ink = gray < otsu_threshold(gray)
+    if ink.mean() > 0.5:
+        # Light text on a dark background
+        ink = ~ink
+    return ink
+
+
+def rotate_mask(ink, angle):
+    """Rotate a boolean mask counter-clockwise by `angle` degrees, keeping its size"""
+    ink_image = Image.fromarray((ink * 255).astype(np.uint8))
+    return np.asarray(ink_image.rotate(float(angle), resample=Image.NEAREST)) > 0
+
+
+def estimate_skew(ink, max_angle=5, step=0.5):
+    """Angle in degrees that best aligns text rows, by maximizing the row-profile variance"""
+    if not ink.any():
+        return 0.0
+    best_angle, best_score = 0.0, -1.0
+    for angle in np.arange(-max_angle, max_angle + step, step):
+        rotated = rotate_mask(ink, angle)
+        score = float(np.var(rotated.sum(axis=1, dtype=np.float64)))
+        if score > best_score:
+            best_angle, best_score = float(angle), score
+    return best_angle
+
+
+def estimate_line_height(ink, min_lines=3):
+    """Median height in pixels of the runs of inked rows, None if there are too few lines"""
+    # Rows with a little ink belong to a text line; the gaps between lines are (nearly) empty
+    row_ink = ink.mean(axis=1)
+    in_line = row_ink > max(0.002, row_ink.max() * 0.02)
+    if not in_line.any():
+        return None
+
+    # Start and end indices of every run of True values
+    padded = np.concatenate(([False], in_line, [False])).astype(np.int8)
+    edges = np.flatnonzero(np.diff(padded))
+    heights = edges[1::2] - edges[::2]
+    heights = heights[heights > 1]
+    if len(heights) < min_lines:
+        return None
+    return float(np.median(heights))
+
+
+def preprocess_for_ocr(image, target_line_height=40, max_pixels=25_000_000, binarize=True, deskew=True,
+                       analysis_side=1500):
+    """Normalize a page for Tesseract and return (8-bit grayscale image, info).
+
+    The page is scaled so text lines are about `target_line_height` pixels tall
+    (and never above `max_pixels`), converted to grayscale, deskewed and
+    binarized with a global Otsu threshold.
+    """
+    info = {'scale': 1.0, 'skew': 0.0, 'line_height': None}
+    gray = image.convert('L')
+
+    # Measure on a downscaled copy; everything found there is rescaled to full size
+    small = gray.copy()
+    small.thumbnail((analysis_side, analysis_side))
+    factor = small.width / gray.width
+    small_ink = ink_mask(np.asarray(small))
+
+    if deskew:
+        info['skew'] = estimate_skew(small_ink)
+        if abs(info['skew']) < 0.5:
+            info['skew'] = 0.0
+        else:
+            # Tilted lines smear into each other, so measure them on the straightened copy
+            small_ink = rotate_mask(small_ink, info['skew'])
+
+    scale = 1.0
+    line_height = estimate_line_height(small_ink)
+    if line_height is not None:
+        info['line_height'] = line_height / factor
+        scale = target_line_height / info['line_height']
+        # Small changes aren't worth a resample
+        if 0.8 <= scale <= 1.25:
+            scale = 1.0
+        scale = min(max(scale, 0.2), 2.0)
+    pixels = gray.width * gray.height * scale * scale
+    if pixels > max_pixels:
+        scale *= (max_pixels / pixels) ** 0.5
+
+    if scale != 1.0:
+        size = (max(1, round(gray.width * scale)), max(1, round(gray.height * scale)))
+        gray = gray.resize(size, resample=Image.LANCZOS if scale < 1 else Image.BICUBIC)
+        info['scale'] = scale
+
+    if info['skew']:
+        gray = gray.rotate(info['skew'], resample=Image.BICUBIC, expand=True, fillcolor=255)
+
+    if binarize:
+        pixels = np.asarray(gray)
+        ink = ink_mask(pixels)
+        # Black text on white, which is what Tesseract expects
+        gray = Image.fromarray(np.where(ink, 0, 255).astype(np.uint8))
+
+    return gray, info
+
+
+def choose_render_dpi(probe_image, probe_dpi, target_line_height=40, min_dpi=100, max_dpi=300, default_dpi=200):
+    """DPI at which a PDF page rendered at `probe_dpi` has lines `target_line_height` pixels tall"""
+    line_height = estimate_line_height(ink_mask(np.asarray(probe_image.convert('L'))))
+    if line_height is None:
+        return default_dpi
+    dpi = probe_dpi * target_line_height / line_height
+    return int(min(max(dpi, min_dpi), max_dpi))
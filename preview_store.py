@@ -0,0 +1,221 @@
+# preview_store.py
+import os
+import re
+import json
+import shutil
+import tempfile
+import threading
+
+from PIL import Image, features
+from pdf2image import convert_from_path
+
+from result_cache import hash_file
+
+PREVIEW_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+
+class PreviewStore:
+    """Downscaled page previews stored once on disk and served by URL.
+
+    Each document gets a directory named by a hash of its content holding a hard
+    link to the source file, the thumbnails written so far and any media clip.
+    Missing thumbnails and full-resolution pages are rendered from the source
+    the first time they are requested. `on_write(preview_id, size)` is told how
+    many bytes each write added to a document's directory, so its disk use can
+    be tracked without listing it; expiring the directories is up to the caller.
+    """
+
+    def __init__(self, directory, max_size=1024, image_format='WEBP', quality=80, pdf_dpi=200, on_write=None):
+        self.directory = os.path.abspath(directory)
+        self.on_write = on_write
+        self.max_size = max_size
+        # Not every Pillow build has WebP support
+        self.image_format = image_format if image_format != 'WEBP' or features.check('webp') else 'JPEG'
+        self.extension = 'webp' if self.image_format == 'WEBP' else 'jpg'
+        self.mimetype = f"image/{'webp' if self.image_format == 'WEBP' else 'jpeg'}"
+        self.quality = quality
+        self.pdf_dpi = pdf_dpi
+        os.makedirs(self.directory, exist_ok=True)
+
+    @staticmethod
+    def preview_id_for(path):
+        return hash_file(path)[:32]
+
+    @staticmethod
+    def is_valid_id(preview_id):
+        return bool(PREVIEW_ID_PATTERN.match(preview_id))
+
+    def _doc_dir(self, preview_id):
+        if not self.is_valid_id(preview_id):
+            raise ValueError(f"Invalid preview id: {preview_id}")
+        return os.path.join(self.directory, preview_id)
+
+    def document_dir(self, preview_id):
+        """Directory holding everything stored for a document"""
+        return self._doc_dir(preview_id)
+
+    def _replace(self, preview_id, temp_path, path):
+        """Move a written file into place and report the bytes it added"""
+        try:
+            old_size = os.path.getsize(path)
+        except OSError:
+            old_size = 0
+        os.replace(temp_path, path)
+        if self.on_write is not None:
+            self.on_write(preview_id, os.path.getsize(path) - old_size)
+
+    def _meta_path(self, preview_id):
+        return os.path.join(self._doc_dir(preview_id), 'meta.json')
+
+    def _load_meta(self, preview_id):
+        try:
+            with open(self._meta_path(preview_id), 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_meta(self, preview_id, meta):
+        temp_path = f"{self._meta_path(preview_id)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            json.dump(meta, f)
+        os.replace(temp_path, self._meta_path(preview_id))
+
+    def register(self, preview_id, source_path, file_type):
+        """Remember the source of a document so previews can be rendered from it later"""
+        doc_dir = self._doc_dir(preview_id)
+        os.makedirs(doc_dir, exist_ok=True)
+        meta = self._load_meta(preview_id) or {}
+
+        source_name = f"source{os.path.splitext(source_path)[1].lower()}"
+        source_copy = os.path.join(doc_dir, source_name)
+        if not os.path.exists(source_copy):
+            try:
+                # A hard link costs no extra disk space and survives the upload being removed
+                os.link(source_path, source_copy)
+            except OSError:
+                shutil.copy2(source_path, source_copy)
+            # Counted in full: the link keeps the bytes on disk after the upload expires
+            if self.on_write is not None:
+                self.on_write(preview_id, os.path.getsize(source_copy))
+
+        meta.update({'file_type': file_type, 'source': source_name})
+        self._save_meta(preview_id, meta)
+
+    def source_path(self, preview_id):
+        """Returns (path, file_type) of a registered document's source, or (None, None)"""
+        meta = self._load_meta(preview_id)
+        if not meta or 'source' not in meta:
+            return None, None
+        path = os.path.join(self._doc_dir(preview_id), meta['source'])
+        return (path, meta['file_type']) if os.path.exists(path) else (None, None)
+
+    def page_url(self, preview_id, page, full=False):
+        return f"/preview/{preview_id}/{page}" + ("?size=full" if full else "")
+
+    def media_url(self, preview_id):
+        return f"/preview/{preview_id}/media"
+
+    def _thumbnail_file(self, preview_id, page):
+        return os.path.join(self._doc_dir(preview_id), f"page_{page}.{self.extension}")
+
+    def _write_image(self, preview_id, image, path, max_size=None):
+        if max_size:
+            image = image.copy()
+            image.thumbnail((max_size, max_size))
+        if image.mode not in ('RGB', 'L'):
+            image = image.convert('RGB')
+        temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        image.save(temp_path, format=self.image_format, quality=self.quality)
+        self._replace(preview_id, temp_path, path)
+
+    def save_thumbnail(self, preview_id, page, image):
+        """Write a downscaled preview of a page (PIL image or image path) and return its URL"""
+        path = self._thumbnail_file(preview_id, page)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if isinstance(image, str):
+            with Image.open(image) as opened:
+                self._write_image(preview_id, opened, path, self.max_size)
+        else:
+            self._write_image(preview_id, image, path, self.max_size)
+        return self.page_url(preview_id, page)
+
+    def save_media(self, preview_id, media_path, mimetype):
+        """Move an audio/video preview clip into the store and return its URL"""
+        doc_dir = self._doc_dir(preview_id)
+        os.makedirs(doc_dir, exist_ok=True)
+        media_name = f"media{os.path.splitext(media_path)[1].lower()}"
+        temp_path = os.path.join(doc_dir, f"{media_name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        shutil.move(media_path, temp_path)
+        self._replace(preview_id, temp_path, os.path.join(doc_dir, media_name))
+
+        meta = self._load_meta(preview_id) or {}
+        meta.update({'media': media_name, 'media_mimetype': mimetype})
+        self._save_meta(preview_id, meta)
+        return self.media_url(preview_id)
+
+    def _render_pdf_page(self, source, page, dpi):
+        with tempfile.TemporaryDirectory(prefix='preview_render_') as temp_dir:
+            paths = convert_from_path(
+                source, dpi=dpi, first_page=page, last_page=page,
+                output_folder=temp_dir, fmt='png', paths_only=True
+            )
+            if not paths:
+                return None
+            with Image.open(paths[0]) as image:
+                image.load()
+                return image
+
+    def _source_image(self, preview_id, page, dpi):
+        meta = self._load_meta(preview_id)
+        if not meta or 'source' not in meta:
+            return None
+        source = os.path.join(self._doc_dir(preview_id), meta['source'])
+        if not os.path.exists(source):
+            return None
+        if meta['file_type'] == 'pdf':
+            return self._render_pdf_page(source, page, dpi)
+        if meta['file_type'] == 'image' and page == 1:
+            with Image.open(source) as image:
+                image.load()
+                return image
+        return None
+
+    def thumbnail_path(self, preview_id, page):
+        """Path to a page thumbnail, rendering it from the source if needed; None if impossible"""
+        path = self._thumbnail_file(preview_id, page)
+        if os.path.exists(path):
+            return path
+        # A thumbnail doesn't need the full OCR resolution
+        image = self._source_image(preview_id, page, dpi=min(self.pdf_dpi, 100))
+        if image is None:
+            return None
+        self._write_image(preview_id, image, path, self.max_size)
+        return path
+
+    def full_path(self, preview_id, page):
+        """Path to a full-resolution page, rendered lazily; returns (path, mimetype) or (None, None)"""
+        meta = self._load_meta(preview_id)
+        if not meta or 'source' not in meta:
+            return None, None
+        if meta['file_type'] == 'image' and page == 1:
+            # The uploaded image already is the full-resolution version
+            source = os.path.join(self._doc_dir(preview_id), meta['source'])
+            return (source, None) if os.path.exists(source) else (None, None)
+
+        path = os.path.join(self._doc_dir(preview_id), f"full_{page}.png")
+        if not os.path.exists(path):
+            image = self._source_image(preview_id, page, dpi=self.pdf_dpi)
+            if image is None:
+                return None, None
+            temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            image.save(temp_path, format='PNG')
+            self._replace(preview_id, temp_path, path)
+        return path, 'image/png'
+
+    def media_path(self, preview_id):
+        """Returns (path, mimetype) of the document's media clip, or (None, None)"""
+        meta = self._load_meta(preview_id)
+        if not meta or 'media' not in meta:
+            return None, None
+        path = os.path.join(self._doc_dir(preview_id), meta['media'])
+        return (path, meta.get('media_mimetype')) if os.path.exists(path) else (None, None)
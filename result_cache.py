@@ -0,0 +1,226 @@
+# result_cache.py
+import os
+import json
+import time
+import hashlib
+import sqlite3
+import threading
+from collections import OrderedDict
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_lru ON entries (accessed);
+
+-- Running totals kept by triggers, so quota checks don't scan the table
+CREATE TABLE IF NOT EXISTS usage (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    entries INTEGER NOT NULL,
+    bytes INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO usage (id, entries, bytes) VALUES (0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS entries_insert AFTER INSERT ON entries BEGIN
+    UPDATE usage SET entries = entries + 1, bytes = bytes + new.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_delete AFTER DELETE ON entries BEGIN
+    UPDATE usage SET entries = entries - 1, bytes = bytes - old.size WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS entries_resize AFTER UPDATE OF size ON entries BEGIN
+    UPDATE usage SET bytes = bytes + new.size - old.size WHERE id = 0;
+END;
+"""
+
+
+def hash_file(path, chunk_size=1024 * 1024):
+    """Return the SHA-256 hex digest of a file, read in chunks"""
+    sha = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+def make_cache_key(file_hash, version, settings):
+    """Combine the content hash with the extractor version and settings into one key"""
+    key_data = json.dumps({'file': file_hash, 'version': version, 'settings': settings}, sort_keys=True)
+    return hashlib.sha256(key_data.encode('utf-8')).hexdigest()
+
+
+class ResultCache:
+    """Two-tier cache of extraction results: an in-memory LRU in front of a size-bounded LRU on disk.
+
+    Entries are stored as `<key>.json` files. The disk tier's sizes and access
+    times are indexed in SQLite, shared by every process using the same directory
+    (gunicorn workers), so together they stay under `max_bytes` and evict in one
+    LRU order. The memory tier belongs to each process.
+    """
+
+    def __init__(self, directory, max_bytes=512 * 1024 * 1024, memory_max_bytes=64 * 1024 * 1024, index_path=None):
+        self.directory = directory
+        self.index_path = index_path or os.path.join(directory, 'index.sqlite3')
+        self.max_bytes = max_bytes
+        self.memory_max_bytes = memory_max_bytes
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._memory = OrderedDict()  # key -> (payload, size)
+        self._memory_bytes = 0
+        self._counters = {'hits': 0, 'misses': 0, 'memory_hits': 0, 'disk_hits': 0, 'evictions': 0}
+
+        os.makedirs(self.directory, exist_ok=True)
+        self._connect().executescript(SCHEMA)
+        self._adopt_files()
+
+    def _connect(self):
+        # One connection per thread, and a new one after a fork (gunicorn preloads the app)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _adopt_files(self):
+        """Index entry files the index doesn't know about, such as those written before it existed,
+        as last used at their mtime"""
+        conn = self._connect()
+        known = {row[0] for row in conn.execute("SELECT key FROM entries")}
+        entries = []
+        for f in os.listdir(self.directory):
+            if not f.endswith('.json') or f[:-len('.json')] in known:
+                continue
+            try:
+                st = os.stat(os.path.join(self.directory, f))
+            except OSError:
+                continue
+            entries.append((f[:-len('.json')], st.st_size, st.st_mtime))
+        conn.executemany("INSERT OR IGNORE INTO entries (key, size, accessed) VALUES (?, ?, ?)", entries)
+        self._evict_disk()
+
+    def _remember(self, key, payload, size):
+        """Put an entry in the memory tier, evicting least recently used entries"""
+        if size > self.memory_max_bytes:
+            return
+        if key in self._memory:
+            self._memory_bytes -= self._memory.pop(key)[1]
+        self._memory[key] = (payload, size)
+        self._memory_bytes += size
+        while self._memory_bytes > self.memory_max_bytes:
+            _, (_, old_size) = self._memory.popitem(last=False)
+            self._memory_bytes -= old_size
+
+    def _evict_disk(self):
+        """Delete the least recently used entries on disk while they are over `max_bytes`"""
+        conn = self._connect()
+        while True:
+            # IMMEDIATE takes the write lock up front, so two processes never evict the same entries
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                excess = conn.execute("SELECT bytes FROM usage WHERE id = 0").fetchone()[0] - self.max_bytes
+                evicted = []
+                if excess > 0:
+                    for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed LIMIT 100").fetchall():
+                        if excess <= 0:
+                            break
+                        evicted.append(key)
+                        excess -= size
+                    conn.executemany("DELETE FROM entries WHERE key = ?", [(key,) for key in evicted])
+                conn.execute('COMMIT')
+            except Exception:
+                conn.execute('ROLLBACK')
+                raise
+            if not evicted:
+                return
+            with self._lock:
+                self._counters['evictions'] += len(evicted)
+            for key in evicted:
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+
+    def _touch(self, key):
+        self._connect().execute("UPDATE entries SET accessed = ? WHERE key = ?", (time.time(), key))
+
+    def get(self, key):
+        """Return the cached payload for `key`, or None on a miss"""
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                self._memory.move_to_end(key)
+                self._counters['hits'] += 1
+                self._counters['memory_hits'] += 1
+        if entry is not None:
+            # Keeps the disk copy from being evicted while this process serves it from memory
+            self._touch(key)
+            return entry[0]
+
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                data = f.read()
+            payload = json.loads(data)
+        except (OSError, ValueError):
+            # Another worker may have evicted it
+            self._connect().execute("DELETE FROM entries WHERE key = ?", (key,))
+            with self._lock:
+                self._counters['misses'] += 1
+            return None
+
+        self._touch(key)
+        with self._lock:
+            self._remember(key, payload, len(data))
+            self._counters['hits'] += 1
+            self._counters['disk_hits'] += 1
+        return payload
+
+    def put(self, key, payload):
+        """Store a JSON-serializable payload under `key`"""
+        data = json.dumps(payload)
+        size = len(data)
+        if size > self.max_bytes:
+            return
+
+        # Write to a temporary file first so readers never see a partial entry
+        temp_path = f"{self._path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                f.write(data)
+            os.replace(temp_path, self._path(key))
+        except OSError as e:
+            print(f"Warning: Could not write cache entry: {e}")
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            return
+
+        conn = self._connect()
+        conn.execute(
+            "INSERT INTO entries (key, size, accessed) VALUES (?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET size = excluded.size, accessed = excluded.accessed",
+            (key, size, time.time())
+        )
+        with self._lock:
+            self._remember(key, payload, size)
+        if conn.execute("SELECT bytes FROM usage WHERE id = 0").fetchone()[0] > self.max_bytes:
+            self._evict_disk()
+
+    def stats(self):
+        """Counters and memory tier of this process, and the disk tier every process shares"""
+        disk_entries, disk_bytes = self._connect().execute("SELECT entries, bytes FROM usage WHERE id = 0").fetchone()
+        with self._lock:
+            stats = dict(self._counters)
+            stats.update({
+                'memory_entries': len(self._memory),
+                'memory_bytes': self._memory_bytes,
+                'disk_entries': disk_entries,
+                'disk_bytes': disk_bytes
+            })
+        return stats
@@ -1,5 +1,13 @@
 #!/usr/bin/env python
-from app import app
+import os
+
+from app import app, check_tesseract, recover_interrupted_work, adopt_untracked_files, sweep_storage, start_sweeper
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', debug=True)
\ No newline at end of file
+    # Development server; production runs `gunicorn -c gunicorn.conf.py app:app`
+    check_tesseract()
+    recover_interrupted_work()
+    adopt_untracked_files()
+    sweep_storage()
+    start_sweeper()
+    app.run(host='0.0.0.0', debug=os.environ.get('FLASK_DEBUG', '1') == '1')
\ No newline at end of file
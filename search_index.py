@@ -0,0 +1,252 @@
+# search_index.py
+import os
+import re
+import html
+import time
+import sqlite3
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    filename TEXT NOT NULL,
+    original TEXT,
+    file_type TEXT,
+    pages INTEGER NOT NULL,
+    first_rowid INTEGER,
+    last_rowid INTEGER,
+    indexed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_file_type ON documents (file_type);
+
+-- One row per page. A document's pages are inserted in one transaction, so their
+-- rowids are a contiguous range and it can be removed without scanning the table
+CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(
+    text,
+    source UNINDEXED,
+    page UNINDEXED,
+    document_id UNINDEXED,
+    tokenize = 'porter unicode61 remove_diacritics 2'
+);
+"""
+
+# Sources with nothing worth finding
+SKIPPED_SOURCES = {'error', 'none'}
+
+# Snippet markers that can't occur in extracted text, swapped for <mark> after escaping
+MARK_START, MARK_END = '\x02', '\x03'
+
+PAGE_HEADER_PATTERN = re.compile(r'^--- Page (\d+) \((\w+)\) ---$', re.MULTILINE)
+
+
+def build_match_query(query):
+    """Turn free text into an FTS5 query: every word must match, `word*` matches a prefix.
+
+    Words are quoted, so FTS5 operators and punctuation in user input can't
+    cause syntax errors. Returns None when there is nothing to search for.
+    """
+    terms = []
+    for word in query.split():
+        prefix = word.endswith('*')
+        word = word.rstrip('*').replace('"', '""')
+        if word:
+            terms.append(f'"{word}"*' if prefix else f'"{word}"')
+    return " ".join(terms) or None
+
+
+def parse_text_file(path):
+    """Read back the pages of an `*_extracted.txt` file as written by finish_upload"""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+    headers = list(PAGE_HEADER_PATTERN.finditer(content))
+    pages = []
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(content)
+        pages.append({
+            'page': int(header.group(1)),
+            'source': header.group(2),
+            'text': content[header.end():end].strip()
+        })
+    return pages
+
+
+class SearchIndex:
+    """Full-text index of extracted pages in SQLite FTS5.
+
+    Each document is added once with all its pages in one transaction, under a
+    unique name (the text download's filename); adding a name again replaces
+    it. Queries are ranked by BM25 and return highlighted snippets a page of
+    results at a time.
+    """
+
+    def __init__(self, path, rank_window=10000):
+        self.path = path
+        self.rank_window = rank_window
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        # One connection per thread, and a new one after a fork (gunicorn preloads the app)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def add_document(self, name, filename, file_type, pages, original=None):
+        """Index the pages of a document, replacing any earlier one with the same name.
+
+        `filename` is what results show and `original` the stored upload, if any.
+        Returns the number of pages indexed; errors and empty pages are skipped.
+        """
+        rows = [
+            (page['text'], page['source'], page['page'])
+            for page in pages
+            if page['source'] not in SKIPPED_SOURCES and page['text'].strip()
+        ]
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._delete(conn, name)
+            document_id = conn.execute(
+                "INSERT INTO documents (name, filename, original, file_type, pages, indexed) VALUES (?, ?, ?, ?, ?, ?)",
+                (name, filename, original, file_type, len(rows), time.time())
+            ).lastrowid
+            if rows:
+                conn.executemany(
+                    "INSERT INTO pages (text, source, page, document_id) VALUES (?, ?, ?, ?)",
+                    [row + (document_id,) for row in rows]
+                )
+                last_rowid = conn.execute("SELECT last_insert_rowid()").fetchone()[0]
+                conn.execute(
+                    "UPDATE documents SET first_rowid = ?, last_rowid = ? WHERE id = ?",
+                    (last_rowid - len(rows) + 1, last_rowid, document_id)
+                )
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        return len(rows)
+
+    def _delete(self, conn, name):
+        row = conn.execute("SELECT id, first_rowid, last_rowid FROM documents WHERE name = ?", (name,)).fetchone()
+        if row is None:
+            return
+        if row[1] is not None:
+            conn.execute("DELETE FROM pages WHERE rowid BETWEEN ? AND ?", (row[1], row[2]))
+        conn.execute("DELETE FROM documents WHERE id = ?", (row[0],))
+
+    def remove_document(self, name):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._delete(conn, name)
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def search(self, query, source=None, file_type=None, limit=20, offset=0, snippet_tokens=16):
+        """Pages matching every word of `query`, best first.
+
+        Returns {'results': [...], 'hasMore': bool, 'truncated': bool}, where
+        `truncated` means there were more than `rank_window` matches and only the
+        newest were filtered and ranked. Snippets are HTML-escaped with the matches wrapped in
+        <mark>. Raises ValueError for an empty query.
+        """
+        match = build_match_query(query)
+        if match is None:
+            raise ValueError("Empty search query")
+
+        conn = self._connect()
+        # BM25 scores every match before sorting, so a word on most pages would cost a score per
+        # page. Only the newest `rank_window` matches are ranked (and filtered): walking the
+        # index by rowid is cheap, and the rowid bound then limits what gets read and scored
+        where = "pages MATCH ?"
+        params = [match]
+        cutoff = conn.execute(
+            "SELECT rowid FROM pages WHERE pages MATCH ? ORDER BY rowid DESC LIMIT 1 OFFSET ?",
+            (match, self.rank_window - 1)
+        ).fetchone()
+        if cutoff is not None:
+            where += " AND rowid >= ?"
+            params.append(cutoff[0])
+        if source:
+            where += " AND source = ?"
+            params.append(source)
+        if file_type:
+            where += " AND document_id IN (SELECT id FROM documents WHERE file_type = ?)"
+            params.append(file_type)
+
+        # SQLite only computes the snippet of rows that make it into the LIMIT + OFFSET best, and
+        # a second query by rowid would evaluate the match again. One extra row tells whether
+        # there is a next page without counting every match
+        rows = conn.execute(
+            f"SELECT document_id, page, source, snippet(pages, 0, ?, ?, '…', ?), bm25(pages) "
+            f"FROM pages WHERE {where} ORDER BY bm25(pages) LIMIT ? OFFSET ?",
+            [MARK_START, MARK_END, snippet_tokens] + params + [limit + 1, offset]
+        ).fetchall()
+
+        documents = {}
+        document_ids = {row[0] for row in rows[:limit]}
+        if document_ids:
+            placeholders = ",".join("?" * len(document_ids))
+            for document in conn.execute(
+                f"SELECT id, name, filename, original, file_type, indexed FROM documents WHERE id IN ({placeholders})",
+                list(document_ids)
+            ):
+                documents[document[0]] = document
+
+        results = []
+        for document_id, page, page_source, snippet, score in rows[:limit]:
+            document = documents.get(document_id)
+            if document is None:
+                continue
+            results.append({
+                'document': document[1],
+                'filename': document[2],
+                'original': document[3],
+                'fileType': document[4],
+                'indexed': document[5],
+                'page': page,
+                'source': page_source,
+                'snippet': html.escape(snippet).replace(MARK_START, '<mark>').replace(MARK_END, '</mark>'),
+                'score': round(-score, 4)
+            })
+        return {'results': results, 'hasMore': len(rows) > limit, 'truncated': cutoff is not None}
+
+    def reindex_directory(self, directory, suffix='_extracted.txt', originals=None):
+        """Index every text file in `directory`, replacing what was indexed for them.
+
+        `originals` maps a text file's name to (stored original, file type) when
+        they are known. Returns (documents, pages) indexed.
+        """
+        documents = pages = 0
+        for entry in os.scandir(directory):
+            if not entry.is_file() or not entry.name.endswith(suffix):
+                continue
+            try:
+                text_pages = parse_text_file(entry.path)
+            except (OSError, UnicodeDecodeError) as e:
+                print(f"Warning: Could not read {entry.path} for indexing: {e}")
+                continue
+            original, file_type = (originals or {}).get(entry.name, (None, None))
+            filename = original or entry.name[:-len(suffix)]
+            pages += self.add_document(entry.name, filename, file_type, text_pages, original=original)
+            documents += 1
+        return documents, pages
+
+    def stats(self):
+        conn = self._connect()
+        documents, pages = conn.execute("SELECT count(*), coalesce(sum(pages), 0) FROM documents").fetchone()
+        return {'documents': documents, 'pages': pages}
+
+    def optimize(self):
+        """Merge the index's segments; worth running after a bulk reindex"""
+        self._connect().execute("INSERT INTO pages (pages) VALUES ('optimize')")
@@ -0,0 +1,124 @@
+# speech_backends.py
+import json
+import time
+import hashlib
+import threading
+
+# speech_recognition is imported where it is used, so importing the app doesn't load it
+
+
+class SpeechBackend:
+    """Turns one chunk of mono 16-bit audio (sr.AudioData) into text.
+
+    Implementations raise sr.UnknownValueError when nothing was recognized and
+    sr.RequestError when the engine itself failed, like speech_recognition does.
+    """
+
+    name = None
+
+    def load(self):
+        """Load models up front; called once per worker process"""
+        pass
+
+    def settings(self):
+        """Everything that changes the output, used in the result cache key"""
+        return {'recognizer': self.name}
+
+    def recognize(self, audio_data):
+        raise NotImplementedError
+
+
+class GoogleBackend(SpeechBackend):
+    """The free Google Web Speech API used through speech_recognition (needs network)"""
+
+    name = 'google'
+
+    def __init__(self, language='en-US'):
+        self.language = language
+
+    def settings(self):
+        return {'recognizer': self.name, 'language': self.language}
+
+    def recognize(self, audio_data):
+        import speech_recognition as sr
+
+        return sr.Recognizer().recognize_google(audio_data, language=self.language)
+
+
+class VoskBackend(SpeechBackend):
+    """Offline recognition with a Vosk/Kaldi model, loaded once and shared by all threads"""
+
+    name = 'vosk'
+
+    def __init__(self, model_path):
+        self.model_path = model_path
+        self._model = None
+        self._lock = threading.Lock()
+
+    def settings(self):
+        return {'recognizer': self.name, 'model': self.model_path}
+
+    def load(self):
+        import speech_recognition as sr
+
+        with self._lock:
+            if self._model is None:
+                try:
+                    import vosk
+                except ImportError:
+                    raise sr.RequestError("The vosk backend needs the 'vosk' package (pip install vosk)")
+                vosk.SetLogLevel(-1)
+                self._model = vosk.Model(self.model_path)
+        return self._model
+
+    def recognize(self, audio_data):
+        import vosk
+        import speech_recognition as sr
+
+        model = self.load()
+        # Vosk wants 16-bit mono PCM at the rate the recognizer was created with
+        raw_data = audio_data.get_raw_data(convert_rate=16000, convert_width=2)
+        recognizer = vosk.KaldiRecognizer(model, 16000)
+        recognizer.AcceptWaveform(raw_data)
+        text = json.loads(recognizer.FinalResult()).get('text', '')
+        if not text.strip():
+            raise sr.UnknownValueError()
+        return text
+
+
+class StubBackend(SpeechBackend):
+    """Deterministic stand-in for tests and benchmarks that needs no model or network.
+
+    The text depends only on the audio content, and `delay_per_second` can be set
+    to simulate an engine's cost per second of audio.
+    """
+
+    name = 'stub'
+
+    def __init__(self, delay_per_second=0.0):
+        self.delay_per_second = delay_per_second
+
+    def recognize(self, audio_data):
+        import speech_recognition as sr
+
+        raw_data = audio_data.get_raw_data()
+        seconds = len(raw_data) / float(audio_data.sample_rate * audio_data.sample_width)
+        if self.delay_per_second:
+            time.sleep(seconds * self.delay_per_second)
+        if not any(raw_data):
+            raise sr.UnknownValueError()
+        digest = hashlib.sha1(raw_data).hexdigest()[:8]
+        return f"stub transcript {seconds:.2f}s {digest}"
+
+
+def create_backend(name, language='en-US', vosk_model_path=None, stub_delay=0.0):
+    """Build the backend selected by configuration"""
+    if name == 'google':
+        return GoogleBackend(language=language)
+    elif name == 'vosk':
+        if not vosk_model_path:
+            raise ValueError("SPEECH_MODEL_PATH must point to a Vosk model directory for the vosk backend")
+        return VoskBackend(vosk_model_path)
+    elif name == 'stub':
+        return StubBackend(delay_per_second=stub_delay)
+    raise ValueError(f"Unknown speech backend: {name}")
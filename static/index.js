@@ -208,7 +208,7 @@ document.addEventListener('DOMContentLoaded', () => {
                 
                 // Add click to enlarge functionality
                 image.addEventListener('click', () => {
-                    createImageModal(page.image, `Page ${page.page}`);
+                    createImageModal(page.imageFull || page.image, `Page ${page.page}`);
                 });
                 
                 imageContainer.appendChild(image);
@@ -604,7 +604,8 @@ document.addEventListener('DOMContentLoaded', () => {
         results.classList.add('hidden');
         
         try {
-            const response = await fetch('/upload', {
+            // Ask for NDJSON so each page is shown as soon as the server has extracted it
+            const response = await fetch('/upload?stream=1', {
                 method: 'POST',
                 body: formData
             });
@@ -613,38 +614,38 @@ document.addEventListener('DOMContentLoaded', () => {
                 throw new Error(`Server responded with status: ${response.status}`);
             }
             
-            const data = await response.json();
-            
-            if (data.error) {
-                showNotification(`Error: ${data.error}`, 'error');
-                uploadForm.classList.remove('hidden');
-                loading.classList.add('hidden');
-                return;
-            }
+            let fileType = null;
+            let pageCount = 0;
+            let streamError = null;
             
-            // Display results
-            filenameDisplay.textContent = data.filename;
-            displayResults(data.pages, data.fileType);
+            await readNdjson(response, (message) => {
+                if (message.type === 'start') {
+                    // Display results as pages arrive
+                    fileType = message.fileType;
+                    filenameDisplay.textContent = message.filename;
+                    pagesContainer.innerHTML = '';
+                    downloadOptions.classList.add('hidden');
+                    showResults();
+                } else if (message.type === 'page') {
+                    appendPage(message.page, pageCount, fileType);
+                    pageCount++;
+                } else if (message.type === 'done') {
+                    // Set up download links
+                    if (message.downloadLinks) {
+                        downloadOriginal.href = message.downloadLinks.original;
+                        downloadText.href = message.downloadLinks.text;
+                        downloadOptions.classList.remove('hidden');
+                    }
+                } else if (message.type === 'error') {
+                    streamError = message.error;
+                }
+            });
             
-            // Set up download links
-            if (data.downloadLinks) {
-                downloadOriginal.href = data.downloadLinks.original;
-                downloadText.href = data.downloadLinks.text;
-                downloadOptions.classList.remove('hidden');
+            if (streamError) {
+                showNotification(`Error: ${streamError}`, 'error');
+                return;
             }
             
-            // Show results section with animation
-            results.classList.remove('hidden');
-            results.style.opacity = '0';
-            results.style.transform = 'translateY(20px)';
-            
-            // Trigger reflow to ensure animation plays
-            void results.offsetWidth;
-            
-            results.style.transition = 'opacity 0.5s ease, transform 0.5s ease';
-            results.style.opacity = '1';
-            results.style.transform = 'translateY(0)';
-            
             showNotification('Content extracted successfully!', 'success');
         } catch (error) {
             console.error('Error uploading file:', error);
@@ -657,454 +658,494 @@ document.addEventListener('DOMContentLoaded', () => {
         }
     });
     
-    function displayResults(pages, fileType) {
-        pagesContainer.innerHTML = '';
+    // Read a newline-delimited JSON response, calling onMessage for every line as it arrives
+    async function readNdjson(response, onMessage) {
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
         
-        pages.forEach((page, index) => {
-            const pageElement = document.createElement('div');
-            pageElement.classList.add('page');
-            pageElement.style.animationDelay = `${index * 0.1}s`;
-            
-            const pageHeader = document.createElement('div');
-            pageHeader.classList.add('page-header');
-            const pageTitle = document.createElement('div');
-            pageTitle.classList.add('page-title');
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) {
+                break;
+            }
             
-            // Set appropriate title based on file type
-            if (fileType === 'audio') {
-                pageTitle.textContent = `Audio Track ${page.page}`;
-            } else if (fileType === 'video') {
-                pageTitle.textContent = `Video Segment ${page.page}`;
-            } else {
-                pageTitle.textContent = `Page ${page.page}`;
+            buffer += decoder.decode(value, { stream: true });
+            let newline;
+            while ((newline = buffer.indexOf('\n')) >= 0) {
+                const line = buffer.slice(0, newline).trim();
+                buffer = buffer.slice(newline + 1);
+                if (line) {
+                    onMessage(JSON.parse(line));
+                }
             }
+        }
+        
+        buffer += decoder.decode();
+        if (buffer.trim()) {
+            onMessage(JSON.parse(buffer));
+        }
+    }
+    
+    // Show results section with animation
+    function showResults() {
+        results.classList.remove('hidden');
+        results.style.opacity = '0';
+        results.style.transform = 'translateY(20px)';
+        
+        // Trigger reflow to ensure animation plays
+        void results.offsetWidth;
+        
+        results.style.transition = 'opacity 0.5s ease, transform 0.5s ease';
+        results.style.opacity = '1';
+        results.style.transform = 'translateY(0)';
+    }
+    
+    function appendPage(page, index, fileType) {
+        const pageElement = document.createElement('div');
+        pageElement.classList.add('page');
+        // Cap the stagger so late pages of a long stream are not held back
+        pageElement.style.animationDelay = `${Math.min(index, 10) * 0.1}s`;
+        
+        const pageHeader = document.createElement('div');
+        pageHeader.classList.add('page-header');
+        const pageTitle = document.createElement('div');
+        pageTitle.classList.add('page-title');
+        
+        // Set appropriate title based on file type
+        if (fileType === 'audio') {
+            pageTitle.textContent = `Audio Track ${page.page}`;
+        } else if (fileType === 'video') {
+            pageTitle.textContent = `Video Segment ${page.page}`;
+        } else {
+            pageTitle.textContent = `Page ${page.page}`;
+        }
+        
+        const sourceTag = document.createElement('span');
+        sourceTag.classList.add('source-tag');
+        
+        if (page.source === 'digital') {
+            sourceTag.classList.add('source-digital');
+            sourceTag.textContent = 'Digital Text';
+        } else if (page.source === 'ocr') {
+            sourceTag.classList.add('source-ocr');
+            sourceTag.textContent = 'OCR Text';
+        } else if (page.source === 'speech') {
+            sourceTag.classList.add('source-speech');
+            sourceTag.textContent = 'Speech-to-Text';
+        } else if (page.source === 'video') {
+            sourceTag.classList.add('source-video');
+            sourceTag.textContent = 'Video Speech-to-Text';
+        } else {
+            sourceTag.classList.add('source-none');
+            sourceTag.textContent = 'No Text';
+        }
+        
+        pageHeader.appendChild(pageTitle);
+        pageHeader.appendChild(sourceTag);
+        pageElement.appendChild(pageHeader);
+        
+        // Add media previews based on file type
+        if (fileType === 'image' && page.image) {
+            const imageContainer = document.createElement('div');
+            imageContainer.classList.add('page-image');
             
-            const sourceTag = document.createElement('span');
-            sourceTag.classList.add('source-tag');
+            const image = document.createElement('img');
+            image.src = page.image;
+            image.alt = `Page ${page.page} Image`;
+            image.loading = "lazy"; // Lazy loading for better performance
             
-            if (page.source === 'digital') {
-                sourceTag.classList.add('source-digital');
-                sourceTag.textContent = 'Digital Text';
-            } else if (page.source === 'ocr') {
-                sourceTag.classList.add('source-ocr');
-                sourceTag.textContent = 'OCR Text';
-            } else if (page.source === 'speech') {
-                sourceTag.classList.add('source-speech');
-                sourceTag.textContent = 'Speech-to-Text';
-            } else if (page.source === 'video') {
-                sourceTag.classList.add('source-video');
-                sourceTag.textContent = 'Video Speech-to-Text';
-            } else {
-                sourceTag.classList.add('source-none');
-                sourceTag.textContent = 'No Text';
-            }
+            // Add click to enlarge functionality
+            image.addEventListener('click', () => {
+                createImageModal(page.imageFull || page.image, `Page ${page.page}`);
+            });
             
-            pageHeader.appendChild(pageTitle);
-            pageHeader.appendChild(sourceTag);
-            pageElement.appendChild(pageHeader);
+            imageContainer.appendChild(image);
+            pageElement.appendChild(imageContainer);
+        } else if (fileType === 'audio' && page.audio) {
+            const audioContainer = document.createElement('div');
+            audioContainer.classList.add('page-audio');
             
-            // Add media previews based on file type
-            if (fileType === 'image' && page.image) {
-                const imageContainer = document.createElement('div');
-                imageContainer.classList.add('page-image');
-                
-                const image = document.createElement('img');
-                image.src = page.image;
-                image.alt = `Page ${page.page} Image`;
-                image.loading = "lazy"; // Lazy loading for better performance
-                
-                // Add click to enlarge functionality
-                image.addEventListener('click', () => {
-                    createImageModal(page.image, `Page ${page.page}`);
-                });
-                
-                imageContainer.appendChild(image);
-                pageElement.appendChild(imageContainer);
-            } else if (fileType === 'audio' && page.audio) {
-                const audioContainer = document.createElement('div');
-                audioContainer.classList.add('page-audio');
-                
-                // Create waveform visualization for audio
-                const waveformDiv = document.createElement('div');
-                waveformDiv.classList.add('audio-waveform');
-                waveformDiv.id = `waveform-${index}`;
-                audioContainer.appendChild(waveformDiv);
-                
-                // Add audio player with enhanced controls
-                const audioPlayer = document.createElement('div');
-                audioPlayer.classList.add('audio-player');
-                
-                const audio = document.createElement('audio');
-                audio.id = `audio-${index}`;
-                audio.controls = true;
-                audio.src = page.audio;
-                audio.preload = "metadata";
+            // Create waveform visualization for audio
+            const waveformDiv = document.createElement('div');
+            waveformDiv.classList.add('audio-waveform');
+            waveformDiv.id = `waveform-${index}`;
+            audioContainer.appendChild(waveformDiv);
+            
+            // Add audio player with enhanced controls
+            const audioPlayer = document.createElement('div');
+            audioPlayer.classList.add('audio-player');
+            
+            const audio = document.createElement('audio');
+            audio.id = `audio-${index}`;
+            audio.controls = true;
+            audio.src = page.audio;
+            audio.preload = "metadata";
+            
+            // Add custom play button
+            const playButton = document.createElement('button');
+            playButton.classList.add('play-button');
+            playButton.innerHTML = '<i class="fas fa-play"></i>';
+            playButton.addEventListener('click', () => {
+                if (audio.paused) {
+                    audio.play();
+                    playButton.innerHTML = '<i class="fas fa-pause"></i>';
+                } else {
+                    audio.pause();
+                    playButton.innerHTML = '<i class="fas fa-play"></i>';
+                }
+            });
+            
+            // Add time display
+            const timeDisplay = document.createElement('div');
+            timeDisplay.classList.add('time-display');
+            timeDisplay.innerHTML = '0:00 / 0:00';
+            
+            // Add progress bar
+            const progressContainer = document.createElement('div');
+            progressContainer.classList.add('progress-container');
+            
+            const progressBar = document.createElement('div');
+            progressBar.classList.add('progress-bar');
+            
+            const progress = document.createElement('div');
+            progress.classList.add('progress');
+            
+            progressBar.appendChild(progress);
+            progressContainer.appendChild(progressBar);
+            
+            // Update progress bar and time display when audio plays
+            audio.addEventListener('timeupdate', () => {
+                const currentTime = formatTime(audio.currentTime);
+                const duration = formatTime(audio.duration);
+                timeDisplay.innerHTML = `${currentTime} / ${duration}`;
                 
-                // Add custom play button
-                const playButton = document.createElement('button');
-                playButton.classList.add('play-button');
+                const progressPercent = (audio.currentTime / audio.duration) * 100;
+                progress.style.width = `${progressPercent}%`;
+            });
+            
+            // Allow clicking on progress bar to seek
+            progressContainer.addEventListener('click', (e) => {
+                const percent = e.offsetX / progressContainer.offsetWidth;
+                audio.currentTime = percent * audio.duration;
+            });
+            
+            // Update button when audio ends
+            audio.addEventListener('ended', () => {
                 playButton.innerHTML = '<i class="fas fa-play"></i>';
-                playButton.addEventListener('click', () => {
-                    if (audio.paused) {
-                        audio.play();
-                        playButton.innerHTML = '<i class="fas fa-pause"></i>';
-                    } else {
-                        audio.pause();
-                        playButton.innerHTML = '<i class="fas fa-play"></i>';
-                    }
-                });
-                
-                // Add time display
-                const timeDisplay = document.createElement('div');
-                timeDisplay.classList.add('time-display');
-                timeDisplay.innerHTML = '0:00 / 0:00';
-                
-                // Add progress bar
-                const progressContainer = document.createElement('div');
-                progressContainer.classList.add('progress-container');
-                
-                const progressBar = document.createElement('div');
-                progressBar.classList.add('progress-bar');
-                
-                const progress = document.createElement('div');
-                progress.classList.add('progress');
-                
-                progressBar.appendChild(progress);
-                progressContainer.appendChild(progressBar);
-                
-                // Update progress bar and time display when audio plays
-                audio.addEventListener('timeupdate', () => {
-                    const currentTime = formatTime(audio.currentTime);
-                    const duration = formatTime(audio.duration);
-                    timeDisplay.innerHTML = `${currentTime} / ${duration}`;
+            });
+            
+            // Add audio speed control
+            const speedControl = document.createElement('select');
+            speedControl.classList.add('speed-control');
+            
+            const speeds = [0.5, 0.75, 1.0, 1.25, 1.5, 2.0];
+            speeds.forEach(speed => {
+                const option = document.createElement('option');
+                option.value = speed;
+                option.textContent = `${speed}x`;
+                if (speed === 1.0) option.selected = true;
+                speedControl.appendChild(option);
+            });
+            
+            speedControl.addEventListener('change', () => {
+                audio.playbackRate = parseFloat(speedControl.value);
+            });
+            
+            // Assemble audio player controls
+            const controlsContainer = document.createElement('div');
+            controlsContainer.classList.add('audio-controls');
+            controlsContainer.appendChild(playButton);
+            controlsContainer.appendChild(progressContainer);
+            controlsContainer.appendChild(timeDisplay);
+            controlsContainer.appendChild(speedControl);
+            
+            audioPlayer.appendChild(audio);
+            audioPlayer.appendChild(controlsContainer);
+            audioContainer.appendChild(audioPlayer);
+            
+            pageElement.appendChild(audioContainer);
+            
+            // Initialize waveform visualization after page is added to DOM
+            setTimeout(() => {
+                if (typeof WaveSurfer !== 'undefined') {
+                    const wavesurfer = WaveSurfer.create({
+                        container: `#waveform-${index}`,
+                        waveColor: 'var(--primary-color-light)',
+                        progressColor: 'var(--primary-color)',
+                        cursorColor: 'var(--accent-color)',
+                        barWidth: 2,
+                        barRadius: 3,
+                        responsive: true,
+                        height: 80
+                    });
                     
-                    const progressPercent = (audio.currentTime / audio.duration) * 100;
-                    progress.style.width = `${progressPercent}%`;
-                });
-                
-                // Allow clicking on progress bar to seek
-                progressContainer.addEventListener('click', (e) => {
-                    const percent = e.offsetX / progressContainer.offsetWidth;
-                    audio.currentTime = percent * audio.duration;
-                });
-                
-                // Update button when audio ends
-                audio.addEventListener('ended', () => {
-                    playButton.innerHTML = '<i class="fas fa-play"></i>';
-                });
-                
-                // Add audio speed control
-                const speedControl = document.createElement('select');
-                speedControl.classList.add('speed-control');
-                
-                const speeds = [0.5, 0.75, 1.0, 1.25, 1.5, 2.0];
-                speeds.forEach(speed => {
-                    const option = document.createElement('option');
-                    option.value = speed;
-                    option.textContent = `${speed}x`;
-                    if (speed === 1.0) option.selected = true;
-                    speedControl.appendChild(option);
-                });
-                
-                speedControl.addEventListener('change', () => {
-                    audio.playbackRate = parseFloat(speedControl.value);
-                });
-                
-                // Assemble audio player controls
-                const controlsContainer = document.createElement('div');
-                controlsContainer.classList.add('audio-controls');
-                controlsContainer.appendChild(playButton);
-                controlsContainer.appendChild(progressContainer);
-                controlsContainer.appendChild(timeDisplay);
-                controlsContainer.appendChild(speedControl);
-                
-                audioPlayer.appendChild(audio);
-                audioPlayer.appendChild(controlsContainer);
-                audioContainer.appendChild(audioPlayer);
-                
-                pageElement.appendChild(audioContainer);
-                
-                // Initialize waveform visualization after page is added to DOM
-                setTimeout(() => {
-                    if (typeof WaveSurfer !== 'undefined') {
-                        const wavesurfer = WaveSurfer.create({
-                            container: `#waveform-${index}`,
-                            waveColor: 'var(--primary-color-light)',
-                            progressColor: 'var(--primary-color)',
-                            cursorColor: 'var(--accent-color)',
-                            barWidth: 2,
-                            barRadius: 3,
-                            responsive: true,
-                            height: 80
+                    wavesurfer.load(page.audio);
+                    
+                    // Connect waveform to audio element
+                    wavesurfer.on('ready', () => {
+                        // Connect play button
+                        playButton.addEventListener('click', () => {
+                            wavesurfer.playPause();
                         });
                         
-                        wavesurfer.load(page.audio);
-                        
-                        // Connect waveform to audio element
-                        wavesurfer.on('ready', () => {
-                            // Connect play button
-                            playButton.addEventListener('click', () => {
-                                wavesurfer.playPause();
-                            });
-                            
-                            // Connect waveform clicks to audio element
-                            wavesurfer.on('seek', () => {
-                                audio.currentTime = wavesurfer.getCurrentTime();
-                            });
+                        // Connect waveform clicks to audio element
+                        wavesurfer.on('seek', () => {
+                            audio.currentTime = wavesurfer.getCurrentTime();
                         });
-                    }
-                }, 100);
-            } else if (fileType === 'video' && page.video) {
-                const videoContainer = document.createElement('div');
-                videoContainer.classList.add('page-video');
+                    });
+                }
+            }, 100);
+        } else if (fileType === 'video' && page.video) {
+            const videoContainer = document.createElement('div');
+            videoContainer.classList.add('page-video');
+            
+            // Create video player with enhanced controls
+            const videoPlayer = document.createElement('div');
+            videoPlayer.classList.add('video-player');
+            
+            const video = document.createElement('video');
+            video.id = `video-${index}`;
+            video.controls = true;
+            video.src = page.video;
+            video.poster = page.thumbnail || (page.frames && page.frames.length > 0 ? page.frames[0] : '');
+            video.preload = "metadata";
+            
+            videoPlayer.appendChild(video);
+            videoContainer.appendChild(videoPlayer);
+            pageElement.appendChild(videoContainer);
+            
+            // Add custom video controls if desired
+            const customControls = document.createElement('div');
+            customControls.classList.add('custom-video-controls');
+            
+            // Add frame navigation if frames are available
+            if (page.frames && page.frames.length > 0) {
+                const framesContainer = document.createElement('div');
+                framesContainer.classList.add('video-frames');
                 
-                // Create video player with enhanced controls
-                const videoPlayer = document.createElement('div');
-                videoPlayer.classList.add('video-player');
+                // Add frame navigation buttons
+                const prevFrameBtn = document.createElement('button');
+                prevFrameBtn.classList.add('frame-nav-btn');
+                prevFrameBtn.innerHTML = '<i class="fas fa-step-backward"></i>';
                 
-                const video = document.createElement('video');
-                video.id = `video-${index}`;
-                video.controls = true;
-                video.src = page.video;
-                video.poster = page.thumbnail || (page.frames && page.frames.length > 0 ? page.frames[0] : '');
-                video.preload = "metadata";
+                const nextFrameBtn = document.createElement('button');
+                nextFrameBtn.classList.add('frame-nav-btn');
+                nextFrameBtn.innerHTML = '<i class="fas fa-step-forward"></i>';
                 
-                videoPlayer.appendChild(video);
-                videoContainer.appendChild(videoPlayer);
-                pageElement.appendChild(videoContainer);
+                let currentFrameIndex = 0;
                 
-                // Add custom video controls if desired
-                const customControls = document.createElement('div');
-                customControls.classList.add('custom-video-controls');
+                // Create frame thumbnails slider
+                const frameThumbnails = document.createElement('div');
+                frameThumbnails.classList.add('frame-thumbnails');
                 
-                // Add frame navigation if frames are available
-                if (page.frames && page.frames.length > 0) {
-                    const framesContainer = document.createElement('div');
-                    framesContainer.classList.add('video-frames');
-                    
-                    // Add frame navigation buttons
-                    const prevFrameBtn = document.createElement('button');
-                    prevFrameBtn.classList.add('frame-nav-btn');
-                    prevFrameBtn.innerHTML = '<i class="fas fa-step-backward"></i>';
-                    
-                    const nextFrameBtn = document.createElement('button');
-                    nextFrameBtn.classList.add('frame-nav-btn');
-                    nextFrameBtn.innerHTML = '<i class="fas fa-step-forward"></i>';
-                    
-                    let currentFrameIndex = 0;
+                page.frames.forEach((frame, frameIdx) => {
+                    const frameImg = document.createElement('img');
+                    frameImg.src = frame;
+                    frameImg.alt = `Frame ${frameIdx + 1}`;
+                    frameImg.className = 'video-frame-thumbnail';
                     
-                    // Create frame thumbnails slider
-                    const frameThumbnails = document.createElement('div');
-                    frameThumbnails.classList.add('frame-thumbnails');
+                    // Set data attribute for timestamp if available
+                    if (page.frameTimestamps && page.frameTimestamps[frameIdx]) {
+                        frameImg.dataset.timestamp = page.frameTimestamps[frameIdx];
+                    }
                     
-                    page.frames.forEach((frame, frameIdx) => {
-                        const frameImg = document.createElement('img');
-                        frameImg.src = frame;
-                        frameImg.alt = `Frame ${frameIdx + 1}`;
-                        frameImg.className = 'video-frame-thumbnail';
-                        
-                        // Set data attribute for timestamp if available
-                        if (page.frameTimestamps && page.frameTimestamps[frameIdx]) {
-                            frameImg.dataset.timestamp = page.frameTimestamps[frameIdx];
+                    frameImg.addEventListener('click', () => {
+                        // If timestamp available, seek to that position
+                        if (frameImg.dataset.timestamp) {
+                            video.currentTime = parseFloat(frameImg.dataset.timestamp);
                         }
                         
-                        frameImg.addEventListener('click', () => {
-                            // If timestamp available, seek to that position
-                            if (frameImg.dataset.timestamp) {
-                                video.currentTime = parseFloat(frameImg.dataset.timestamp);
-                            }
-                            
-                            // Update current frame index
-                            currentFrameIndex = frameIdx;
-                            
-                            // Show frame in modal
-                            createImageModal(frame, `Frame ${frameIdx + 1}`);
-                        });
+                        // Update current frame index
+                        currentFrameIndex = frameIdx;
                         
-                        frameThumbnails.appendChild(frameImg);
-                    });
-                    
-                    // Frame navigation logic
-                    prevFrameBtn.addEventListener('click', () => {
-                        if (currentFrameIndex > 0) {
-                            currentFrameIndex--;
-                            const frameImg = frameThumbnails.children[currentFrameIndex];
-                            frameImg.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
-                            
-                            // If timestamp available, seek to that position
-                            if (frameImg.dataset.timestamp) {
-                                video.currentTime = parseFloat(frameImg.dataset.timestamp);
-                            }
-                        }
+                        // Show frame in modal
+                        createImageModal(frame, `Frame ${frameIdx + 1}`);
                     });
                     
-                    nextFrameBtn.addEventListener('click', () => {
-                        if (currentFrameIndex < page.frames.length - 1) {
-                            currentFrameIndex++;
-                            const frameImg = frameThumbnails.children[currentFrameIndex];
-                            frameImg.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
-                            
-                            // If timestamp available, seek to that position
-                            if (frameImg.dataset.timestamp) {
-                                video.currentTime = parseFloat(frameImg.dataset.timestamp);
-                            }
-                        }
-                    });
-                    
-                    framesContainer.appendChild(prevFrameBtn);
-                    framesContainer.appendChild(frameThumbnails);
-                    framesContainer.appendChild(nextFrameBtn);
-                    
-                    videoContainer.appendChild(framesContainer);
-                }
+                    frameThumbnails.appendChild(frameImg);
+                });
                 
-                // Add caption display if captions available
-                if (page.captions) {
-                    const captionsContainer = document.createElement('div');
-                    captionsContainer.classList.add('video-captions');
-                    
-                    // Create caption track element
-                    const track = document.createElement('track');
-                    track.kind = 'subtitles';
-                    track.label = 'English';
-                    track.srclang = 'en';
-                    track.src = page.captions;
-                    track.default = true;
-                    
-                    video.appendChild(track);
-                    
-                    // Add caption toggle button
-                    const captionBtn = document.createElement('button');
-                    captionBtn.classList.add('caption-btn');
-                    captionBtn.innerHTML = '<i class="fas fa-closed-captioning"></i>';
-                    captionBtn.title = "Toggle Captions";
-                    
-                    let captionsEnabled = true;
-                    captionBtn.addEventListener('click', () => {
-                        captionsEnabled = !captionsEnabled;
-                        video.textTracks[0].mode = captionsEnabled ? 'showing' : 'hidden';
+                // Frame navigation logic
+                prevFrameBtn.addEventListener('click', () => {
+                    if (currentFrameIndex > 0) {
+                        currentFrameIndex--;
+                        const frameImg = frameThumbnails.children[currentFrameIndex];
+                        frameImg.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
                         
-                        if (captionsEnabled) {
-                            captionBtn.classList.add('active');
-                        } else {
-                            captionBtn.classList.remove('active');
+                        // If timestamp available, seek to that position
+                        if (frameImg.dataset.timestamp) {
+                            video.currentTime = parseFloat(frameImg.dataset.timestamp);
                         }
-                    });
-                    
-                    customControls.appendChild(captionBtn);
-                }
-                
-                // Add video speed control
-                const videoSpeedControl = document.createElement('select');
-                videoSpeedControl.classList.add('speed-control');
-                
-                const videoSpeeds = [0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0];
-                videoSpeeds.forEach(speed => {
-                    const option = document.createElement('option');
-                    option.value = speed;
-                    option.textContent = `${speed}x`;
-                    if (speed === 1.0) option.selected = true;
-                    videoSpeedControl.appendChild(option);
+                    }
                 });
                 
-                videoSpeedControl.addEventListener('change', () => {
-                    video.playbackRate = parseFloat(videoSpeedControl.value);
+                nextFrameBtn.addEventListener('click', () => {
+                    if (currentFrameIndex < page.frames.length - 1) {
+                        currentFrameIndex++;
+                        const frameImg = frameThumbnails.children[currentFrameIndex];
+                        frameImg.scrollIntoView({ behavior: 'smooth', block: 'nearest' });
+                        
+                        // If timestamp available, seek to that position
+                        if (frameImg.dataset.timestamp) {
+                            video.currentTime = parseFloat(frameImg.dataset.timestamp);
+                        }
+                    }
                 });
                 
-                customControls.appendChild(videoSpeedControl);
-                videoContainer.appendChild(customControls);
+                framesContainer.appendChild(prevFrameBtn);
+                framesContainer.appendChild(frameThumbnails);
+                framesContainer.appendChild(nextFrameBtn);
+                
+                videoContainer.appendChild(framesContainer);
             }
             
-            // Add text content with improved styling
-            if (page.text && page.text.trim()) {
-                const textContainer = document.createElement('div');
-                textContainer.classList.add('text-container');
+            // Add caption display if captions available
+            if (page.captions) {
+                const captionsContainer = document.createElement('div');
+                captionsContainer.classList.add('video-captions');
                 
-                const textHeader = document.createElement('div');
-                textHeader.classList.add('text-header');
-                textHeader.innerHTML = '<i class="fas fa-align-left"></i> Extracted Text';
-                textContainer.appendChild(textHeader);
+                // Create caption track element
+                const track = document.createElement('track');
+                track.kind = 'subtitles';
+                track.label = 'English';
+                track.srclang = 'en';
+                track.src = page.captions;
+                track.default = true;
                 
-                const textContent = document.createElement('div');
-                textContent.classList.add('text-content');
+                video.appendChild(track);
                 
-                // Format the text with proper paragraphs
-                const formattedText = page.text
-                    .split('\n')
-                    .filter(line => line.trim() !== '')
-                    .map(line => `<p>${line}</p>`)
-                    .join('');
+                // Add caption toggle button
+                const captionBtn = document.createElement('button');
+                captionBtn.classList.add('caption-btn');
+                captionBtn.innerHTML = '<i class="fas fa-closed-captioning"></i>';
+                captionBtn.title = "Toggle Captions";
                 
-                textContent.innerHTML = formattedText || '<p class="no-text">No text could be extracted.</p>';
-                textContainer.appendChild(textContent);
+                let captionsEnabled = true;
+                captionBtn.addEventListener('click', () => {
+                    captionsEnabled = !captionsEnabled;
+                    video.textTracks[0].mode = captionsEnabled ? 'showing' : 'hidden';
+                    
+                    if (captionsEnabled) {
+                        captionBtn.classList.add('active');
+                    } else {
+                        captionBtn.classList.remove('active');
+                    }
+                });
                 
-                // Add text actions
-                const actionsDiv = document.createElement('div');
-                actionsDiv.classList.add('text-actions');
+                customControls.appendChild(captionBtn);
+            }
+            
+            // Add video speed control
+            const videoSpeedControl = document.createElement('select');
+            videoSpeedControl.classList.add('speed-control');
+            
+            const videoSpeeds = [0.25, 0.5, 0.75, 1.0, 1.25, 1.5, 2.0];
+            videoSpeeds.forEach(speed => {
+                const option = document.createElement('option');
+                option.value = speed;
+                option.textContent = `${speed}x`;
+                if (speed === 1.0) option.selected = true;
+                videoSpeedControl.appendChild(option);
+            });
+            
+            videoSpeedControl.addEventListener('change', () => {
+                video.playbackRate = parseFloat(videoSpeedControl.value);
+            });
+            
+            customControls.appendChild(videoSpeedControl);
+            videoContainer.appendChild(customControls);
+        }
+        
+        // Add text content with improved styling
+        if (page.text && page.text.trim()) {
+            const textContainer = document.createElement('div');
+            textContainer.classList.add('text-container');
+            
+            const textHeader = document.createElement('div');
+            textHeader.classList.add('text-header');
+            textHeader.innerHTML = '<i class="fas fa-align-left"></i> Extracted Text';
+            textContainer.appendChild(textHeader);
+            
+            const textContent = document.createElement('div');
+            textContent.classList.add('text-content');
+            
+            // Format the text with proper paragraphs
+            const formattedText = page.text
+                .split('\n')
+                .filter(line => line.trim() !== '')
+                .map(line => `<p>${line}</p>`)
+                .join('');
+            
+            textContent.innerHTML = formattedText || '<p class="no-text">No text could be extracted.</p>';
+            textContainer.appendChild(textContent);
+            
+            // Add text actions
+            const actionsDiv = document.createElement('div');
+            actionsDiv.classList.add('text-actions');
+            
+            const copyBtn = document.createElement('button');
+            copyBtn.classList.add('copy-btn');
+            copyBtn.innerHTML = '<i class="fas fa-copy"></i> Copy Text';
+            copyBtn.addEventListener('click', () => {
+                navigator.clipboard.writeText(page.text)
+                    .then(() => {
+                        const originalText = copyBtn.innerHTML;
+                        copyBtn.innerHTML = '<i class="fas fa-check"></i> Copied!';
+                        copyBtn.classList.add('copied');
+                        setTimeout(() => {
+                            copyBtn.innerHTML = originalText;
+                            copyBtn.classList.remove('copied');
+                        }, 2000);
+                    })
+                    .catch(err => {
+                        console.error('Failed to copy text:', err);
+                        showNotification('Failed to copy text. Please try again.', 'error');
+                    });
+            });
+            actionsDiv.appendChild(copyBtn);
+            
+            // Add text-to-speech button if browser supports it
+            if ('speechSynthesis' in window) {
+                const speakBtn = document.createElement('button');
+                speakBtn.classList.add('speak-btn');
+                speakBtn.innerHTML = '<i class="fas fa-volume-up"></i> Read Aloud';
                 
-                const copyBtn = document.createElement('button');
-                copyBtn.classList.add('copy-btn');
-                copyBtn.innerHTML = '<i class="fas fa-copy"></i> Copy Text';
-                copyBtn.addEventListener('click', () => {
-                    navigator.clipboard.writeText(page.text)
-                        .then(() => {
-                            const originalText = copyBtn.innerHTML;
-                            copyBtn.innerHTML = '<i class="fas fa-check"></i> Copied!';
-                            copyBtn.classList.add('copied');
-                            setTimeout(() => {
-                                copyBtn.innerHTML = originalText;
-                                copyBtn.classList.remove('copied');
-                            }, 2000);
-                        })
-                        .catch(err => {
-                            console.error('Failed to copy text:', err);
-                            showNotification('Failed to copy text. Please try again.', 'error');
-                        });
-                });
-                actionsDiv.appendChild(copyBtn);
+                let speaking = false;
                 
-                // Add text-to-speech button if browser supports it
-                if ('speechSynthesis' in window) {
-                    const speakBtn = document.createElement('button');
-                    speakBtn.classList.add('speak-btn');
-                    speakBtn.innerHTML = '<i class="fas fa-volume-up"></i> Read Aloud';
-                    
-                    let speaking = false;
-                    
-                    speakBtn.addEventListener('click', () => {
-                        if (speaking) {
-                            window.speechSynthesis.cancel();
+                speakBtn.addEventListener('click', () => {
+                    if (speaking) {
+                        window.speechSynthesis.cancel();
+                        speakBtn.innerHTML = '<i class="fas fa-volume-up"></i> Read Aloud';
+                        speaking = false;
+                    } else {
+                        const utterance = new SpeechSynthesisUtterance(page.text);
+                        
+                        // Set voice to first available
+                        const voices = window.speechSynthesis.getVoices();
+                        if (voices.length > 0) {
+                            utterance.voice = voices[0];
+                        }
+                        
+                        utterance.onend = () => {
                             speakBtn.innerHTML = '<i class="fas fa-volume-up"></i> Read Aloud';
                             speaking = false;
-                        } else {
-                            const utterance = new SpeechSynthesisUtterance(page.text);
-                            
-                            // Set voice to first available
-                            const voices = window.speechSynthesis.getVoices();
-                            if (voices.length > 0) {
-                                utterance.voice = voices[0];
-                            }
-                            
-                            utterance.onend = () => {
-                                speakBtn.innerHTML = '<i class="fas fa-volume-up"></i> Read Aloud';
-                                speaking = false;
-                            };
-                            
-                            window.speechSynthesis.speak(utterance);
-                            speakBtn.innerHTML = '<i class="fas fa-stop"></i> Stop Reading';
-                            speaking = true;
-                        }
-                    });
-                    
-                    actionsDiv.appendChild(speakBtn);
-                }
+                        };
+                        
+                        window.speechSynthesis.speak(utterance);
+                        speakBtn.innerHTML = '<i class="fas fa-stop"></i> Stop Reading';
+                        speaking = true;
+                    }
+                });
                 
-                textContainer.appendChild(actionsDiv);
-                pageElement.appendChild(textContainer);
+                actionsDiv.appendChild(speakBtn);
             }
             
-            pagesContainer.appendChild(pageElement);
-        });
+            textContainer.appendChild(actionsDiv);
+            pageElement.appendChild(textContainer);
+        }
+        
+        pagesContainer.appendChild(pageElement);
     }
     
     // Helper function to format time in MM:SS
@@ -0,0 +1,85 @@
+# storage.py
+import os
+import tempfile
+
+from flask import Request
+
+
+class SpoolingRequest(Request):
+    """Request that spools uploaded files straight into the upload folder.
+
+    Werkzeug normally buffers uploads in anonymous temporary files, so saving one
+    means copying it. Spooling to a named file on the same filesystem lets
+    `store_upload` rename it into place instead.
+    """
+
+    spool_dir = None
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if not self.spool_dir:
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        stream = tempfile.NamedTemporaryFile('w+b', dir=self.spool_dir, prefix='spool_', delete=False)
+        # Remembered so teardown can remove spool files that were never moved into place
+        self.spool_paths = getattr(self, 'spool_paths', []) + [stream.name]
+        return stream
+
+    def remove_spool_files(self):
+        for path in getattr(self, 'spool_paths', []):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Warning: Could not remove spool file {path}: {e}")
+
+
+def store_upload(file, dest_path):
+    """Put an uploaded file at `dest_path`, renaming its spool file when possible.
+
+    Returns the number of bytes that had to be copied (0 when the file was renamed).
+    """
+    stream = file.stream
+    spool_path = getattr(stream, 'name', None)
+    if isinstance(spool_path, str) and os.path.isfile(spool_path):
+        stream.flush()
+        try:
+            os.replace(spool_path, dest_path)
+            stream.close()
+            return 0
+        except OSError:
+            # Different filesystem; fall back to copying below
+            pass
+
+    file.save(dest_path)
+    return os.path.getsize(dest_path)
+
+
+def store_stream(stream, dest_path, max_bytes=None, chunk_size=1024 * 1024):
+    """Copy a readable stream to `dest_path`, giving up with ValueError past `max_bytes`.
+
+    Returns the number of bytes written. Used for archive members, whose size
+    can't be trusted before they are read.
+    """
+    written = 0
+    try:
+        with open(dest_path, 'wb') as dest:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                written += len(chunk)
+                if max_bytes is not None and written > max_bytes:
+                    raise ValueError(f"File is larger than {max_bytes} bytes")
+                dest.write(chunk)
+    except Exception:
+        remove_file(dest_path)
+        raise
+    return written
+
+
+def remove_file(path):
+    """Delete a file if it exists"""
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
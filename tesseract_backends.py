@@ -0,0 +1,166 @@
+# tesseract_backends.py
+import pytesseract
+
+
+class TesseractBackend:
+    """Runs Tesseract passes on PIL images for ocr_strategy.
+
+    `image_to_data` returns the word lists of pytesseract's Output.DICT ('text',
+    'conf', 'block_num', 'par_num', 'line_num'), and `detect_rotation` the
+    clockwise rotation that makes the page upright, or None when OSD fails.
+    """
+
+    name = None
+
+    def load(self):
+        """Load models up front; called once per OCR worker process"""
+        pass
+
+    def image_to_string(self, image, lang, psm):
+        raise NotImplementedError
+
+    def image_to_data(self, image, lang, psm):
+        raise NotImplementedError
+
+    def detect_rotation(self, image):
+        raise NotImplementedError
+
+
+class PytesseractBackend(TesseractBackend):
+    """The tesseract command line through pytesseract: one process and model load per call"""
+
+    name = 'pytesseract'
+
+    def image_to_string(self, image, lang, psm):
+        # OCR Engine Mode 3 = default
+        return pytesseract.image_to_string(image, lang=lang, config=f'--oem 3 --psm {psm}')
+
+    def image_to_data(self, image, lang, psm):
+        return pytesseract.image_to_data(
+            image, lang=lang, config=f'--oem 3 --psm {psm}', output_type=pytesseract.Output.DICT
+        )
+
+    def detect_rotation(self, image):
+        try:
+            osd = pytesseract.image_to_osd(image, output_type=pytesseract.Output.DICT)
+        except pytesseract.TesseractError:
+            return None
+        return int(osd.get('rotate', 0)), float(osd.get('orientation_conf', 0))
+
+
+class TesserocrBackend(TesseractBackend):
+    """Tesseract's C API through tesserocr, with engines kept loaded in the worker process.
+
+    One engine is initialized per language on first use and reused for every page
+    after that, and images are handed over in memory instead of through temp files.
+    Engines are not thread-safe, which is fine in the single-threaded OCR workers.
+    """
+
+    name = 'tesserocr'
+
+    def __init__(self, lang='eng'):
+        self.lang = lang
+        self._apis = {}
+        self._osd_api = None
+
+    def load(self):
+        self._api(self.lang)
+
+    def _api(self, lang):
+        import tesserocr
+
+        api = self._apis.get(lang)
+        if api is None:
+            api = tesserocr.PyTessBaseAPI(lang=lang, oem=tesserocr.OEM.DEFAULT)
+            self._apis[lang] = api
+        return api
+
+    def _recognize(self, image, lang, psm):
+        api = self._api(lang)
+        api.SetPageSegMode(psm)
+        api.SetImage(image)
+        api.Recognize()
+        return api
+
+    def image_to_string(self, image, lang, psm):
+        api = self._recognize(image, lang, psm)
+        try:
+            return api.GetUTF8Text()
+        finally:
+            api.Clear()
+
+    def image_to_data(self, image, lang, psm):
+        import tesserocr
+
+        api = self._recognize(image, lang, psm)
+        data = {'text': [], 'conf': [], 'block_num': [], 'par_num': [], 'line_num': []}
+        try:
+            iterator = api.GetIterator()
+            if iterator is None:
+                return data
+
+            # Number blocks, paragraphs and lines the way the tesseract TSV output does
+            block = par = line = 0
+            level = tesserocr.RIL.WORD
+            for word in tesserocr.iterate_level(iterator, level):
+                if word.IsAtBeginningOf(tesserocr.RIL.BLOCK):
+                    block, par, line = block + 1, 0, 0
+                if word.IsAtBeginningOf(tesserocr.RIL.PARA):
+                    par, line = par + 1, 0
+                if word.IsAtBeginningOf(tesserocr.RIL.TEXTLINE):
+                    line += 1
+                data['text'].append(word.GetUTF8Text(level) or "")
+                data['conf'].append(word.Confidence(level))
+                data['block_num'].append(block)
+                data['par_num'].append(par)
+                data['line_num'].append(line)
+            return data
+        finally:
+            api.Clear()
+
+    def detect_rotation(self, image):
+        import tesserocr
+
+        if self._osd_api is None:
+            self._osd_api = tesserocr.PyTessBaseAPI(lang='osd', psm=tesserocr.PSM.OSD_ONLY)
+        self._osd_api.SetImage(image)
+        try:
+            osd = self._osd_api.DetectOrientationScript()
+        except RuntimeError:
+            return None
+        finally:
+            self._osd_api.Clear()
+        if not osd:
+            return None
+        # orient_deg is how far the page is turned; the correction goes the other way
+        return (360 - int(osd['orient_deg'])) % 360, float(osd['orient_conf'])
+
+
+# Backends of this process, so engines are created once per OCR worker
+_backends = {}
+
+
+def get_backend(name='auto', lang='eng'):
+    """Backend selected by configuration, falling back to pytesseract when tesserocr is unavailable"""
+    key = (name, lang)
+    backend = _backends.get(key)
+    if backend is not None:
+        return backend
+
+    backend = None
+    if name in ('auto', 'tesserocr'):
+        try:
+            backend = TesserocrBackend(lang=lang)
+            backend.load()
+        except Exception as e:
+            # ImportError without the package, RuntimeError when the model can't be loaded
+            if name == 'tesserocr':
+                print(f"Warning: tesserocr backend unavailable, using pytesseract: {e}")
+            backend = None
+    elif name != 'pytesseract':
+        raise ValueError(f"Unknown Tesseract backend: {name}")
+
+    if backend is None:
+        backend = PytesseractBackend()
+    _backends[key] = backend
+    return backend
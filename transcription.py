@@ -0,0 +1,189 @@
+# transcription.py
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+FULL_SCALE = 32768.0 ** 2  # Mean square of a full-scale 16-bit signal, the 0 dBFS reference
+
+
+class StreamingSegmenter:
+    """Cuts a stream of 16-bit mono PCM at silences into chunks of at most `max_chunk_ms`.
+
+    Audio is fed in blocks of any size and analysed in `frame_ms` frames. A frame
+    is silent when it is `silence_thresh_offset` dB below the average loudness of
+    the audio seen so far. Chunks end `keep_silence` ms after their last speech,
+    in the latest silence of at least `min_silence_len` ms, or at `max_chunk_ms`
+    when there is none. Only the chunk being built is buffered, and chunks without
+    speech are never produced.
+    """
+
+    def __init__(self, sample_rate=16000, max_chunk_ms=30000, min_silence_len=500, silence_thresh_offset=-16,
+                 keep_silence=200, frame_ms=10):
+        self.sample_rate = sample_rate
+        self.max_chunk_ms = max_chunk_ms
+        self.min_silence_len = min_silence_len
+        self.silence_thresh_offset = silence_thresh_offset
+        self.keep_silence = keep_silence
+        self.frame_ms = frame_ms
+        self.bytes_per_ms = sample_rate * 2 // 1000
+        self.frame_bytes = self.bytes_per_ms * frame_ms
+
+        self._pending = b""
+        self._buffer = bytearray()
+        self._start_ms = 0  # Position of the buffer's first byte in the stream
+        self._speech_end = None  # End of the buffer's last speech frame, in ms from its start
+        self._cut = None  # Where the buffer can be cut, in ms from its start
+        self._silence_ms = 0
+        self._sum_squares = 0.0
+        self._samples = 0
+
+    def _chunk(self, end_ms):
+        chunk = (self._start_ms, self._start_ms + end_ms, bytes(self._buffer[:end_ms * self.bytes_per_ms]))
+        del self._buffer[:end_ms * self.bytes_per_ms]
+        self._start_ms += end_ms
+        self._speech_end = self._speech_end - end_ms if self._speech_end is not None and self._speech_end > end_ms else None
+        self._cut = None
+        return chunk
+
+    def feed(self, data):
+        """Add PCM bytes and return the (start_ms, end_ms, pcm) chunks completed by them"""
+        data = self._pending + data
+        usable = len(data) - len(data) % self.frame_bytes
+        self._pending = data[usable:]
+        if not usable:
+            return []
+
+        frames = np.frombuffer(data[:usable], dtype='<i2').astype(np.float64).reshape(-1, self.frame_bytes // 2)
+        frame_squares = (frames ** 2).sum(axis=1)
+        # Loudness of everything heard so far, up to and including each frame
+        running_squares = self._sum_squares + np.cumsum(frame_squares)
+        running_samples = self._samples + frames.shape[1] * np.arange(1, len(frames) + 1)
+        self._sum_squares = float(running_squares[-1])
+        self._samples = int(running_samples[-1])
+
+        with np.errstate(divide='ignore'):
+            frame_db = 10 * np.log10(frame_squares / frames.shape[1] / FULL_SCALE)
+            average_db = 10 * np.log10(running_squares / running_samples / FULL_SCALE)
+        threshold = np.where(np.isfinite(average_db), average_db + self.silence_thresh_offset, -60)
+        speech = frame_db > threshold
+
+        chunks = []
+        for i, is_speech in enumerate(speech):
+            self._buffer += data[i * self.frame_bytes:(i + 1) * self.frame_bytes]
+            position = len(self._buffer) // self.bytes_per_ms
+
+            if is_speech:
+                self._speech_end = position
+                self._silence_ms = 0
+            else:
+                self._silence_ms += self.frame_ms
+                if self._speech_end is None:
+                    # No speech yet: only keep the padding that goes before it
+                    excess = position - self.keep_silence
+                    if excess > 0:
+                        del self._buffer[:excess * self.bytes_per_ms]
+                        self._start_ms += excess
+                elif self._silence_ms >= self.min_silence_len:
+                    self._cut = min(self._speech_end + self.keep_silence, position)
+
+            if self._speech_end is not None and len(self._buffer) // self.bytes_per_ms >= self.max_chunk_ms:
+                chunks.append(self._chunk(self._cut or self.max_chunk_ms))
+        return chunks
+
+    def finish(self):
+        """Return the last chunk, if the end of the stream had speech"""
+        if self._speech_end is None:
+            return []
+        end = min(self._speech_end + self.keep_silence, len(self._buffer) // self.bytes_per_ms)
+        return [self._chunk(end)]
+
+
+class ChunkedTranscriber:
+    """Transcribes long recordings as silence-delimited chunks on a shared thread pool.
+
+    `backend` is a speech_backends.SpeechBackend. Remote backends are network-bound
+    and local ones release the GIL inside their engine, so threads are enough; the
+    pool is shared by every request, which also bounds recognizer calls in flight.
+    """
+
+    def __init__(self, backend, workers=4, max_chunk_ms=30000, min_silence_len=500, silence_thresh_offset=-16):
+        self.backend = backend
+        self.workers = max(1, workers)
+        self.max_chunk_ms = max_chunk_ms
+        self.min_silence_len = min_silence_len
+        self.silence_thresh_offset = silence_thresh_offset
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='speech')
+            return self._executor
+
+    def _recognize_chunk(self, pcm, sample_rate):
+        import speech_recognition as sr
+
+        audio_data = sr.AudioData(pcm, sample_rate, 2)
+        try:
+            return self.backend.recognize(audio_data)
+        except sr.UnknownValueError:
+            # Nothing intelligible in this chunk, the others may still have speech
+            return ""
+
+    def transcribe_stream(self, pcm_blocks, sample_rate=16000):
+        """Transcribe 16-bit mono PCM arriving in blocks (see audio_stream.iter_pcm).
+
+        Chunks go to the recognizer as soon as they are cut, and reading pauses
+        while `2 * workers` chunks are waiting, so memory stays flat whatever the
+        length of the recording.
+
+        Returns (text, segments) where segments hold per-chunk start/end times in
+        seconds. Raises sr.UnknownValueError when no chunk had recognizable speech
+        and sr.RequestError when the recognizer could not be reached for any chunk.
+        """
+        import speech_recognition as sr
+
+        segmenter = StreamingSegmenter(
+            sample_rate=sample_rate,
+            max_chunk_ms=self.max_chunk_ms,
+            min_silence_len=self.min_silence_len,
+            silence_thresh_offset=self.silence_thresh_offset
+        )
+        executor = self._get_executor()
+        submitted = []
+
+        def submit(chunks):
+            for start, end, pcm in chunks:
+                # Wait for the oldest unfinished chunk while too many are queued
+                unfinished = [future for _, _, future in submitted[-2 * self.workers:] if not future.done()]
+                if len(unfinished) >= 2 * self.workers:
+                    unfinished[0].exception()
+                submitted.append((start, end, executor.submit(self._recognize_chunk, pcm, sample_rate)))
+
+        for block in pcm_blocks:
+            submit(segmenter.feed(block))
+        submit(segmenter.finish())
+
+        segments = []
+        request_errors = []
+        for start, end, future in submitted:
+            try:
+                text = future.result()
+            except sr.RequestError as e:
+                request_errors.append(e)
+                text = ""
+            segments.append({
+                'start': round(start / 1000, 2),
+                'end': round(end / 1000, 2),
+                'text': text
+            })
+
+        if request_errors and len(request_errors) == len(submitted):
+            raise request_errors[0]
+
+        text = " ".join(segment['text'] for segment in segments if segment['text'])
+        if not text:
+            raise sr.UnknownValueError()
+        return text, segments
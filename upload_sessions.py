@@ -0,0 +1,389 @@
+# upload_sessions.py
+import os
+import json
+import errno
+import time
+import sqlite3
+import hashlib
+import threading
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    path TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    sha256 TEXT,
+    metadata TEXT NOT NULL,
+    created REAL NOT NULL,
+    expires REAL NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_expires ON sessions (expires);
+
+-- Byte ranges received so far, merged on insert, so the range starting at 0 is the
+-- contiguous prefix and an upload is complete when that range covers it
+CREATE TABLE IF NOT EXISTS ranges (
+    upload_id TEXT NOT NULL,
+    start INTEGER NOT NULL,
+    end INTEGER NOT NULL,
+    PRIMARY KEY (upload_id, start)
+);
+"""
+
+
+class UploadNotFound(KeyError):
+    """The upload session doesn't exist, expired or was aborted"""
+    pass
+
+
+class _Hasher:
+    """SHA-256 of an upload's contiguous prefix, as far as this process has read it"""
+
+    def __init__(self):
+        self.sha = hashlib.sha256()
+        self.offset = 0
+        self.lock = threading.Lock()
+
+
+class UploadSessions:
+    """Resumable uploads written chunk by chunk into a preallocated file.
+
+    `create` reserves the file at its final path under a session id.
+    `write` stores a chunk at any offset and records its byte range, so a
+    client that lost its connection asks `status` for what is missing and
+    sends only that. Bytes that continue the contiguous prefix are hashed as
+    they are written, and out-of-order chunks are hashed from disk once the
+    prefix reaches them, so the SHA-256 is ready when the last byte lands.
+    Sessions live in SQLite shared by every process using the same index,
+    so chunks may arrive at any worker; a process that didn't see the
+    earlier chunks catches up by reading them back.
+    """
+
+    def __init__(self, index_path, ttl=24 * 3600, block_size=1024 * 1024):
+        self.index_path = index_path
+        self.ttl = ttl
+        self.block_size = block_size
+        self._local = threading.local()
+        self._hashers = {}
+        self._hashers_lock = threading.Lock()
+        # Wakes readers of a growing upload when a chunk lands in this process
+        self._changed = threading.Condition()
+        os.makedirs(os.path.dirname(os.path.abspath(index_path)), exist_ok=True)
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        # One connection per thread, and a new one after a fork (gunicorn preloads the app)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.index_path, timeout=30, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def create(self, upload_id, path, size, sha256=None, metadata=None):
+        """Preallocate `size` bytes at `path` and start a session for them.
+
+        `sha256` is the digest the client expects, checked by `finish`.
+        `metadata` is any JSON the caller wants back when the upload is done.
+        """
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o644)
+        try:
+            try:
+                # Reserves the blocks up front: the disk can't fill up halfway through an
+                # upload, and the file isn't fragmented by chunks landing out of order
+                os.posix_fallocate(fd, 0, size)
+            except AttributeError:
+                os.ftruncate(fd, size)
+            except OSError as e:
+                # Filesystems that can't preallocate get a sparse file; a full disk is an error
+                if e.errno not in (errno.EOPNOTSUPP, errno.EINVAL):
+                    raise
+                os.ftruncate(fd, size)
+        except OSError:
+            os.close(fd)
+            os.remove(path)
+            raise
+        else:
+            os.close(fd)
+
+        now = time.time()
+        self._connect().execute(
+            "INSERT INTO sessions (id, path, size, sha256, metadata, created, expires) VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (upload_id, path, size, sha256.lower() if sha256 else None, json.dumps(metadata or {}), now, now + self.ttl)
+        )
+        return self.status(upload_id)
+
+    def session(self, upload_id):
+        """The session's path, size, expected digest, metadata and whether it is finished; None if unknown"""
+        row = self._connect().execute(
+            "SELECT path, size, sha256, metadata, expires, completed FROM sessions WHERE id = ? AND expires > ?",
+            (upload_id, time.time())
+        ).fetchone()
+        if row is None:
+            return None
+        return {
+            'path': row[0],
+            'size': row[1],
+            'sha256': row[2],
+            'metadata': json.loads(row[3]),
+            'expires': row[4],
+            'completed': bool(row[5])
+        }
+
+    def _ranges(self, conn, upload_id):
+        return [[start, end] for start, end in conn.execute(
+            "SELECT start, end FROM ranges WHERE upload_id = ? ORDER BY start", (upload_id,)
+        )]
+
+    def _prefix_end(self, conn, upload_id):
+        row = conn.execute("SELECT end FROM ranges WHERE upload_id = ? AND start = 0", (upload_id,)).fetchone()
+        return row[0] if row else 0
+
+    def status(self, upload_id):
+        """What has been received: {'size', 'received', 'ranges', 'missing', 'complete', ...}"""
+        session = self.session(upload_id)
+        if session is None:
+            raise UploadNotFound(upload_id)
+        ranges = self._ranges(self._connect(), upload_id)
+        missing = []
+        position = 0
+        for start, end in ranges + [[session['size'], session['size']]]:
+            if start > position:
+                missing.append([position, start])
+            position = max(position, end)
+        return {
+            'uploadId': upload_id,
+            'size': session['size'],
+            'received': sum(end - start for start, end in ranges),
+            'ranges': ranges,
+            'missing': missing,
+            'complete': not missing,
+            'completed': session['completed'],
+            'expires': session['expires']
+        }
+
+    def _hasher(self, upload_id):
+        with self._hashers_lock:
+            hasher = self._hashers.get(upload_id)
+            if hasher is None:
+                hasher = self._hashers[upload_id] = _Hasher()
+            return hasher
+
+    def write(self, upload_id, offset, stream, length):
+        """Write `length` bytes read from `stream` at `offset`; returns the upload's status.
+
+        Whatever arrived before the stream broke off is kept, so a retry only
+        needs to send the rest. Raises UploadNotFound, or ValueError for a chunk
+        outside the file or an upload that is already finished.
+        """
+        session = self.session(upload_id)
+        if session is None:
+            raise UploadNotFound(upload_id)
+        if session['completed']:
+            raise ValueError("Upload is already complete")
+        if offset < 0 or length < 0 or offset + length > session['size']:
+            raise ValueError(f"Bytes {offset}-{offset + length} are outside the upload's {session['size']} bytes")
+
+        # Continuing the hashed prefix: hash while writing, so nothing needs reading back
+        hasher = self._hasher(upload_id)
+        hashing = hasher.lock.acquire(blocking=False)
+        if hashing and hasher.offset != offset:
+            hasher.lock.release()
+            hashing = False
+
+        written = 0
+        fd = os.open(session['path'], os.O_WRONLY)
+        try:
+            while written < length:
+                data = stream.read(min(self.block_size, length - written))
+                if not data:
+                    break
+                view = memoryview(data)
+                while view:
+                    count = os.pwrite(fd, view, offset + written)
+                    if hashing:
+                        hasher.sha.update(view[:count])
+                    view = view[count:]
+                    written += count
+        finally:
+            os.close(fd)
+            if hashing:
+                hasher.offset += written
+                hasher.lock.release()
+            if written:
+                self._add_range(upload_id, offset, offset + written)
+                with self._changed:
+                    self._changed.notify_all()
+
+        self._catch_up(upload_id, session['path'], wait=False)
+        return self.status(upload_id)
+
+    def _add_range(self, upload_id, start, end):
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if conn.execute("SELECT 1 FROM sessions WHERE id = ?", (upload_id,)).fetchone() is None:
+                raise UploadNotFound(upload_id)
+            # Overlapping and adjacent ranges are merged into one
+            touching = conn.execute(
+                "SELECT start, end FROM ranges WHERE upload_id = ? AND start <= ? AND end >= ?", (upload_id, end, start)
+            ).fetchall()
+            merged_start = min([start] + [row[0] for row in touching])
+            merged_end = max([end] + [row[1] for row in touching])
+            conn.execute("DELETE FROM ranges WHERE upload_id = ? AND start <= ? AND end >= ?", (upload_id, end, start))
+            conn.execute("INSERT INTO ranges (upload_id, start, end) VALUES (?, ?, ?)", (upload_id, merged_start, merged_end))
+            # Every chunk keeps a session that is still being uploaded from expiring
+            conn.execute("UPDATE sessions SET expires = ? WHERE id = ?", (time.time() + self.ttl, upload_id))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _catch_up(self, upload_id, path, wait=True):
+        """Hash the part of the contiguous prefix this process hasn't hashed yet, from disk.
+
+        Without `wait`, gives up when another chunk is being hashed; that one
+        catches up when it is done.
+        """
+        hasher = self._hasher(upload_id)
+        if not hasher.lock.acquire(blocking=wait):
+            return hasher
+        try:
+            prefix_end = self._prefix_end(self._connect(), upload_id)
+            if hasher.offset >= prefix_end:
+                return hasher
+            with open(path, 'rb') as f:
+                f.seek(hasher.offset)
+                while hasher.offset < prefix_end:
+                    data = f.read(min(self.block_size, prefix_end - hasher.offset))
+                    if not data:
+                        break
+                    hasher.sha.update(data)
+                    hasher.offset += len(data)
+        finally:
+            hasher.lock.release()
+        return hasher
+
+    def finish(self, upload_id):
+        """Mark a fully received upload as done and return its session with the file's 'sha256'.
+
+        Raises UploadNotFound, or ValueError when bytes are missing, it was
+        already finished, or the content doesn't match the digest the client
+        announced.
+        """
+        status = self.status(upload_id)
+        if status['completed']:
+            raise ValueError("Upload is already complete")
+        if not status['complete']:
+            raise ValueError(f"Upload is missing {status['size'] - status['received']} bytes")
+
+        session = self.session(upload_id)
+        hasher = self._catch_up(upload_id, session['path'])
+        with hasher.lock:
+            digest = hasher.sha.copy().hexdigest() if hasher.offset == session['size'] else None
+        if digest is None:
+            raise ValueError("Upload could not be read back for hashing")
+        if session['sha256'] and session['sha256'] != digest:
+            raise ValueError("Upload doesn't match its SHA-256")
+
+        # Kept, marked complete, until it expires: readers of the growing file still see
+        # its ranges and a repeated completion is refused rather than extracted twice
+        updated = self._connect().execute(
+            "UPDATE sessions SET completed = 1 WHERE id = ? AND completed = 0", (upload_id,)
+        ).rowcount
+        if not updated:
+            raise ValueError("Upload is already complete")
+        self._forget_hasher(upload_id)
+        session.update({'sha256': digest, 'completed': True})
+        return session
+
+    def _forget_hasher(self, upload_id):
+        with self._hashers_lock:
+            self._hashers.pop(upload_id, None)
+
+    def abort(self, upload_id):
+        """Forget a session; returns its path, for the caller to delete, or None if it was unknown"""
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = conn.execute("SELECT path FROM sessions WHERE id = ?", (upload_id,)).fetchone()
+            conn.execute("DELETE FROM sessions WHERE id = ?", (upload_id,))
+            conn.execute("DELETE FROM ranges WHERE upload_id = ?", (upload_id,))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        self._forget_hasher(upload_id)
+        with self._changed:
+            self._changed.notify_all()
+        return row[0] if row else None
+
+    def iter_received(self, upload_id, poll_interval=0.5, idle_timeout=None):
+        """Yield the upload's bytes in order as its contiguous prefix grows, until all have arrived.
+
+        Chunks written by this process wake the reader at once; those written
+        by others are noticed within `poll_interval` seconds. Raises
+        UploadNotFound if the session is aborted or expires first, and
+        TimeoutError if the prefix doesn't grow for `idle_timeout` seconds.
+        """
+        offset = 0
+        fd = None
+        last_progress = time.monotonic()
+        try:
+            while True:
+                session = self.session(upload_id)
+                if session is None:
+                    raise UploadNotFound(upload_id)
+                if fd is None:
+                    fd = os.open(session['path'], os.O_RDONLY)
+                prefix_end = self._prefix_end(self._connect(), upload_id)
+                while offset < prefix_end:
+                    data = os.pread(fd, min(self.block_size, prefix_end - offset), offset)
+                    if not data:
+                        break
+                    offset += len(data)
+                    last_progress = time.monotonic()
+                    yield data
+                if offset >= session['size']:
+                    return
+                if idle_timeout is not None and time.monotonic() - last_progress > idle_timeout:
+                    raise TimeoutError(f"No new bytes of upload {upload_id} for {idle_timeout} seconds")
+                with self._changed:
+                    self._changed.wait(poll_interval)
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def sweep(self, now=None):
+        """Forget expired sessions and return them as {'id', 'path', 'metadata', 'completed'}.
+
+        Their files are the caller's to expire.
+        """
+        now = time.time() if now is None else now
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            expired = [
+                {'id': row[0], 'path': row[1], 'metadata': json.loads(row[2]), 'completed': bool(row[3])}
+                for row in conn.execute("SELECT id, path, metadata, completed FROM sessions WHERE expires <= ?", (now,))
+            ]
+            for session in expired:
+                conn.execute("DELETE FROM sessions WHERE id = ?", (session['id'],))
+                conn.execute("DELETE FROM ranges WHERE upload_id = ?", (session['id'],))
+            conn.execute('COMMIT')
+        except Exception:
+            conn.execute('ROLLBACK')
+            raise
+        for session in expired:
+            self._forget_hasher(session['id'])
+        return expired
+
+    def stats(self):
+        active, completed, reserved = self._connect().execute(
+            "SELECT count(*) - coalesce(sum(completed), 0), coalesce(sum(completed), 0), "
+            "coalesce(sum(CASE WHEN completed = 0 THEN size ELSE 0 END), 0) FROM sessions WHERE expires > ?",
+            (time.time(),)
+        ).fetchone()
+        return {'active': active, 'completed': completed, 'reservedBytes': reserved, 'ttl': self.ttl}
@@ -0,0 +1,61 @@
+# video_pipeline.py
+import os
+import subprocess
+
+PREVIEW_SECONDS = 15
+FRAME_INTERVAL = 5  # Seconds between thumbnail frames
+FRAME_COUNT = 5
+
+
+def build_visual_command(video_path, preview_path, frame_pattern):
+    """ffmpeg command that writes the preview clip and the thumbnail frames in one decode.
+
+    `-t` on the input stops reading right after the last frame we need, so the
+    cost does not grow with the length of the video.
+    """
+    read_seconds = max(PREVIEW_SECONDS, FRAME_INTERVAL * FRAME_COUNT)
+    return [
+        'ffmpeg', '-y', '-nostdin',
+        '-t', str(read_seconds),
+        '-i', video_path,
+        '-filter_complex',
+        f"[0:v:0]split=2[clip][thumbs];"
+        f"[clip]scale=480:-2[preview];"
+        f"[thumbs]fps=1/{FRAME_INTERVAL}[frames]",
+        # Preview clip: first 15 seconds, 480px wide
+        '-map', '[preview]', '-map', '0:a:0?',
+        '-t', str(PREVIEW_SECONDS),
+        '-c:v', 'libx264', '-preset', 'veryfast',
+        '-c:a', 'aac', '-b:a', '128k',
+        preview_path,
+        # Thumbnails: one frame every 5 seconds, up to 5 frames
+        '-map', '[frames]',
+        '-frames:v', str(FRAME_COUNT),
+        '-q:v', '2',
+        frame_pattern
+    ]
+
+
+def extract_visuals(video_path, out_dir):
+    """Write the preview clip and thumbnail frames.
+
+    Returns (preview_path or None, [frame paths]); failures leave the video
+    without previews rather than failing the extraction.
+    """
+    preview_path = os.path.join(out_dir, "preview.mp4")
+    frame_pattern = os.path.join(out_dir, "frame_%d.jpg")
+    try:
+        subprocess.run(build_visual_command(video_path, preview_path, frame_pattern),
+                       check=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    except subprocess.CalledProcessError as e:
+        print(f"Error creating video previews: {e.stderr.decode(errors='replace')[-500:] if e.stderr else str(e)}")
+
+    frames = []
+    for i in range(1, FRAME_COUNT + 1):
+        frame_path = os.path.join(out_dir, f"frame_{i}.jpg")
+        if os.path.exists(frame_path):
+            frames.append(frame_path)
+
+    if not os.path.exists(preview_path) or os.path.getsize(preview_path) == 0:
+        preview_path = None
+    return preview_path, frames